@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Backfill the stat_facet_outcome attribute on existing plot metadata rows
+Rows registered before the attribute existed are invisible to the sparse
+stat-facet-outcome GSI; run this before setting DYNAMODB_STAT_FACET_INDEX
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.handlers.aws_clients import get_plot_table
+from src.handlers.dynamodb_pagination import parallel_scan
+
+
+def backfill_segment(items, dry_run):
+    table = get_plot_table()
+    updated = 0
+
+    for item in items:
+        if '#' not in item['city_scenario'] or item.get('stat_facet_outcome'):
+            continue
+
+        if not dry_run:
+            table.update_item(
+                Key={
+                    'city_scenario': item['city_scenario'],
+                    'outcome_stat_facet': item['outcome_stat_facet']
+                },
+                UpdateExpression='SET stat_facet_outcome = :sfo',
+                ExpressionAttributeValues={
+                    ':sfo': f"{item['statistic_type']}#{item['facet_choice']}#{item['outcome']}"
+                }
+            )
+        updated += 1
+
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill stat_facet_outcome for the sparse GSI")
+    parser.add_argument("--segments", type=int, default=8,
+                       help="Parallel scan segments (default: 8)")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Count rows that need the attribute without writing")
+
+    args = parser.parse_args()
+
+    try:
+        print(f"🔍 Scanning {get_plot_table().name} with {args.segments} segments...")
+        counts = parallel_scan(
+            get_plot_table,
+            args.segments,
+            lambda items: backfill_segment(items, args.dry_run),
+            ProjectionExpression='city_scenario, outcome_stat_facet, outcome, statistic_type, facet_choice, stat_facet_outcome'
+        )
+        action = "need backfill" if args.dry_run else "backfilled"
+        print(f"✅ {sum(counts):,} rows {action}")
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
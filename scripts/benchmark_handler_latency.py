@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold vs warm Lambda handler latency
+Compares per-invocation client construction (before) with pooled clients (after)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.handlers import aws_clients
+from src.handlers.plot_discovery import search_plots, get_all_available_cities
+from src.handlers.plot_retrieval import get_plot
+
+SAMPLE_PLOT = {'data': [{'x': [2020, 2021, 2022], 'y': [1.0, 2.0, 3.0]}], 'layout': {'title': 'benchmark'}}
+
+
+def seed_fixtures(city, scenario, plot_key):
+    """Create the table, bucket and one plot so the handlers have something to read"""
+    bucket_name = os.environ.get('S3_BUCKET_NAME', 'prerun-plots-bucket-local')
+    table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'jheem-plot-metadata')
+
+    s3 = aws_clients.get_s3_client()
+    s3.create_bucket(Bucket=bucket_name)
+    s3.put_object(Bucket=bucket_name, Key=plot_key, Body=json.dumps(SAMPLE_PLOT).encode('utf-8'))
+
+    dynamodb = aws_clients.get_dynamodb_resource()
+    table = dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[
+            {'AttributeName': 'city_scenario', 'KeyType': 'HASH'},
+            {'AttributeName': 'outcome_stat_facet', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'city_scenario', 'AttributeType': 'S'},
+            {'AttributeName': 'outcome_stat_facet', 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    table.put_item(Item={
+        'city_scenario': f"{city}#{scenario}",
+        'outcome_stat_facet': 'incidence#mean.and.interval#none',
+        'outcome': 'incidence',
+        'statistic_type': 'mean.and.interval',
+        'facet_choice': 'none',
+        's3_key': plot_key,
+        'file_size': 128
+    })
+
+
+def time_invocations(handler, event, iterations, pooled):
+    """Return per-invocation latencies in milliseconds; the first one is the cold start"""
+    aws_clients.reset_clients()
+    timings = []
+
+    for _ in range(iterations):
+        if not pooled:
+            # Simulates the old behaviour of building clients inside every invocation
+            aws_clients.reset_clients()
+
+        start = time.perf_counter()
+        response = handler(event, None)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        if response['statusCode'] >= 400:
+            raise RuntimeError(f"{handler.__name__} returned {response['statusCode']}: {response['body']}")
+
+    return timings
+
+
+def summarize(timings):
+    warm = timings[1:] or timings
+    return {
+        'cold_ms': timings[0],
+        'warm_p50_ms': statistics.median(warm),
+        'warm_mean_ms': statistics.mean(warm)
+    }
+
+
+def run_benchmark(iterations, city, scenario, plot_key):
+    cases = [
+        ('search_plots', search_plots, {'queryStringParameters': {'city': city, 'scenario': scenario}}),
+        ('get_all_available_cities', get_all_available_cities, {}),
+        ('get_plot', get_plot, {'queryStringParameters': {'plotKey': plot_key}})
+    ]
+
+    results = {}
+    print(f"{'handler':<26} {'mode':<8} {'cold ms':>9} {'warm p50':>9} {'warm mean':>10}")
+    print("-" * 66)
+
+    for name, handler, event in cases:
+        results[name] = {}
+        for mode, pooled in (('before', False), ('after', True)):
+            summary = summarize(time_invocations(handler, event, iterations, pooled))
+            results[name][mode] = summary
+            print(f"{name:<26} {mode:<8} {summary['cold_ms']:9.1f} "
+                  f"{summary['warm_p50_ms']:9.1f} {summary['warm_mean_ms']:10.1f}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold vs warm handler invocation latency")
+    parser.add_argument("--iterations", type=int, default=50,
+                       help="Invocations per handler and mode (default: 50)")
+    parser.add_argument("--moto", action="store_true",
+                       help="Run against in-process moto mocks with seeded fixtures instead of live endpoints")
+    parser.add_argument("--city", default="C.12580")
+    parser.add_argument("--scenario", default="cessation")
+    parser.add_argument("--plot-key", default="plots/benchmark_plot.json")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+
+    if args.moto:
+        try:
+            from moto import mock_aws
+        except ImportError:
+            print("❌ --moto requires the moto package (pip install moto)")
+            sys.exit(1)
+
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'test')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+        os.environ['S3_ENDPOINT_URL'] = ''
+        os.environ['DYNAMODB_ENDPOINT_URL'] = ''
+
+        with mock_aws():
+            seed_fixtures(args.city, args.scenario, args.plot_key)
+            results = run_benchmark(args.iterations, args.city, args.scenario, args.plot_key)
+    else:
+        results = run_benchmark(args.iterations, args.city, args.scenario, args.plot_key)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end plot delivery latency through the deployed API
+Compares proxying plot bodies through Lambda with presigned-URL delivery
+for a small and a large plot
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import requests
+
+
+def fetch_proxy(base_url, plot_key):
+    """Fetch the plot body through GET /plot; returns bytes received"""
+    response = requests.get(f"{base_url}/plot", params={'plotKey': plot_key, 'delivery': 'proxy'},
+                            headers={'Accept-Encoding': 'gzip'})
+    response.raise_for_status()
+    return len(response.content)
+
+
+def fetch_presigned(base_url, plot_key):
+    """Ask GET /plot for a URL, then download the object directly from S3/CloudFront"""
+    response = requests.get(f"{base_url}/plot", params={'plotKey': plot_key, 'delivery': 'url'})
+    response.raise_for_status()
+    payload = response.json()
+
+    if 'url' not in payload:
+        # Below LARGE_PLOT_THRESHOLD_BYTES the handler proxies the body anyway
+        return len(response.content)
+
+    body = requests.get(payload['url'], headers={'Accept-Encoding': 'gzip'})
+    body.raise_for_status()
+    return len(body.content)
+
+
+def time_requests(fetch, base_url, plot_key, iterations):
+    timings = []
+    size = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        size = fetch(base_url, plot_key)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark proxy vs presigned-URL plot delivery")
+    parser.add_argument("base_url",
+                       help="API base URL (e.g. https://<api-id>.execute-api.us-east-1.amazonaws.com/prod)")
+    parser.add_argument("--small-plot", required=True, help="plotKey of a small plot")
+    parser.add_argument("--large-plot", required=True,
+                       help="plotKey of a plot above LARGE_PLOT_THRESHOLD_BYTES")
+    parser.add_argument("--iterations", type=int, default=20,
+                       help="Requests per plot and mode (default: 20)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip('/')
+
+    print(f"{'plot':<8} {'mode':<10} {'bytes':>10} {'p50 ms':>9} {'p90 ms':>9} {'mean ms':>9}")
+    print("-" * 60)
+
+    results = {}
+    for label, plot_key in (('small', args.small_plot), ('large', args.large_plot)):
+        results[label] = {}
+        for mode, fetch in (('proxy', fetch_proxy), ('presigned', fetch_presigned)):
+            try:
+                timings, size = time_requests(fetch, base_url, plot_key, args.iterations)
+            except requests.RequestException as e:
+                print(f"{label:<8} {mode:<10} ❌ {e}")
+                continue
+
+            ordered = sorted(timings)
+            summary = {
+                'bytes': size,
+                'p50_ms': statistics.median(ordered),
+                'p90_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+                'mean_ms': statistics.mean(ordered)
+            }
+            results[label][mode] = summary
+            print(f"{label:<8} {mode:<10} {size:>10,} {summary['p50_ms']:9.1f} "
+                  f"{summary['p90_ms']:9.1f} {summary['mean_ms']:9.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
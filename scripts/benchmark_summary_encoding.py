@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON vs columnar encodings of city summary data
+Compares raw size, gzip size/ratio and decode time for each summary file
+(or a synthetic city shaped like docs/native-plotting-architecture.md)
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.handlers.summary_columnar import decode_columnar, encode_columnar, read_columnar
+
+AGES = ['13-24 years', '25-34 years', '35-44 years', '45-54 years', '55+ years']
+SEXES = ['heterosexual_male', 'msm', 'female']
+RACES = ['black', 'hispanic', 'other']
+
+
+def synthetic_summary(outcomes, seed=0):
+    """Build a summary with every age x sex x race stratum for 3 scenarios and 2 variants"""
+    rng = random.Random(seed)
+    outcome_names = [f"outcome_{i}" for i in range(outcomes)]
+    simulations = {}
+    for scenario in ('cessation', 'brief_interruption', 'prolonged_interruption'):
+        for variant in ('baseline', 'intervention'):
+            for outcome in outcome_names:
+                data = {}
+                for age, sex, race in itertools.product(AGES, SEXES, RACES):
+                    points = []
+                    for year in range(2010, 2036):
+                        value = round(rng.uniform(0, 500), 2)
+                        points.append({'year': year, 'value': value,
+                                       'lower': round(value * 0.8, 2), 'upper': round(value * 1.2, 2)})
+                    data[f"{age}_{sex}_{race}"] = points
+                simulations.setdefault(scenario, {}).setdefault(variant, {})[outcome] = {
+                    'metadata': {'outcome': outcome}, 'data': data
+                }
+    return {
+        'metadata': {
+            'city': 'synthetic',
+            'scenarios': list(simulations),
+            'outcomes': {name: {'id': name, 'display_name': name} for name in outcome_names},
+            'dimensions': {
+                'age': {'values': AGES, 'label': 'age'},
+                'sex': {'values': SEXES, 'label': 'sex'},
+                'race': {'values': RACES, 'label': 'race'}
+            }
+        },
+        'simulations': simulations,
+        'observations': {}
+    }
+
+
+def time_ms(func, arg, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def benchmark(name, summary, iterations):
+    json_bytes = json.dumps(summary, separators=(',', ':')).encode('utf-8')
+    col_bytes = encode_columnar(summary)
+    json_gz = len(gzip.compress(json_bytes, compresslevel=9))
+    col_gz = len(gzip.compress(col_bytes, compresslevel=9))
+
+    result = {
+        'json_bytes': len(json_bytes),
+        'json_gzip_bytes': json_gz,
+        'json_gzip_ratio': len(json_bytes) / json_gz,
+        'columnar_bytes': len(col_bytes),
+        'columnar_gzip_bytes': col_gz,
+        'columnar_gzip_ratio': len(col_bytes) / col_gz,
+        'json_parse_ms': time_ms(json.loads, json_bytes, iterations),
+        'columnar_read_ms': time_ms(read_columnar, col_bytes, iterations),
+        'columnar_decode_ms': time_ms(decode_columnar, col_bytes, iterations)
+    }
+
+    print(f"\n📊 {name}")
+    print(f"   {'format':<10} {'bytes':>13} {'gzipped':>12} {'ratio':>7}")
+    print(f"   {'json':<10} {result['json_bytes']:13,} {result['json_gzip_bytes']:12,} {result['json_gzip_ratio']:6.1f}x")
+    print(f"   {'columnar':<10} {result['columnar_bytes']:13,} {result['columnar_gzip_bytes']:12,} "
+          f"{result['columnar_gzip_ratio']:6.1f}x")
+    print(f"   json.loads:                 {result['json_parse_ms']:8.1f} ms")
+    print(f"   columnar header + arrays:   {result['columnar_read_ms']:8.1f} ms")
+    print(f"   columnar back to JSON shape:{result['columnar_decode_ms']:8.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and columnar summary encodings")
+    parser.add_argument("inputs", nargs="*",
+                       help="Summary JSON files (default: one synthetic city)")
+    parser.add_argument("--synthetic-outcomes", type=int, default=12,
+                       help="Outcomes in the synthetic city (default: 12)")
+    parser.add_argument("--iterations", type=int, default=5,
+                       help="Decode timings per format, median reported (default: 5)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+
+    args = parser.parse_args()
+
+    results = {}
+    if args.inputs:
+        for input_path in args.inputs:
+            with open(input_path) as f:
+                results[input_path] = benchmark(input_path, json.load(f), args.iterations)
+    else:
+        summary = synthetic_summary(args.synthetic_outcomes)
+        results['synthetic'] = benchmark(f"synthetic ({args.synthetic_outcomes} outcomes)", summary, args.iterations)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
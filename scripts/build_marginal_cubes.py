@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Build precomputed marginal cubes for every facet combination
+Reduces each city's finest-grained summary once, in lattice order, into all
+FACETS marginals and writes them as a single keyed .npz artifact
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Sibling scripts import each other by bare name, so scripts/ must be on the
+# path even when this module is imported rather than run
+sys.path.insert(1, str(Path(__file__).resolve().parent))
+
+from generate_orchestration_config import FACETS
+from src.handlers.aws_clients import get_s3_client
+from src.handlers.facet_aggregation import SummaryCube, lattice_order, parse_facet, write_marginals
+from src.handlers.summary_columnar import MAGIC
+from src.handlers.summary_data import summary_key
+
+
+def load_cube(input_path):
+    """Build a cube from a summary .json or columnar .col file"""
+    raw = Path(input_path).read_bytes()
+    if raw.startswith(MAGIC):
+        return SummaryCube.from_columnar(raw)
+    return SummaryCube.from_summary(json.loads(raw))
+
+
+def build_city(input_path, output_dir, facets):
+    """
+    Returns:
+        (city, artifact_path, written facets, seconds spent reducing)
+    """
+    # City codes contain a dot (C.12580), so strip known suffixes rather than using stem
+    city = Path(input_path).name
+    for suffix in ('.json', '.col'):
+        if suffix in city:
+            city = city[:city.index(suffix)]
+    cube = load_cube(input_path)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    artifact_path = output_dir / f"{city}.marginals.npz"
+
+    start = time.perf_counter()
+    written = write_marginals(cube, facets, artifact_path)
+    return city, artifact_path, written, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute facet marginals for city summaries")
+    parser.add_argument("inputs", nargs="+",
+                       help="City summary files (.json from extract_summary_data.R or .col)")
+    parser.add_argument("--facets", nargs="+", default=FACETS,
+                       help="Facet choices to build (default: all FACETS)")
+    parser.add_argument("--output-dir", default="summary_output",
+                       help="Directory for <city>.marginals.npz (default: summary_output)")
+    parser.add_argument("--upload", action="store_true",
+                       help="Upload the artifacts to the summary bucket")
+    parser.add_argument("--bucket", default=os.environ.get('SUMMARY_BUCKET_NAME', 'jheem-summary-data'),
+                       help="Summary bucket (default: $SUMMARY_BUCKET_NAME or jheem-summary-data)")
+
+    args = parser.parse_args()
+    output_dir = Path(args.output_dir)
+    print(f"🔢 Lattice order: {', '.join(lattice_order(args.facets))}")
+
+    failures = 0
+    for input_path in args.inputs:
+        try:
+            city, artifact_path, written, seconds = build_city(input_path, output_dir, args.facets)
+            print(f"📊 {city}: {len(written)} marginals in {seconds * 1000:.0f} ms, "
+                  f"{artifact_path.stat().st_size:,} bytes")
+            built = {frozenset(keep) for keep in written.values()}
+            skipped = [facet for facet in args.facets if frozenset(parse_facet(facet)) not in built]
+            if skipped:
+                print(f"⚠️  Skipped facets with dimensions this city lacks: {', '.join(skipped)}")
+
+            if args.upload:
+                get_s3_client().put_object(
+                    Bucket=args.bucket,
+                    Key=summary_key(city, '.marginals.npz'),
+                    Body=artifact_path.read_bytes(),
+                    ContentType='application/octet-stream'
+                )
+                print(f"✅ Uploaded s3://{args.bucket}/{summary_key(city, '.marginals.npz')}")
+        except Exception as e:
+            failures += 1
+            print(f"❌ {input_path}: {e}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Pack generated plots into one bundle object per city#scenario partition
+Each bundle is the concatenated plot JSON plus an offset index; plots are
+registered as "<bundle key>#<offset>+<length>" so get_plot serves them with a
+ranged GET, and a partition of hundreds of plots costs one S3 object
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from upload_plots import read_plot_record
+from src.handlers.aws_clients import get_s3_client
+from src.handlers.plot_bundle import bundle_key, bundle_ref, index_bytes, write_bundle
+from src.handlers.plot_content import content_hash
+from src.handlers.plot_discovery import register_plots_batch
+from src.handlers.plot_validation import VALIDATED_METADATA_KEY
+
+
+def collect_partitions(plots_dir, city=None):
+    """
+    Group plot files by partition
+
+    Returns:
+        ({(city, scenario): {outcome_stat_facet: raw}}, errors)
+    """
+    plots_dir = Path(plots_dir)
+    partitions, errors = {}, []
+    for plot_file in sorted(plots_dir.rglob("*.json")):
+        if plot_file.name.endswith("_metadata.json"):
+            continue
+        try:
+            record = read_plot_record(plot_file, city or plot_file.relative_to(plots_dir).parts[0])
+            outcome_stat_facet = f"{record['outcome']}#{record['statistic_type']}#{record['facet_choice']}"
+            partitions.setdefault((record["city"], record["scenario"]), {})[outcome_stat_facet] = plot_file.read_bytes()
+        except Exception as e:
+            errors.append(f"{plot_file}: {e}")
+    return partitions, errors
+
+
+def upload_bundle(s3_client, bucket_name, key, body, index):
+    """PUT a bundle and its index unless a bundle with the same contents is already stored"""
+    try:
+        s3_client.head_object(Bucket=bucket_name, Key=key)
+        return False
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+            raise
+
+    # The index goes first so a visible bundle always has one
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=f"{key}.index.json",
+        Body=index_bytes(index),
+        ContentType="application/json"
+    )
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=key,
+        Body=body,
+        ContentType="application/octet-stream",
+        Metadata={VALIDATED_METADATA_KEY: "true", "sha256": index["content_hash"]}
+    )
+    return True
+
+
+def prune_bundles(s3_client, bucket_name, key):
+    """Delete the partition's other bundles (and their indexes), returning how many bundles went"""
+    prefix = key.rsplit("/", 1)[0] + "/"
+    stale = []
+    for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=bucket_name, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if not obj["Key"].startswith(key):
+                stale.append(obj["Key"])
+    for start in range(0, len(stale), 1000):
+        s3_client.delete_objects(
+            Bucket=bucket_name,
+            Delete={"Objects": [{"Key": stale_key} for stale_key in stale[start:start + 1000]]}
+        )
+    return sum(1 for stale_key in stale if stale_key.endswith(".bundle"))
+
+
+def register_bundle(key, index, members, created_at):
+    """Register every member of a bundle; returns (registered, unchanged, errors)"""
+    records = []
+    for outcome_stat_facet, (offset, length) in index["plots"].items():
+        outcome, statistic, facet = outcome_stat_facet.split("#")
+        records.append({
+            "city": index["city"],
+            "scenario": index["scenario"],
+            "outcome": outcome,
+            "statistic_type": statistic,
+            "facet_choice": facet,
+            "s3_key": bundle_ref(key, offset, length),
+            "file_size": length,
+            "content_hash": content_hash(members[outcome_stat_facet]),
+            "created_at": created_at
+        })
+
+    registered, unchanged, errors = 0, 0, []
+    batch_size = int(os.environ.get("MAX_BATCH_REGISTER_PLOTS", "500"))
+    for start in range(0, len(records), batch_size):
+        response = register_plots_batch({"body": json.dumps({"plots": records[start:start + batch_size]})}, None)
+        body = json.loads(response["body"])
+        if "results" not in body:
+            errors.append(body.get("error", f"HTTP {response['statusCode']}"))
+            continue
+        registered += body["registered"]
+        unchanged += body["unchanged"]
+        errors.extend(
+            f"{result['city_scenario']} {result['outcome_stat_facet']}: {result['error']}"
+            for result in body["results"] if result["status"] in ("invalid", "failed")
+        )
+    return registered, unchanged, errors
+
+
+def build_plot_bundles(plots_dir, bucket_name=None, city=None, output_dir=None, prune=False):
+    """
+    Bundle every partition under plots_dir, optionally uploading and registering them
+
+    Args:
+        bucket_name: Upload bundles here and register their plots; None only
+            builds them
+        output_dir: Also write <bundle>.bundle and <bundle>.bundle.index.json
+            locally, mirroring the S3 keys
+        prune: After registering, delete the partition's older bundles
+
+    Returns:
+        {"partitions", "plots", "uploaded", "registered", "unchanged", "pruned", "failed", "errors"}
+    """
+    partitions, errors = collect_partitions(plots_dir, city)
+    stats = {"partitions": len(partitions), "plots": 0, "uploaded": 0, "registered": 0,
+             "unchanged": 0, "pruned": 0, "failed": len(errors), "errors": errors}
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    s3_client = get_s3_client() if bucket_name else None
+
+    for (partition_city, scenario), members in sorted(partitions.items()):
+        try:
+            body, index = write_bundle(members)
+        except ValueError as e:
+            stats["failed"] += len(members)
+            stats["errors"].append(f"{partition_city}#{scenario}: {e}")
+            continue
+        index.update(city=partition_city, scenario=scenario)
+        key = bundle_key(partition_city, scenario, index["content_hash"])
+        stats["plots"] += len(members)
+
+        if output_dir:
+            local_path = Path(output_dir) / key
+            local_path.parent.mkdir(parents=True, exist_ok=True)
+            local_path.write_bytes(body)
+            local_path.with_name(f"{local_path.name}.index.json").write_bytes(index_bytes(index))
+
+        if not bucket_name:
+            continue
+        try:
+            stats["uploaded"] += int(upload_bundle(s3_client, bucket_name, key, body, index))
+        except ClientError as e:
+            stats["failed"] += len(members)
+            stats["errors"].append(f"{key}: {e}")
+            continue
+
+        registered, unchanged, register_errors = register_bundle(key, index, members, created_at)
+        stats["registered"] += registered
+        stats["unchanged"] += unchanged
+        stats["failed"] += len(register_errors)
+        stats["errors"].extend(register_errors)
+        # Older bundles may still be referenced until every member is re-registered
+        if prune and not register_errors:
+            stats["pruned"] += prune_bundles(s3_client, bucket_name, key)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack plots into per-partition bundles and register them")
+    parser.add_argument("plots_dir", help="Directory of generated plots (plots/<city>/... or one city's directory)")
+    parser.add_argument("--city", help="City of every plot (default: first directory below plots_dir)")
+    parser.add_argument("--output-dir", help="Also write bundles and their indexes under this directory")
+    parser.add_argument("--upload", action="store_true", help="Upload bundles and register their plots")
+    parser.add_argument("--bucket", default=os.environ.get("S3_BUCKET_NAME", "prerun-plots-bucket-local"),
+                       help="Plot bucket (default: $S3_BUCKET_NAME)")
+    parser.add_argument("--prune", action="store_true",
+                       help="Delete each partition's superseded bundles once the new one is registered "
+                            "(only when plots_dir holds every plot of the partition)")
+
+    args = parser.parse_args()
+    if not args.upload and not args.output_dir:
+        parser.error("nothing to do: pass --upload and/or --output-dir")
+
+    stats = build_plot_bundles(
+        args.plots_dir,
+        bucket_name=args.bucket if args.upload else None,
+        city=args.city,
+        output_dir=args.output_dir,
+        prune=args.prune
+    )
+
+    print(f"📦 {stats['plots']} plots in {stats['partitions']} bundles, {stats['uploaded']} uploaded")
+    if args.upload:
+        print(f"📋 {stats['registered']} registered, {stats['unchanged']} unchanged, {stats['pruned']} old bundles pruned")
+    if stats["failed"]:
+        print(f"❌ {stats['failed']} failed:")
+        for error in stats["errors"][:20]:
+            print(f"   - {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Build the section index for per-city summary files
+Rewrites each summary as compact JSON, records the byte range of every
+scenario/outcome/stratum section, and optionally uploads the JSON, its
+gzipped copy and the index so GET /v2/data/{city} can serve slices
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.handlers.aws_clients import get_s3_client
+from src.handlers.summary_data import index_key, summary_key, write_indexed_summary
+
+
+def build_city(input_path, output_dir):
+    """
+    Write <city>.json, <city>.json.gz and <city>.index.json to output_dir
+
+    Returns:
+        (city, json_path, gzip_path, index_path, index)
+    """
+    with open(input_path) as f:
+        summary = json.load(f)
+
+    city = (summary.get('metadata') or {}).get('city') or Path(input_path).name.split('.json')[0]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    json_path = output_dir / f"{city}.json"
+    gzip_path = output_dir / f"{city}.json.gz"
+    index_path = output_dir / f"{city}.index.json"
+
+    with open(json_path, 'wb') as out:
+        index = write_indexed_summary(summary, out)
+
+    with open(json_path, 'rb') as src, gzip.open(gzip_path, 'wb', compresslevel=9) as dst:
+        dst.write(src.read())
+
+    with open(index_path, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+    return city, json_path, gzip_path, index_path, index
+
+
+def upload_city(city, json_path, gzip_path, index_path, index, bucket_name):
+    """
+    Upload the summary, then the index stamped with the summary's ETag
+
+    The index goes last so it never points at an object that is not there;
+    the data endpoint sends that ETag as IfMatch on its Range GETs.
+    """
+    s3_client = get_s3_client()
+
+    with open(json_path, 'rb') as f:
+        response = s3_client.put_object(
+            Bucket=bucket_name, Key=summary_key(city), Body=f, ContentType='application/json'
+        )
+    index['source_etag'] = response['ETag']
+
+    with open(gzip_path, 'rb') as f:
+        s3_client.put_object(
+            Bucket=bucket_name, Key=summary_key(city, '.json.gz'), Body=f,
+            ContentType='application/json', ContentEncoding='gzip'
+        )
+
+    body = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    with open(index_path, 'wb') as f:
+        f.write(body)
+    s3_client.put_object(
+        Bucket=bucket_name, Key=index_key(city), Body=body, ContentType='application/json'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build section indexes for city summary files")
+    parser.add_argument("inputs", nargs="+",
+                       help="Summary JSON files produced by extract_summary_data.R")
+    parser.add_argument("--output-dir", default="summary_output",
+                       help="Directory for the rewritten JSON, gzip and index files (default: summary_output)")
+    parser.add_argument("--upload", action="store_true",
+                       help="Upload the files to the summary bucket")
+    parser.add_argument("--bucket", default=os.environ.get('SUMMARY_BUCKET_NAME', 'jheem-summary-data'),
+                       help="Summary bucket (default: $SUMMARY_BUCKET_NAME or jheem-summary-data)")
+
+    args = parser.parse_args()
+    output_dir = Path(args.output_dir)
+
+    failures = 0
+    for input_path in args.inputs:
+        try:
+            city, json_path, gzip_path, index_path, index = build_city(input_path, output_dir)
+            strata = sum(
+                len(section.get('strata', {}))
+                for variants in index['sections'].values()
+                for sections in variants.values()
+                for section in sections.values()
+            )
+            print(f"📊 {city}: {index['size']:,} bytes, {gzip_path.stat().st_size:,} gzipped, "
+                  f"{strata:,} strata indexed")
+
+            if args.upload:
+                upload_city(city, json_path, gzip_path, index_path, index, args.bucket)
+                print(f"✅ Uploaded {city} to s3://{args.bucket}/{summary_key(city)}")
+        except Exception as e:
+            failures += 1
+            print(f"❌ {input_path}: {e}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
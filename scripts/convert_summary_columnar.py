@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Convert per-city summary JSON to the columnar binary encoding
+Writes <city>.col and <city>.col.gz (optionally uploading both next to the
+JSON summary) for clients that request the columnar form from /v2/data
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.handlers.aws_clients import get_s3_client
+from src.handlers.summary_columnar import COLUMNAR_MEDIA_TYPE, encode_columnar
+from src.handlers.summary_data import summary_key
+
+
+def convert_city(input_path, output_dir):
+    """
+    Encode one summary file
+
+    Returns:
+        (city, col_path, gzip_path, json_bytes, col_bytes)
+    """
+    raw = Path(input_path).read_bytes()
+    summary = json.loads(raw)
+    city = (summary.get('metadata') or {}).get('city') or Path(input_path).name.split('.json')[0]
+
+    encoded = encode_columnar(summary)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    col_path = output_dir / f"{city}.col"
+    gzip_path = output_dir / f"{city}.col.gz"
+    col_path.write_bytes(encoded)
+    gzip_path.write_bytes(gzip.compress(encoded, compresslevel=9))
+
+    return city, col_path, gzip_path, len(raw), len(encoded)
+
+
+def upload_city(city, col_path, gzip_path, bucket_name):
+    s3_client = get_s3_client()
+    s3_client.put_object(
+        Bucket=bucket_name, Key=summary_key(city, '.col'), Body=col_path.read_bytes(),
+        ContentType=COLUMNAR_MEDIA_TYPE
+    )
+    s3_client.put_object(
+        Bucket=bucket_name, Key=summary_key(city, '.col.gz'), Body=gzip_path.read_bytes(),
+        ContentType=COLUMNAR_MEDIA_TYPE, ContentEncoding='gzip'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert city summary JSON to the columnar encoding")
+    parser.add_argument("inputs", nargs="+",
+                       help="Summary JSON files produced by extract_summary_data.R")
+    parser.add_argument("--output-dir", default="summary_output",
+                       help="Directory for the .col and .col.gz files (default: summary_output)")
+    parser.add_argument("--upload", action="store_true",
+                       help="Upload the files to the summary bucket")
+    parser.add_argument("--bucket", default=os.environ.get('SUMMARY_BUCKET_NAME', 'jheem-summary-data'),
+                       help="Summary bucket (default: $SUMMARY_BUCKET_NAME or jheem-summary-data)")
+
+    args = parser.parse_args()
+    output_dir = Path(args.output_dir)
+
+    failures = 0
+    for input_path in args.inputs:
+        try:
+            city, col_path, gzip_path, json_bytes, col_bytes = convert_city(input_path, output_dir)
+            print(f"📊 {city}: {json_bytes:,} bytes JSON -> {col_bytes:,} bytes columnar "
+                  f"({gzip_path.stat().st_size:,} gzipped)")
+
+            if args.upload:
+                upload_city(city, col_path, gzip_path, args.bucket)
+                print(f"✅ Uploaded {city} to s3://{args.bucket}/{summary_key(city, '.col')}")
+        except Exception as e:
+            failures += 1
+            print(f"❌ {input_path}: {e}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
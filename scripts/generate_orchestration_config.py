@@ -9,6 +9,8 @@ import json
 import argparse
 from pathlib import Path
 
+from orchestration_cost_model import CostModel
+
 # Available data configuration - verified cities from simulation directory
 AVAILABLE_CITIES = [
     "C.12060", "C.12420", "C.12580", "C.12940", "C.14460", "C.16740", 
@@ -37,7 +39,8 @@ FACETS = [
     "age+race+sex+risk"  # All four facets
 ]
 
-def generate_city_based_jobs(cities=None, scenarios=None, outcomes=None, statistics=None, facets=None):
+def generate_city_based_jobs(cities=None, scenarios=None, outcomes=None, statistics=None, facets=None,
+                             cost_model=None):
     """Generate one job per city for optimal simulation reuse"""
     
     # Use provided parameters or defaults
@@ -46,6 +49,7 @@ def generate_city_based_jobs(cities=None, scenarios=None, outcomes=None, statist
     outcomes = outcomes or OUTCOMES
     statistics = statistics or STATISTICS
     facets = facets or FACETS
+    cost_model = cost_model or CostModel()
     
     jobs = []
     
@@ -62,15 +66,15 @@ def generate_city_based_jobs(cities=None, scenarios=None, outcomes=None, statist
         plot_count = len(scenarios) * len(outcomes) * len(statistics) * len(facets)
         job["expected_plots"] = plot_count
         
-        # Estimate execution time based on 4.05s per plot
-        estimated_seconds = plot_count * 4.05
+        # Estimate execution time from historical durations (4.05s per plot without history)
+        estimated_seconds = cost_model.estimate(job)
         job["estimated_hours"] = round(estimated_seconds / 3600, 2)
         
         jobs.append(job)
     
     return jobs
 
-def generate_test_subset_config():
+def generate_test_subset_config(cost_model=None):
     """Generate a test configuration with subset of data for validation"""
     # Test with 4 cities, limited outcomes/facets for manageable testing
     test_cities = ["C.12580", "C.12940", "C.14460", "C.16740"]
@@ -82,10 +86,11 @@ def generate_test_subset_config():
         cities=test_cities,
         outcomes=test_outcomes, 
         statistics=test_statistics,
-        facets=test_facets
+        facets=test_facets,
+        cost_model=cost_model
     )
 
-def generate_minimal_test_config():
+def generate_minimal_test_config(cost_model=None):
     """Generate ultra-minimal configuration for initial integration testing (1 plot)"""
     # Single city, single scenario, single outcome, single statistic, single facet
     minimal_cities = ["C.12580"]
@@ -99,10 +104,11 @@ def generate_minimal_test_config():
         scenarios=minimal_scenarios,
         outcomes=minimal_outcomes,
         statistics=minimal_statistics,
-        facets=minimal_facets
+        facets=minimal_facets,
+        cost_model=cost_model
     )
 
-def generate_medium_subset_config():
+def generate_medium_subset_config(cost_model=None):
     """Generate a medium-scale configuration for serious testing (~1000 plots)"""
     # Use 6 cities with more outcomes but limited statistics/facets
     medium_cities = ["C.12580", "C.12940", "C.14460", "C.16740", "C.19100", "C.26420"]
@@ -114,21 +120,23 @@ def generate_medium_subset_config():
         cities=medium_cities,
         outcomes=medium_outcomes,
         statistics=medium_statistics, 
-        facets=medium_facets
+        facets=medium_facets,
+        cost_model=cost_model
     )
 
-def generate_orchestration_config(config_type="test", output_dir="orchestration_configs"):
+def generate_orchestration_config(config_type="test", output_dir="orchestration_configs", results_dir="results"):
     """Generate complete orchestration configuration"""
     Path(output_dir).mkdir(exist_ok=True)
+    cost_model = CostModel.fit(results_dir)
     
     if config_type == "minimal":
-        jobs = generate_minimal_test_config()
+        jobs = generate_minimal_test_config(cost_model)
     elif config_type == "test":
-        jobs = generate_test_subset_config()
+        jobs = generate_test_subset_config(cost_model)
     elif config_type == "medium":
-        jobs = generate_medium_subset_config()
+        jobs = generate_medium_subset_config(cost_model)
     elif config_type == "full":
-        jobs = generate_city_based_jobs()
+        jobs = generate_city_based_jobs(cost_model=cost_model)
     else:
         raise ValueError(f"Unknown config_type: {config_type}")
     
@@ -160,6 +168,9 @@ def generate_orchestration_config(config_type="test", output_dir="orchestration_
     print(f"  - Total plots: {config['total_expected_plots']:,}")
     print(f"  - Sequential time: {config['estimated_total_hours']:.1f} hours")
     print(f"  - Parallel time: {config['estimated_parallel_hours']:.1f} hours")
+    print(f"  - Cost model: {cost_model.describe()[0]}")
+    for line in cost_model.describe()[1:]:
+        print(f"      {line}")
     print(f"  - Config files: {output_dir}/")
     print(f"  - Master config: {config_file}")
     
@@ -171,7 +182,9 @@ if __name__ == "__main__":
                        help="Configuration type: minimal (1 plot), test (~100 plots), medium (~1000 plots), full (~64K plots)")
     parser.add_argument("--output-dir", default="orchestration_configs", 
                        help="Output directory for configuration files")
+    parser.add_argument("--results-dir", default="results",
+                       help="Earlier orchestration results to fit time estimates from (default: results)")
     
     args = parser.parse_args()
     
-    generate_orchestration_config(args.type, args.output_dir)
+    generate_orchestration_config(args.type, args.output_dir, args.results_dir)
@@ -13,13 +13,277 @@ import psutil
 import argparse
 import sys
 import os
+import queue
+import logging
+from logging.handlers import RotatingFileHandler
+from collections import deque
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from generate_orchestration_config import generate_city_based_jobs
+from orchestration_cost_model import CostModel
+from orchestration_ledger import JobLedger, job_id
+from upload_plots import upload_plots
+
+# Per-plot success line printed by batch_plot_generator.R (also parsed by report-progress.sh)
+GENERATED_MARKER = "SUCCESS: Generated"
+
+# Lines of each stream kept in memory for the results file and failure output
+OUTPUT_TAIL_LINES = 50
+
+def parse_generated_plot(line):
+    """Plot named by a "SUCCESS: Generated ..." line, or None for any other line"""
+    if GENERATED_MARKER not in line:
+        return None
+    return line.split(GENERATED_MARKER, 1)[1].strip()
+
+class PlotProgress:
+    """
+    Live plot throughput and ETA across all running jobs
+    
+    Throughput is measured over a sliding window of per-plot completions
+    (default 10 minutes), so the ETA reflects the current rate rather than
+    averages of whole jobs that may take hours to finish.
+    """
+    
+    def __init__(self, total_plots, already_done=0, window=600):
+        self.total_plots = total_plots
+        self.done = already_done
+        self.window = window
+        self.start_time = time.time()
+        self._times = deque()
+        self._lock = threading.Lock()
+    
+    def plot_done(self):
+        with self._lock:
+            now = time.time()
+            self.done += 1
+            self._times.append(now)
+            while self._times and self._times[0] < now - self.window:
+                self._times.popleft()
+    
+    def rate(self):
+        """Plots per second over the window (or since start, if shorter)"""
+        with self._lock:
+            now = time.time()
+            while self._times and self._times[0] < now - self.window:
+                self._times.popleft()
+            span = min(self.window, now - self.start_time)
+            return len(self._times) / span if span > 0 else 0.0
+    
+    def describe(self):
+        rate = self.rate()
+        remaining = max(0, self.total_plots - self.done)
+        eta = f"{remaining / rate / 3600:.1f}h" if rate > 0 else "unknown"
+        percent = 100 * self.done / self.total_plots if self.total_plots else 100
+        return (f"📈 {self.done:,}/{self.total_plots:,} plots ({percent:.1f}%) · "
+                f"{rate * 60:.1f} plots/min · ETA {eta}")
+
+def split_job(job, chunk_by):
+    """
+    Split a city job into scenario- or outcome-level chunks
+    
+    Chunks of one city still share its simulations on disk; chunking by
+    scenario keeps each simset load inside a single chunk, chunking by
+    outcome gives finer balancing at the cost of reloading simsets.
+    """
+    if chunk_by == "city":
+        return [job]
+    
+    field = {"scenario": "scenarios", "outcome": "outcomes"}[chunk_by]
+    chunks = []
+    for value in job[field]:
+        chunk = dict(job, **{field: [value]})
+        chunk["expected_plots"] = (len(chunk["scenarios"]) * len(chunk["outcomes"]) *
+                                   len(chunk["statistics"]) * len(chunk["facets"]))
+        chunk["chunk"] = f"{chunk_by}={value}"
+        chunks.append(chunk)
+    return chunks
+
+class WorkStealingScheduler:
+    """
+    Hands chunks to workers longest-processing-time first, with stealing
+    
+    Cities are assigned whole to per-worker queues (greedy LPT on estimated
+    cost) so a worker runs a city's chunks back to back. A worker whose
+    queue runs dry steals from the worker with the most estimated work left:
+    a whole city that worker has not started if there is one, otherwise its
+    smallest remaining chunk.
+    """
+    
+    def __init__(self, jobs, workers, estimate):
+        self.estimate = estimate
+        self.queues = [deque() for _ in range(workers)]
+        self.remaining = [0.0] * workers
+        self._lock = threading.Lock()
+        
+        by_city = {}
+        for job in jobs:
+            by_city.setdefault(job["city"], []).append(job)
+        cities = sorted(by_city.values(), key=lambda chunks: -sum(map(estimate, chunks)))
+        
+        for chunks in cities:
+            worker = min(range(workers), key=lambda w: self.remaining[w])
+            chunks.sort(key=estimate, reverse=True)
+            self.queues[worker].extend(chunks)
+            self.remaining[worker] += sum(map(estimate, chunks))
+    
+    def _steal(self, thief):
+        victim = max(range(len(self.queues)), key=lambda w: self.remaining[w] if self.queues[w] else -1)
+        victim_queue = self.queues[victim]
+        if not victim_queue:
+            return
+        
+        tail_city = victim_queue[-1]["city"]
+        stolen = deque()
+        if victim_queue[0]["city"] != tail_city:
+            while victim_queue and victim_queue[-1]["city"] == tail_city:
+                stolen.appendleft(victim_queue.pop())
+        else:
+            stolen.append(victim_queue.pop())
+        
+        cost = sum(map(self.estimate, stolen))
+        self.remaining[victim] -= cost
+        self.remaining[thief] += cost
+        self.queues[thief].extend(stolen)
+        print(f"🤏 Worker {thief} stole {len(stolen)} chunk(s) of {tail_city} from worker {victim}")
+    
+    def next_job(self, worker):
+        """Next chunk for a worker, or None when no work is left anywhere"""
+        with self._lock:
+            if not self.queues[worker]:
+                self._steal(worker)
+            if not self.queues[worker]:
+                return None
+            job = self.queues[worker].popleft()
+            self.remaining[worker] -= self.estimate(job)
+            return job
+
+class AdaptiveConcurrency:
+    """
+    Raises or lowers the number of concurrently running R processes
+    
+    A sampling thread sums the RSS of every running Rscript (and its
+    children) via psutil, keeps each job's peak, and estimates memory per
+    job as the largest recent peak plus headroom (the configured initial
+    estimate until a job has finished). Each sample sets the limit to the
+    running count plus however many more estimated jobs fit in available
+    memory, after reserving the growth running jobs have yet to reach.
+    No new jobs start while load average exceeds the CPU count, and the
+    limit drops below the running count under memory pressure; running
+    jobs are never killed, the limit only gates new starts.
+    """
+    
+    def __init__(self, min_parallel, max_parallel, memory_per_job_gb=4.0, memory_reserve_gb=2.0,
+                 interval=5, history=10, headroom=1.1):
+        self.min_parallel = min_parallel
+        self.max_parallel = max_parallel
+        self.initial_estimate = memory_per_job_gb * 1024 ** 3
+        self.reserve = memory_reserve_gb * 1024 ** 3
+        self.interval = interval
+        self.history = history
+        self.headroom = headroom
+        self.limit = min_parallel
+        self.running = 0
+        self.peaks = []
+        self._tracked = {}
+        self._condition = threading.Condition()
+        self._stop = False
+    
+    def per_job_estimate(self):
+        if self.peaks:
+            return max(self.peaks[-self.history:]) * self.headroom
+        current = [peak for _, peak in self._tracked.values()]
+        return max([self.initial_estimate] + current)
+    
+    def acquire(self):
+        """Block until the current limit admits another running job"""
+        with self._condition:
+            while self.running >= self.limit:
+                self._condition.wait()
+            self.running += 1
+    
+    def release(self):
+        with self._condition:
+            self.running -= 1
+            self._condition.notify_all()
+    
+    def track(self, key, pid):
+        with self._condition:
+            self._tracked[key] = (pid, 0)
+    
+    def untrack(self, key):
+        """Stop tracking a job's process; returns its peak RSS in bytes"""
+        with self._condition:
+            _, peak = self._tracked.pop(key, (None, 0))
+            if peak:
+                self.peaks.append(peak)
+            return peak
+    
+    @staticmethod
+    def _tree_rss(pid):
+        try:
+            process = psutil.Process(pid)
+            tree = [process] + process.children(recursive=True)
+        except psutil.Error:
+            return 0
+        total = 0
+        for member in tree:
+            try:
+                total += member.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+    
+    def sample(self):
+        """Update per-job peaks and recompute the concurrency limit"""
+        with self._condition:
+            tracked = dict(self._tracked)
+        
+        current = {key: self._tree_rss(pid) for key, (pid, _) in tracked.items()}
+        memory = psutil.virtual_memory()
+        load = os.getloadavg()[0] / (psutil.cpu_count() or 1)
+        
+        with self._condition:
+            for key, rss in current.items():
+                if key in self._tracked:
+                    pid, peak = self._tracked[key]
+                    self._tracked[key] = (pid, max(peak, rss))
+            
+            per_job = self.per_job_estimate()
+            growth = sum(max(0, per_job - rss) for rss in current.values())
+            spare = memory.available - self.reserve - growth
+            target = self.running + max(0, int(spare // per_job))
+            if load > 1.0:
+                target = min(target, self.running)
+            if memory.percent > 90:
+                target = self.running - 1
+            target = max(self.min_parallel, min(self.max_parallel, target))
+            
+            if target != self.limit:
+                print(f"🎚️  Concurrency {self.limit} → {target} "
+                      f"(available {memory.available / 1024 ** 3:.1f} GB, "
+                      f"~{per_job / 1024 ** 3:.1f} GB/job, load {load:.2f})")
+                self.limit = target
+                self._condition.notify_all()
+    
+    def run(self):
+        while not self._stop:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠️  Concurrency sampling error: {e}")
+            time.sleep(self.interval)
+    
+    def stop(self):
+        self._stop = True
+
 class LocalOrchestrator:
     def __init__(self, config_file, max_parallel=2, resource_monitoring=True, 
-                 r_script_path=None, working_dir=None, force_upload=False):
+                 r_script_path=None, working_dir=None, force_upload=False,
+                 ledger_path=None, resume=False, chunk_by="city", concurrency=None,
+                 log_dir=None, progress_interval=60, content_addressed=False, plots_dir=None):
         """
         Initialize the local orchestrator
         
@@ -30,6 +294,20 @@ class LocalOrchestrator:
             r_script_path: Path to batch_plot_generator.R script
             working_dir: Working directory for R script execution
             force_upload: Force upload even if plots exist locally
+            ledger_path: Job ledger file (default: results/ledger_<config>.jsonl)
+            resume: Skip jobs the ledger records as succeeded and retry the rest
+            chunk_by: Split city jobs into "scenario" or "outcome" chunks
+                (default "city" keeps one job per city)
+            concurrency: AdaptiveConcurrency controller; when given, the
+                number of running R processes follows free memory and load
+                up to max_parallel
+            log_dir: Directory for per-job R output logs (default: logs/<config>)
+            progress_interval: Seconds between live progress lines (0 disables)
+            content_addressed: Have R only write plots locally, then upload
+                them under content hashes (skipping bodies already stored)
+                and register them with upload_plots
+            plots_dir: Where R writes plots, as <plots_dir>/<city>/...
+                (default: plots in the working directory)
         """
         self.config_file = Path(config_file)
         if not self.config_file.exists():
@@ -41,6 +319,16 @@ class LocalOrchestrator:
         self.force_upload = force_upload
         self.results = []
         self._stop_monitoring = False
+        self.ledger_path = Path(ledger_path) if ledger_path else JobLedger.default_path(self.config_file)
+        self.resume = resume
+        self.ledger = None
+        self.chunk_by = chunk_by
+        self.cost_model = CostModel.fit()
+        self.concurrency = concurrency
+        self.log_dir = Path(log_dir) if log_dir else Path("logs") / self.config_file.stem
+        self.progress_interval = progress_interval
+        self.progress = None
+        self.content_addressed = content_addressed
         
         # Set up paths
         self.r_script_path = Path(r_script_path) if r_script_path else Path("/Users/cristina/wiley/Documents/jheem/code/jheem2_interactive/batch_plot_generator.R")
@@ -51,12 +339,19 @@ class LocalOrchestrator:
             raise FileNotFoundError(f"R script not found: {self.r_script_path}")
         if not self.working_dir.exists():
             raise FileNotFoundError(f"Working directory not found: {self.working_dir}")
+        self.plots_dir = Path(plots_dir) if plots_dir else self.working_dir / "plots"
             
         print(f"🔧 Orchestrator initialized:")
         print(f"   Config: {self.config_file}")
         print(f"   R Script: {self.r_script_path}")
         print(f"   Working Dir: {self.working_dir}")
-        print(f"   Max Parallel: {self.max_parallel}")
+        print(f"   Max Parallel: {self.max_parallel}{' (adaptive)' if self.concurrency else ''}")
+        print(f"   Ledger: {self.ledger_path}{' (resuming)' if self.resume else ''}")
+        print(f"   Job logs: {self.log_dir}")
+        if self.content_addressed:
+            print(f"   Content-addressed upload from: {self.plots_dir}")
+        print(f"   Chunking: {self.chunk_by}")
+        print(f"   Cost model: {'; '.join(self.cost_model.describe()[:1])}")
         
     def get_api_gateway_id(self):
         """Get API Gateway ID from environment variable"""
@@ -71,6 +366,8 @@ class LocalOrchestrator:
         city = job["city"]
         
         print(f"🏙️  Starting job for city {city}")
+        if self.ledger:
+            self.ledger.job_started(job)
         
         # Get API Gateway ID from environment
         try:
@@ -94,58 +391,153 @@ class LocalOrchestrator:
             "--scenarios", ",".join(job["scenarios"]),
             "--outcomes", ",".join(job["outcomes"]),
             "--statistics", ",".join(job["statistics"]),
-            "--facets", ",".join(job["facets"]),
-            "--upload-s3",
-            "--register-db", 
-            "--api-gateway-id", api_gateway_id
+            "--facets", ",".join(job["facets"])
         ]
         
-        # Add --skip-existing only if not forcing upload
-        if not self.force_upload:
+        # In content-addressed mode plots are published by upload_plots instead
+        if not self.content_addressed:
+            cmd.extend(["--upload-s3", "--register-db", "--api-gateway-id", api_gateway_id])
+        
+        # Add --skip-existing only if not forcing upload; jobs replanning
+        # stale plots (plan_incremental_jobs --stale-before) carry force
+        if not (self.force_upload or job.get("force")):
             cmd.append("--skip-existing")
         
+        key = job_id(job)
+        log_file = self.log_dir / f"{city}_{key}.log"
+        logger = self._job_logger(key, log_file)
+        tails = {"stdout": deque(maxlen=OUTPUT_TAIL_LINES), "stderr": deque(maxlen=OUTPUT_TAIL_LINES)}
+        generated = []
+        
+        def handle_line(name, line):
+            tails[name].append(line)
+            logger.info(f"[{name}] {line}")
+            plot = parse_generated_plot(line) if name == "stdout" else None
+            if plot is not None:
+                generated.append(plot)
+                if self.ledger:
+                    self.ledger.plot_generated(job, plot)
+                if self.progress:
+                    self.progress.plot_done()
+        
+        result = {
+            "job": job,
+            "city": city,
+            "success": False,
+            "expected_plots": job["expected_plots"],
+            "log_file": str(log_file)
+        }
         try:
-            result = subprocess.run(
-                cmd, 
-                cwd=self.working_dir,
-                capture_output=True, 
-                text=True, 
-                timeout=7200  # 2 hour timeout per job
-            )
-            
-            duration = time.time() - start_time
-            
-            return {
-                "job": job,
-                "city": city,
-                "success": result.returncode == 0,
-                "duration": duration,
-                "expected_plots": job["expected_plots"],
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "return_code": result.returncode
-            }
-            
-        except subprocess.TimeoutExpired:
-            return {
-                "job": job,
-                "city": city,
-                "success": False,
-                "duration": time.time() - start_time,
-                "expected_plots": job["expected_plots"],
-                "error": "Job timeout (2 hours)",
-                "return_code": -1
-            }
+            result.update(self._run_rscript(job, key, cmd, handle_line))
+            if self.content_addressed and result["success"]:
+                result.update(self._publish_plots(job, generated))
         except Exception as e:
-            return {
-                "job": job,
-                "city": city,
+            result.update({"error": str(e), "return_code": -1})
+        finally:
+            # Covers the timeout and error paths; a no-op once _run_rscript untracked
+            if self.concurrency:
+                peak = self.concurrency.untrack(key)
+                result["peak_rss_bytes"] = max(peak, result.get("peak_rss_bytes", 0))
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+        
+        result.update({
+            "duration": time.time() - start_time,
+            "generated_plots": len(generated),
+            "stdout": "\n".join(tails["stdout"]),
+            "stderr": "\n".join(tails["stderr"])
+        })
+        return result
+    
+    def _run_rscript(self, job, key, cmd, handle_line):
+        """Run a job as its own Rscript process, streaming output to handle_line"""
+        process = subprocess.Popen(
+            cmd,
+            cwd=self.working_dir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        if self.concurrency:
+            self.concurrency.track(key, process.pid)
+        
+        # Read both streams as they are written so output is logged live
+        # and nothing accumulates in memory beyond the tails
+        def pump(stream, name):
+            for line in stream:
+                handle_line(name, line.rstrip("\n"))
+        
+        readers = [
+            threading.Thread(target=pump, args=(process.stdout, "stdout"), daemon=True),
+            threading.Thread(target=pump, args=(process.stderr, "stderr"), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        
+        try:
+            process.wait(timeout=7200)  # 2 hour timeout per job
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            for reader in readers:
+                reader.join()
+            return {"error": "Job timeout (2 hours)", "return_code": -1}
+        for reader in readers:
+            reader.join()
+        
+        outcome = {"success": process.returncode == 0, "return_code": process.returncode}
+        if self.concurrency:
+            outcome["peak_rss_bytes"] = self.concurrency.untrack(key)
+        return outcome
+    
+    def _generated_files(self, job, generated):
+        """
+        Plot files behind a job's "SUCCESS: Generated <file>" lines
+        
+        R names the file but not its scenario directory, so each name is
+        looked up under <plots_dir>/<city>/<scenario>/ for the job's
+        scenarios. Plots the ledger recorded in earlier attempts are
+        included, so a retry publishes what a failed upload left behind.
+        """
+        names = set(generated)
+        if self.ledger:
+            names.update(self.ledger.plots(job))
+        city_dir = self.plots_dir / job["city"]
+        files = []
+        for name in names:
+            name = name if name.endswith(".json") else f"{name}.json"
+            for directory in [city_dir / scenario for scenario in job["scenarios"]] + [city_dir]:
+                if (directory / name).is_file():
+                    files.append(directory / name)
+        return files
+    
+    def _publish_plots(self, job, generated):
+        """Upload the plots a job generated by content hash and register them; returns result fields"""
+        city = job["city"]
+        stats = upload_plots(self.plots_dir / city, os.environ.get("S3_BUCKET_NAME", "prerun-plots-bucket-local"), city,
+                             plot_files=self._generated_files(job, generated))
+        print(f"📦 {city}: {stats['uploaded']} uploaded, {stats['deduplicated']} already stored, "
+              f"{stats['registered']} registered, {stats['unchanged']} unchanged")
+        outcome = {"content_store": {name: value for name, value in stats.items() if name != "errors"}}
+        if stats["failed"]:
+            outcome.update({
                 "success": False,
-                "duration": time.time() - start_time,
-                "expected_plots": job["expected_plots"],
-                "error": str(e),
-                "return_code": -1
-            }
+                "error": f"{stats['failed']} plot(s) failed to upload or register: {stats['errors'][0]}"
+            })
+        return outcome
+    
+    def _job_logger(self, key, log_file):
+        """Logger writing one job's R output to its own rotating file"""
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        logger = logging.getLogger(f"orchestration.job.{key}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=3, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        return logger
     
     def monitor_resources(self):
         """Monitor system resources during execution"""
@@ -171,14 +563,50 @@ class LocalOrchestrator:
                 print(f"⚠️  Resource monitoring error: {e}")
                 time.sleep(60)  # Back off on errors
     
+    def record_result(self, job, result):
+        """Persist a finished job (its plots were recorded as they streamed), then checkpoint the ledger"""
+        self.ledger.job_finished(job, result)
+        self.ledger.checkpoint()
+    
+    def report_progress(self):
+        """Print live plot throughput and ETA until the run finishes"""
+        while not self._stop_monitoring:
+            time.sleep(self.progress_interval)
+            if not self._stop_monitoring:
+                print(f"     {self.progress.describe()}")
+    
     def run_orchestration(self):
         """Execute all jobs with parallel processing and monitoring"""
         
         # Get jobs from config
-        jobs = self.config.get("jobs", [])
+        jobs = [chunk for job in self.config.get("jobs", []) for chunk in split_job(job, self.chunk_by)]
         if not jobs:
             print("❌ No jobs found in configuration")
             return
+        
+        self.ledger = JobLedger(self.ledger_path)
+        try:
+            return self._run_jobs(jobs)
+        finally:
+            self.ledger.close()
+    
+    def _run_jobs(self, jobs):
+        """Run the jobs the ledger does not already record as succeeded"""
+        self.ledger.start_run(self.resume)
+        
+        pending = []
+        for job in jobs:
+            previous = self.ledger.completed_result(job) if self.resume else None
+            if previous is not None:
+                self.results.append(dict(previous, resumed=True))
+            else:
+                pending.append(job)
+        
+        if self.resume:
+            print(f"♻️  Resuming: {len(jobs) - len(pending)} job(s) already complete, {len(pending)} to run")
+            retried = [job["city"] for job in pending if self.ledger.state(job)]
+            if retried:
+                print(f"   🔁 Retrying failed/interrupted: {', '.join(retried)}")
             
         total_expected_plots = sum(job.get("expected_plots", 0) for job in jobs)
         
@@ -189,34 +617,72 @@ class LocalOrchestrator:
         print(f"   ⏱️  Estimated time: {self.config.get('estimated_parallel_hours', 'unknown')} hours")
         print()
         
+        resumed_plots = sum(r.get("expected_plots", 0) for r in self.results if r.get("success"))
+        self.progress = PlotProgress(total_expected_plots, already_done=resumed_plots)
+        if self.progress_interval > 0:
+            threading.Thread(target=self.report_progress, daemon=True).start()
+        
         # Start resource monitoring
         if self.resource_monitoring:
             monitor_thread = threading.Thread(target=self.monitor_resources, daemon=True)
             monitor_thread.start()
+        if self.concurrency:
+            threading.Thread(target=self.concurrency.run, daemon=True).start()
         
         start_time = time.time()
-        completed = 0
+        
+        completed = len(jobs) - len(pending)
+        
+        scheduler = WorkStealingScheduler(pending, self.max_parallel, self.cost_model.estimate)
+        finished = queue.Queue()
+        
+        def worker(index):
+            while True:
+                if self.concurrency:
+                    self.concurrency.acquire()
+                try:
+                    job = scheduler.next_job(index)
+                    if job is None:
+                        return
+                    # Every job must put a result, or the loop below waits forever
+                    job_start = time.time()
+                    try:
+                        result = self.execute_job(job)
+                    except Exception as e:
+                        result = {
+                            "job": job,
+                            "city": job["city"],
+                            "success": False,
+                            "duration": time.time() - job_start,
+                            "expected_plots": job.get("expected_plots", 0),
+                            "error": str(e),
+                            "return_code": -1
+                        }
+                    finished.put((job, result))
+                finally:
+                    if self.concurrency:
+                        self.concurrency.release()
         
         with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
-            # Submit all jobs
-            future_to_job = {
-                executor.submit(self.execute_job, job): job 
-                for job in jobs
-            }
+            for index in range(self.max_parallel):
+                executor.submit(worker, index)
             
             # Process completed jobs
-            for future in as_completed(future_to_job):
-                result = future.result()
+            for _ in range(len(pending)):
+                job, result = finished.get()
                 self.results.append(result)
+                self.record_result(job, result)
                 completed += 1
                 
                 status = "✅" if result["success"] else "❌"
                 duration_min = result["duration"] / 60
                 city = result["city"]
+                if job.get("chunk"):
+                    city = f"{city} [{job['chunk']}]"
                 expected = result["expected_plots"]
                 
                 print(f"{status} [{completed:2d}/{len(jobs)}] {city} "
-                      f"({expected:3d} plots, {duration_min:5.1f}m)")
+                      f"({result.get('generated_plots', 0):3d}/{expected:3d} plots, {duration_min:5.1f}m)")
                 
                 if not result["success"]:
                     error_msg = result.get("error", "Unknown error")
@@ -228,18 +694,17 @@ class LocalOrchestrator:
                     stderr = result.get("stderr", "")
                     if stderr and len(stderr) < 500:
                         print(f"     📄 stderr: {stderr.strip()}")
+                    if result.get("log_file"):
+                        print(f"     📄 Log: {result['log_file']}")
                         
                 # Show progress estimate
                 if completed < len(jobs):
-                    elapsed_hours = (time.time() - start_time) / 3600
-                    if completed > 0:
-                        avg_time_per_job = elapsed_hours / completed
-                        remaining_jobs = len(jobs) - completed
-                        estimated_remaining = remaining_jobs * avg_time_per_job
-                        print(f"     ⏳ Estimated remaining: {estimated_remaining:.1f} hours")
+                    print(f"     {self.progress.describe()}")
         
         # Stop monitoring
         self._stop_monitoring = True
+        if self.concurrency:
+            self.concurrency.stop()
         
         # Final summary
         total_duration = time.time() - start_time
@@ -259,10 +724,13 @@ class LocalOrchestrator:
             print(f"   ⚡ Average time per job: {avg_time_per_job/60:.1f} minutes")
             print(f"   ⚡ Average time per plot: {avg_time_per_plot:.2f} seconds")
             
-            # Extrapolate to full scale
-            if avg_time_per_plot > 0:
-                estimated_64k_hours = (64512 * avg_time_per_plot) / 3600
-                print(f"   🔮 Estimated time for 64K plots: {estimated_64k_hours:.1f} hours")
+            # Extrapolate to a full run with the cost model refitted on this run too
+            full_model = CostModel.fit(extra_results=self.results)
+            full_jobs = generate_city_based_jobs(cost_model=full_model)
+            full_plots = sum(job["expected_plots"] for job in full_jobs)
+            full_hours = sum(job["estimated_hours"] for job in full_jobs)
+            print(f"   🔮 Estimated time for a full run ({full_plots:,} plots): {full_hours:.1f} hours sequential, "
+                  f"~{full_hours / self.max_parallel:.1f} hours at {self.max_parallel} parallel")
         
         # Save detailed results
         results_dir = Path("results")
@@ -282,7 +750,9 @@ class LocalOrchestrator:
                 "total_expected_plots": total_expected_plots,
                 "successful_plots": successful_plots,
                 "average_time_per_plot": avg_time_per_plot if successful_plots > 0 else None,
-                "max_parallel": self.max_parallel
+                "max_parallel": self.max_parallel,
+                "adaptive": bool(self.concurrency),
+                "peak_rss_bytes": max((r.get("peak_rss_bytes", 0) for r in self.results), default=0)
             },
             "job_results": self.results
         }
@@ -298,7 +768,15 @@ def main():
     parser = argparse.ArgumentParser(description="Local orchestration manager for JHEEM plot generation")
     parser.add_argument("config", help="Path to orchestration config YAML file")
     parser.add_argument("--max-parallel", type=int, default=2, 
-                       help="Maximum parallel R processes (default: 2)")
+                       help="Maximum parallel R processes (default: 2; the ceiling with --adaptive)")
+    parser.add_argument("--adaptive", action="store_true",
+                       help="Adjust parallel R processes to free memory, per-process RSS and load")
+    parser.add_argument("--min-parallel", type=int, default=1,
+                       help="Lowest concurrency --adaptive will drop to (default: 1)")
+    parser.add_argument("--memory-per-job-gb", type=float, default=4.0,
+                       help="Initial per-job memory estimate before any job has finished (default: 4.0)")
+    parser.add_argument("--memory-reserve-gb", type=float, default=2.0,
+                       help="Memory --adaptive leaves free for the system (default: 2.0)")
     parser.add_argument("--no-monitoring", action="store_true", 
                        help="Disable resource monitoring")
     parser.add_argument("--r-script", 
@@ -307,9 +785,32 @@ def main():
                        help="Working directory for R script execution")
     parser.add_argument("--force-upload", action="store_true",
                        help="Force upload even if plots exist locally (skip --skip-existing flag)")
+    parser.add_argument("--ledger",
+                       help="Job ledger path (default: results/ledger_<config name>.jsonl)")
+    parser.add_argument("--resume", action="store_true",
+                       help="Skip jobs the ledger records as complete and retry failed or interrupted ones")
+    parser.add_argument("--log-dir",
+                       help="Directory for per-job R output logs (default: logs/<config name>)")
+    parser.add_argument("--progress-interval", type=int, default=60,
+                       help="Seconds between live plot progress lines, 0 to disable (default: 60)")
+    parser.add_argument("--content-addressed", action="store_true",
+                       help="Upload plots under content hashes after each job, skipping unchanged ones")
+    parser.add_argument("--plots-dir",
+                       help="Where R writes plots for --content-addressed (default: <working dir>/plots)")
+    parser.add_argument("--chunk-by", choices=["city", "scenario", "outcome"], default="city",
+                       help="Split city jobs into scenario- or outcome-level chunks for work stealing (default: city)")
     
     args = parser.parse_args()
     
+    concurrency = None
+    if args.adaptive:
+        concurrency = AdaptiveConcurrency(
+            min_parallel=min(args.min_parallel, args.max_parallel),
+            max_parallel=args.max_parallel,
+            memory_per_job_gb=args.memory_per_job_gb,
+            memory_reserve_gb=args.memory_reserve_gb
+        )
+    
     try:
         orchestrator = LocalOrchestrator(
             config_file=args.config,
@@ -317,7 +818,15 @@ def main():
             resource_monitoring=not args.no_monitoring,
             r_script_path=args.r_script,
             working_dir=args.working_dir,
-            force_upload=args.force_upload
+            force_upload=args.force_upload,
+            ledger_path=args.ledger,
+            resume=args.resume,
+            chunk_by=args.chunk_by,
+            concurrency=concurrency,
+            log_dir=args.log_dir,
+            progress_interval=args.progress_interval,
+            content_addressed=args.content_addressed,
+            plots_dir=args.plots_dir
         )
         
         success = orchestrator.run_orchestration()
@@ -0,0 +1,122 @@
+"""
+Historical-duration cost model for plot generation jobs
+Fits seconds per plot by statistic and facet depth, plus a per-city factor,
+from the results/orchestration_results_*.json files local_orchestration writes
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Seconds per plot used as the prior, and for everything before any history exists
+DEFAULT_SECONDS_PER_PLOT = 4.05
+
+# How strongly the prior holds, in plots' worth of evidence per coefficient
+PRIOR_WEIGHT = 10
+
+
+def facet_depth(facet):
+    """Number of dimensions in a facet choice ("none" is 0, "age+sex" is 2)"""
+    return 0 if not facet or facet == "none" else len(facet.split("+"))
+
+
+def plot_counts(job):
+    """Plots per (statistic, facet depth) in a job's scenario × outcome × statistic × facet product"""
+    per_combo = len(job["scenarios"]) * len(job["outcomes"])
+    counts = {}
+    for statistic in job["statistics"]:
+        for facet in job["facets"]:
+            key = (statistic, facet_depth(facet))
+            counts[key] = counts.get(key, 0) + per_combo
+    return counts
+
+
+def load_job_results(results_dir="results"):
+    """Successful, freshly run job results (with their job specs) from earlier runs"""
+    job_results = []
+    for results_file in sorted(Path(results_dir).glob("orchestration_results_*.json")):
+        try:
+            entries = json.loads(results_file.read_text()).get("job_results", [])
+        except (OSError, ValueError):
+            continue
+        job_results.extend(
+            result for result in entries
+            if result.get("success") and not result.get("resumed") and isinstance(result.get("job"), dict)
+            and result.get("duration")
+        )
+    return job_results
+
+
+class CostModel:
+    """
+    Estimated job duration = Σ plots × seconds_per_plot[statistic, facet depth] × city factor
+
+    Coefficients are fitted by ridge least squares on job durations, pulled
+    towards DEFAULT_SECONDS_PER_PLOT so combinations that never appear in
+    history (or cannot be separated from each other) fall back to the old
+    constant. City factors are each city's actual / predicted time, shrunk
+    towards 1 the same way. With no history every estimate is 4.05 s/plot.
+    """
+
+    def __init__(self, coefficients=None, city_factors=None, samples=0):
+        self.coefficients = coefficients or {}
+        self.city_factors = city_factors or {}
+        self.samples = samples
+
+    @classmethod
+    def fit(cls, results_dir="results", extra_results=()):
+        """
+        Fit from a results directory
+
+        Args:
+            extra_results: Job results not yet written to disk (e.g. the
+                current run) to include in the fit
+        """
+        job_results = load_job_results(results_dir) + [
+            result for result in extra_results
+            if result.get("success") and not result.get("resumed") and isinstance(result.get("job"), dict)
+        ]
+        if not job_results:
+            return cls()
+
+        counts = [plot_counts(result["job"]) for result in job_results]
+        keys = sorted({key for job_counts in counts for key in job_counts})
+        design = np.array([[job_counts.get(key, 0) for key in keys] for job_counts in counts], dtype=float)
+        durations = np.array([result["duration"] for result in job_results], dtype=float)
+
+        # Ridge towards the prior: solve for the offset from DEFAULT_SECONDS_PER_PLOT
+        prior = np.full(len(keys), DEFAULT_SECONDS_PER_PLOT)
+        stacked = np.vstack([design, PRIOR_WEIGHT * np.eye(len(keys))])
+        target = np.concatenate([durations - design @ prior, np.zeros(len(keys))])
+        offset = np.linalg.lstsq(stacked, target, rcond=None)[0]
+        fitted = np.maximum(prior + offset, 0.01 * DEFAULT_SECONDS_PER_PLOT)
+        model = cls(dict(zip(keys, fitted.tolist())), samples=len(job_results))
+
+        actual, predicted = {}, {}
+        for result, duration in zip(job_results, durations):
+            city = result["job"]["city"]
+            actual[city] = actual.get(city, 0.0) + duration
+            predicted[city] = predicted.get(city, 0.0) + model.estimate(result["job"], city_factor=False)
+        pseudo = PRIOR_WEIGHT * DEFAULT_SECONDS_PER_PLOT
+        model.city_factors = {
+            city: float((actual[city] + pseudo) / (predicted[city] + pseudo)) for city in actual
+        }
+        return model
+
+    def estimate(self, job, city_factor=True):
+        """Estimated seconds for a job spec (city, scenarios, outcomes, statistics, facets)"""
+        seconds = sum(
+            count * self.coefficients.get(key, DEFAULT_SECONDS_PER_PLOT)
+            for key, count in plot_counts(job).items()
+        )
+        return seconds * (self.city_factors.get(job["city"], 1.0) if city_factor else 1.0)
+
+    def describe(self):
+        """Printable summary of the fitted rates"""
+        if not self.samples:
+            return [f"no history, {DEFAULT_SECONDS_PER_PLOT} s/plot"]
+        lines = [f"fitted from {self.samples} job(s), {len(self.city_factors)} city factor(s)"]
+        for (statistic, depth), rate in sorted(self.coefficients.items()):
+            lines.append(f"{statistic} depth {depth}: {rate:.2f} s/plot")
+        return lines
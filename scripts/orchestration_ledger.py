@@ -0,0 +1,171 @@
+"""
+Durable job ledger for local orchestration runs
+Append-only JSONL of job and plot state transitions with atomic snapshots,
+so an interrupted run can be resumed without redoing completed work
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Job states recorded in the ledger
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Result fields too large to keep in the ledger (full process output)
+_BULKY_RESULT_FIELDS = ("stdout", "stderr")
+
+
+def job_id(job):
+    """Stable identifier for a job spec, so the same work maps to the same ledger entry"""
+    spec = {key: job.get(key) for key in ("city", "scenarios", "outcomes", "statistics", "facets")}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class JobLedger:
+    """
+    Append-only record of job and per-plot state
+
+    Every transition is one JSON line, flushed and fsynced before the call
+    returns, so a crash loses at most the line being written (a torn last
+    line is ignored on load). checkpoint() folds the state into
+    <ledger>.snapshot.json via a temp file and os.replace, and loading
+    replays only the lines written after the snapshot's byte offset.
+
+    A {"type": "run", "resume": false} record starts a fresh run: state
+    before it is kept in the file for history but not folded.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.snapshot_path = self.path.with_name(self.path.name + ".snapshot.json")
+        self.jobs = {}
+        # Per-job set mirroring entry["plots"], so replaying plot lines stays linear
+        self._seen_plots = {}
+        self._lock = threading.Lock()
+        self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            # Terminate a torn final line so the next record stays parseable
+            self._file.write("\n")
+            self._file.flush()
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def default_path(config_file):
+        return Path("results") / f"ledger_{Path(config_file).stem}.jsonl"
+
+    def _load(self):
+        offset = 0
+        if self.snapshot_path.exists():
+            try:
+                snapshot = json.loads(self.snapshot_path.read_text())
+                self.jobs = snapshot["jobs"]
+                offset = snapshot["offset"]
+            except (ValueError, KeyError):
+                self.jobs, offset = {}, 0
+
+        if not self.path.exists():
+            return
+        if offset > self.path.stat().st_size:
+            # Ledger was replaced underneath the snapshot; replay from the start
+            self.jobs, offset = {}, 0
+            self._seen_plots = {}
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError):
+                    # Torn or malformed lines (e.g. a record missing job_id) are skipped
+                    continue
+
+    def _apply(self, record):
+        kind = record.get("type")
+        if kind == "run" and not record.get("resume"):
+            self.jobs = {}
+            self._seen_plots = {}
+        elif kind == "job":
+            entry = self.jobs.setdefault(record["job_id"], {"plots": [], "attempts": 0})
+            entry["state"] = record["state"]
+            entry["city"] = record.get("city", entry.get("city"))
+            if record["state"] == RUNNING:
+                entry["attempts"] += 1
+            if "result" in record:
+                entry["result"] = record["result"]
+        elif kind == "plot":
+            entry = self.jobs.setdefault(record["job_id"], {"plots": [], "attempts": 0})
+            seen = self._seen_plots.get(record["job_id"])
+            if seen is None:
+                seen = self._seen_plots[record["job_id"]] = set(entry["plots"])
+            if record["plot"] not in seen:
+                seen.add(record["plot"])
+                entry["plots"].append(record["plot"])
+
+    def _append(self, record):
+        record = dict(record, ts=time.time())
+        with self._lock:
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._apply(record)
+
+    def start_run(self, resume):
+        """Mark the start of a run; without resume, earlier state is discarded"""
+        self._append({"type": "run", "resume": bool(resume)})
+
+    def job_started(self, job):
+        self._append({"type": "job", "job_id": job_id(job), "city": job.get("city"), "state": RUNNING})
+
+    def job_finished(self, job, result):
+        """Record a job's outcome; process output is left out of the ledger"""
+        slim = {key: value for key, value in result.items() if key not in _BULKY_RESULT_FIELDS}
+        if result.get("stderr"):
+            slim["stderr_tail"] = result["stderr"][-2000:]
+        self._append({
+            "type": "job",
+            "job_id": job_id(job),
+            "city": job.get("city"),
+            "state": SUCCEEDED if result.get("success") else FAILED,
+            "result": slim
+        })
+
+    def plot_generated(self, job, plot):
+        self._append({"type": "plot", "job_id": job_id(job), "plot": plot})
+
+    def state(self, job):
+        return (self.jobs.get(job_id(job)) or {}).get("state")
+
+    def completed_result(self, job):
+        """Ledger result for a job that already succeeded, else None"""
+        entry = self.jobs.get(job_id(job)) or {}
+        return entry.get("result") if entry.get("state") == SUCCEEDED else None
+
+    def plots(self, job):
+        return list((self.jobs.get(job_id(job)) or {}).get("plots", []))
+
+    def checkpoint(self):
+        """Atomically write the folded state so later loads skip replaying the log"""
+        with self._lock:
+            self._file.flush()
+            snapshot = {"offset": self._file.tell(), "jobs": self.jobs, "written_at": time.time()}
+            tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+    def close(self):
+        self.checkpoint()
+        self._file.close()
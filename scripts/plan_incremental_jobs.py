@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Plan only the plot jobs that are missing or stale
+Diffs the desired cities × scenarios × outcomes × statistics × facets product
+against what is registered in the plot metadata table (or a manifest snapshot
+of it) and writes an orchestration config covering just the difference
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+from boto3.dynamodb.conditions import Key
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_orchestration_config import (
+    AVAILABLE_CITIES, FACETS, OUTCOMES, SCENARIOS, STATISTICS, generate_city_based_jobs
+)
+from orchestration_cost_model import CostModel
+from src.handlers.aws_clients import get_plot_table
+from src.handlers.dynamodb_pagination import iter_items
+
+
+def _parse_list(value, default):
+    return [item.strip() for item in value.split(",") if item.strip()] if value else list(default)
+
+
+def query_registered(cities, scenarios, workers=8):
+    """
+    Registered plots for each city#scenario partition, straight from the table
+
+    Returns:
+        {(city, scenario, outcome, statistic, facet): created_at}
+    """
+    def query_partition(partition):
+        city, scenario = partition
+        items = iter_items(
+            get_plot_table().query,
+            KeyConditionExpression=Key("city_scenario").eq(f"{city}#{scenario}"),
+            ProjectionExpression="outcome_stat_facet, created_at"
+        )
+        registered = {}
+        for item in items:
+            parts = item["outcome_stat_facet"].split("#")
+            if len(parts) == 3:
+                registered[(city, scenario) + tuple(parts)] = item.get("created_at")
+        return registered
+
+    partitions = [(city, scenario) for city in cities for scenario in scenarios]
+    registered = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(query_partition, partitions):
+            registered.update(result)
+    return registered
+
+
+def read_manifest(path):
+    """
+    Registered plots from a manifest: a JSON array or JSON lines of records
+    with either city/scenario/outcome/statistic_type/facet_choice fields or
+    the table's city_scenario/outcome_stat_facet keys (plus created_at)
+    """
+    text = Path(path).read_text()
+    if text.lstrip().startswith("["):
+        records = json.loads(text)
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    registered = {}
+    for record in records:
+        if "city_scenario" in record:
+            city, scenario = record["city_scenario"].split("#", 1)
+            outcome, statistic, facet = record["outcome_stat_facet"].split("#")
+        else:
+            city, scenario = record["city"], record["scenario"]
+            outcome, statistic, facet = record["outcome"], record["statistic_type"], record["facet_choice"]
+        registered[(city, scenario, outcome, statistic, facet)] = record.get("created_at")
+    return registered
+
+
+def write_manifest(registered, path):
+    """Snapshot registered plots as JSON lines so later plans can skip the table queries"""
+    with open(path, "w") as f:
+        for (city, scenario, outcome, statistic, facet), created_at in sorted(registered.items()):
+            f.write(json.dumps({
+                "city": city, "scenario": scenario, "outcome": outcome,
+                "statistic_type": statistic, "facet_choice": facet, "created_at": created_at
+            }) + "\n")
+
+
+def find_missing(desired, registered, stale_before=None):
+    """
+    Desired combinations that are not registered, or were registered before
+    stale_before (an ISO timestamp; created_at strings compare in time order)
+
+    Registration stores 2025-06-10T20:00:00Z as created_at when the
+    registering client sends none, and a record without created_at compares
+    as oldest, so with stale_before such plots always count as stale.
+    """
+    missing = set()
+    for combination in desired:
+        if combination not in registered:
+            missing.add(combination)
+        elif stale_before and (registered[combination] or "") < stale_before:
+            missing.add(combination)
+    return missing
+
+
+def group_missing(missing):
+    """
+    Cover the missing combinations with city jobs that are exact products
+
+    Within a city, outcomes missing the same (scenario, statistic, facet)
+    set share a job, then statistics and facets are merged while their
+    scenario sets agree. Topping up one outcome everywhere is one job per
+    city, and no job regenerates a plot that is already registered.
+
+    Returns:
+        [(city, scenarios, outcomes, statistics, facets)] with each city's
+        jobs adjacent so its simulations are loaded by consecutive work
+    """
+    by_city = {}
+    for city, scenario, outcome, statistic, facet in missing:
+        by_city.setdefault(city, {}).setdefault(outcome, set()).add((scenario, statistic, facet))
+
+    groups = []
+    for city in sorted(by_city):
+        outcomes_by_set = {}
+        for outcome, combos in by_city[city].items():
+            outcomes_by_set.setdefault(frozenset(combos), []).append(outcome)
+
+        for combos, outcomes in outcomes_by_set.items():
+            # facet -> scenarios per statistic, then merge statistics with identical facet maps
+            facet_maps = {}
+            for scenario, statistic, facet in combos:
+                facet_maps.setdefault(statistic, {}).setdefault(facet, set()).add(scenario)
+            statistics_by_map = {}
+            for statistic, facet_map in facet_maps.items():
+                signature = frozenset((facet, frozenset(scenarios)) for facet, scenarios in facet_map.items())
+                statistics_by_map.setdefault(signature, []).append(statistic)
+
+            for signature, statistics in statistics_by_map.items():
+                facets_by_scenarios = {}
+                for facet, scenarios in signature:
+                    facets_by_scenarios.setdefault(scenarios, []).append(facet)
+                for scenarios, facets in facets_by_scenarios.items():
+                    groups.append((city, sorted(scenarios), sorted(outcomes), sorted(statistics), sorted(facets)))
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan orchestration jobs for missing or stale plots only")
+    parser.add_argument("--cities", help="Comma-separated cities (default: all available)")
+    parser.add_argument("--scenarios", help="Comma-separated scenarios (default: all)")
+    parser.add_argument("--outcomes", help="Comma-separated outcomes (default: all)")
+    parser.add_argument("--statistics", help="Comma-separated statistics (default: all)")
+    parser.add_argument("--facets", help="Comma-separated facets (default: all FACETS)")
+    parser.add_argument("--manifest",
+                       help="Diff against this manifest instead of querying the metadata table")
+    parser.add_argument("--write-manifest",
+                       help="Save the registered plots that were found as a manifest (JSON lines)")
+    parser.add_argument("--stale-before",
+                       help="Also replan plots registered before this ISO timestamp (e.g. 2025-07-01T00:00:00Z); "
+                            "jobs covering them are marked force so R regenerates existing files. Plots "
+                            "registered without a created_at count as 2025-06-10T20:00:00Z, i.e. stale")
+    parser.add_argument("--output",
+                       help="Config file to write (default: orchestration_configs/incremental_config_<timestamp>.yaml)")
+    parser.add_argument("--results-dir", default="results",
+                       help="Earlier orchestration results to fit time estimates from (default: results)")
+
+    args = parser.parse_args()
+
+    cities = _parse_list(args.cities, AVAILABLE_CITIES)
+    scenarios = _parse_list(args.scenarios, SCENARIOS)
+    outcomes = _parse_list(args.outcomes, OUTCOMES)
+    statistics = _parse_list(args.statistics, STATISTICS)
+    facets = _parse_list(args.facets, FACETS)
+    desired = [
+        (city, scenario, outcome, statistic, facet)
+        for city in cities for scenario in scenarios for outcome in outcomes
+        for statistic in statistics for facet in facets
+    ]
+
+    if args.manifest:
+        print(f"📄 Reading manifest {args.manifest}...")
+        registered = read_manifest(args.manifest)
+    else:
+        print(f"🔍 Querying {len(cities) * len(scenarios)} partitions of {get_plot_table().name}...")
+        registered = query_registered(cities, scenarios)
+    if args.write_manifest:
+        write_manifest(registered, args.write_manifest)
+        print(f"📄 Manifest written to {args.write_manifest}")
+
+    missing = find_missing(desired, registered, args.stale_before)
+    # Stale plots exist as files, which R's --skip-existing would keep
+    stale = {combination for combination in missing if combination in registered}
+    print(f"📊 Desired: {len(desired):,} plots, registered: {len(desired) - len(missing):,}, "
+          f"to generate: {len(missing):,} ({len(stale):,} stale)")
+    if not missing:
+        print("✅ Nothing to do")
+        return
+
+    cost_model = CostModel.fit(args.results_dir)
+    jobs = []
+    for city, job_scenarios, job_outcomes, job_statistics, job_facets in group_missing(missing):
+        city_jobs = generate_city_based_jobs(
+            cities=[city],
+            scenarios=job_scenarios,
+            outcomes=job_outcomes,
+            statistics=job_statistics,
+            facets=job_facets,
+            cost_model=cost_model
+        )
+        covered = itertools.product([city], job_scenarios, job_outcomes, job_statistics, job_facets)
+        if any(combination in stale for combination in covered):
+            for job in city_jobs:
+                job["force"] = True
+        jobs.extend(city_jobs)
+
+    config = {
+        "strategy": "incremental",
+        "config_type": "incremental",
+        "total_jobs": len(jobs),
+        "total_expected_plots": sum(job["expected_plots"] for job in jobs),
+        "estimated_total_hours": sum(job["estimated_hours"] for job in jobs),
+        "estimated_parallel_hours": max(job["estimated_hours"] for job in jobs),
+        "jobs": jobs
+    }
+
+    output = Path(args.output or
+                  f"orchestration_configs/incremental_config_{datetime.now().strftime('%Y%m%d_%H%M%S')}.yaml")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+
+    print(f"🧩 {len(jobs)} job(s) across {len({job['city'] for job in jobs})} cities, "
+          f"{config['total_expected_plots']:,} plots, ~{config['estimated_total_hours']:.1f} hours sequential")
+    print(f"📄 Config written to {output}")
+
+
+if __name__ == "__main__":
+    main()
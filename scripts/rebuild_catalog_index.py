@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Rebuild or verify the catalog index item in the plot metadata table
+The index backs GET /plots/cities; rebuild it to backfill an existing table
+or to repair drift, and use --check to compare it against a full scan
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.handlers.aws_clients import get_plot_table
+from src.handlers.plot_catalog import compare_catalog, read_catalog, scan_catalog, write_catalog
+
+
+def check_catalog(segments):
+    """Compare the stored index with a full scan; returns True when consistent"""
+    table = get_plot_table()
+    catalog = read_catalog(table)
+    if catalog is None:
+        print("❌ Catalog index does not exist (run without --check to build it)")
+        return False
+
+    print(f"🔍 Scanning {table.name} with {segments} segments...")
+    scanned = scan_catalog(get_plot_table, segments)
+    mismatches = compare_catalog(catalog.get('partitions', {}), scanned)
+
+    print(f"📊 Index last updated: {catalog.get('last_updated')}")
+    print(f"📊 Partitions in scan: {len(scanned)}")
+
+    if not mismatches:
+        print("✅ Catalog index matches the table")
+        return True
+
+    print(f"❌ {len(mismatches)} partition(s) differ:")
+    for city_scenario, indexed, actual in mismatches:
+        print(f"   - {city_scenario}: index {indexed['plot_count']} plots/{indexed['total_bytes']} bytes, "
+              f"table {actual['plot_count']} plots/{actual['total_bytes']} bytes")
+    return False
+
+
+def rebuild_catalog(segments, dry_run=False):
+    """Aggregate the catalog from a full scan and rewrite the counter items"""
+    table = get_plot_table()
+    # Read before scanning: counters whose version moves during the scan are recounted
+    catalog = read_catalog(table) or {}
+
+    print(f"🔍 Scanning {table.name} with {segments} segments...")
+    partitions = scan_catalog(get_plot_table, segments)
+    total_plots = sum(entry['plot_count'] for entry in partitions.values())
+    total_bytes = sum(entry['total_bytes'] for entry in partitions.values())
+
+    print(f"📊 {len(partitions)} partitions, {total_plots:,} plots, {total_bytes:,} bytes")
+
+    if dry_run:
+        print("🧪 Dry run: catalog index not written")
+        return
+
+    recounted = write_catalog(table, partitions, catalog.get('partitions'))
+    if recounted:
+        print(f"🔁 {recounted} partition(s) changed during the scan and were recounted")
+    print("✅ Catalog index rebuilt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or verify the plot catalog index")
+    parser.add_argument("--check", action="store_true",
+                       help="Compare the index against a full scan instead of rebuilding (exit 1 on mismatch)")
+    parser.add_argument("--segments", type=int, default=8,
+                       help="Parallel scan segments (default: 8)")
+    parser.add_argument("--dry-run", action="store_true",
+                       help="Scan and report totals without writing the index")
+
+    args = parser.parse_args()
+
+    try:
+        if args.check:
+            sys.exit(0 if check_catalog(args.segments) else 1)
+        rebuild_catalog(args.segments, args.dry_run)
+    except Exception as e:
+        print(f"❌ Catalog operation failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Validate registered plot objects and tag them so get_plot can skip parsing
+Registration does not read S3, so objects uploaded by writers that do not tag
+on PUT (the R generator's direct uploads) are validated here, off the request
+path; until then get_plot validates them as it serves them
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.handlers.aws_clients import get_plot_table, get_s3_client
+from src.handlers.dynamodb_pagination import parallel_scan
+from src.handlers.plot_bundle import split_bundle_ref
+from src.handlers.plot_content import content_key
+from src.handlers.plot_validation import tag_plot_validated
+
+
+def tagged_at_upload(item):
+    """True for objects whose writer validated and tagged them on PUT (bundles, content-addressed plots)"""
+    if split_bundle_ref(item['s3_key']) is not None:
+        return True
+    return bool(item.get('content_hash')) and item['s3_key'] == content_key(item['content_hash'])
+
+
+def untagged_plot_keys(segments, city=None):
+    """S3 keys of registered plots that were not tagged by their writer"""
+    def collect(items):
+        return {
+            item['s3_key'] for item in items
+            if item.get('s3_key') and not item['city_scenario'].startswith('_catalog')
+            and (city is None or item['city_scenario'].split('#')[0] == city)
+            and not tagged_at_upload(item)
+        }
+
+    keys = set()
+    for segment_keys in parallel_scan(get_plot_table, segments, collect,
+                                      ProjectionExpression='city_scenario, s3_key, content_hash'):
+        keys.update(segment_keys)
+    return sorted(keys)
+
+
+def tag_plots(s3_keys, bucket_name, workers=8):
+    """
+    Validate and tag objects concurrently (already tagged ones cost a HEAD)
+
+    Returns:
+        {"plots", "tagged", "failed", "errors"}
+    """
+    s3_client = get_s3_client()
+    stats = {"plots": len(s3_keys), "tagged": 0, "failed": 0, "errors": []}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for s3_key, validated in zip(s3_keys, executor.map(
+                lambda s3_key: tag_plot_validated(s3_client, bucket_name, s3_key), s3_keys)):
+            if validated:
+                stats["tagged"] += 1
+            else:
+                stats["failed"] += 1
+                stats["errors"].append(s3_key)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate registered plot objects and tag them as validated")
+    parser.add_argument("--city", help="Only plots of this city (default: every registered plot)")
+    parser.add_argument("--bucket", default=os.environ.get("S3_BUCKET_NAME", "prerun-plots-bucket-local"),
+                       help="Plot bucket (default: $S3_BUCKET_NAME)")
+    parser.add_argument("--segments", type=int, default=8,
+                       help="Parallel scan segments (default: 8)")
+    parser.add_argument("--workers", type=int, default=8,
+                       help="Concurrent S3 validations (default: 8)")
+
+    args = parser.parse_args()
+
+    try:
+        s3_keys = untagged_plot_keys(args.segments, args.city)
+        print(f"🔍 {len(s3_keys)} plots not tagged by their uploader")
+        stats = tag_plots(s3_keys, args.bucket, args.workers)
+    except Exception as e:
+        print(f"❌ Tagging failed: {e}")
+        sys.exit(1)
+
+    print(f"✅ {stats['tagged']} tagged as validated")
+    if stats["failed"]:
+        print(f"❌ {stats['failed']} missing or invalid:")
+        for s3_key in stats["errors"][:20]:
+            print(f"   - {s3_key}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
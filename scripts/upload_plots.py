@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Upload generated plots to content-addressed storage and register them
+Hashes each plot JSON, PUTs only bodies not already stored under their hash,
+and registers the records with their content hash so unchanged plots are
+neither re-uploaded nor rewritten in the metadata table
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.handlers.aws_clients import get_s3_client
+from src.handlers.plot_content import content_hash, store_plot
+from src.handlers.plot_discovery import register_plots_batch
+
+
+def _first(value):
+    """Metadata values are written by R as length-one arrays"""
+    return value[0] if isinstance(value, list) and value else value
+
+
+def read_plot_record(plot_file, city):
+    """Registration fields for a plot from its <name>_metadata.json sidecar"""
+    metadata_file = plot_file.with_name(f"{plot_file.stem}_metadata.json")
+    metadata = json.loads(metadata_file.read_text())
+    return {
+        "city": city,
+        "scenario": _first(metadata.get("scenario")),
+        "outcome": _first(metadata.get("outcome")),
+        "statistic_type": _first(metadata.get("statistic_type")),
+        "facet_choice": _first(metadata.get("facet_choice")) or "none"
+    }
+
+
+def upload_plots(plots_dir, bucket_name, city=None, workers=8, plot_files=None):
+    """
+    Store and register the plots under plots_dir
+
+    Args:
+        city: City of every plot; by default the first directory below
+            plots_dir (plots/<city>/...)
+        plot_files: Only these plot files (under plots_dir), e.g. the ones
+            a job just generated; by default every plot under plots_dir
+
+    Returns:
+        {"plots", "uploaded", "deduplicated", "registered", "unchanged", "failed", "errors"}
+    """
+    plots_dir = Path(plots_dir)
+    if plot_files is None:
+        plot_files = plots_dir.rglob("*.json")
+    plot_files = [
+        path for path in sorted(set(map(Path, plot_files)))
+        if not path.name.endswith("_metadata.json")
+    ]
+    stats = {"plots": len(plot_files), "uploaded": 0, "deduplicated": 0,
+             "registered": 0, "unchanged": 0, "failed": 0, "errors": []}
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def read(plot_file):
+        try:
+            record = read_plot_record(plot_file, city or plot_file.relative_to(plots_dir).parts[0])
+            raw = plot_file.read_bytes()
+            return dict(record, file_size=len(raw), content_hash=content_hash(raw), created_at=created_at), raw
+        except Exception as e:
+            return f"{plot_file}: {e}", None
+
+    # Identical bodies within the run are stored once
+    records, bodies = [], {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for record, raw in executor.map(read, plot_files):
+            if raw is None:
+                stats["failed"] += 1
+                stats["errors"].append(record)
+                continue
+            records.append(record)
+            bodies.setdefault(record["content_hash"], raw)
+
+    def store(raw):
+        try:
+            return store_plot(get_s3_client(), bucket_name, raw)
+        except Exception as e:
+            return None, str(e), None
+
+    keys = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for digest, (key, detail, uploaded) in zip(bodies, executor.map(store, bodies.values())):
+            if key is None:
+                stats["errors"].append(f"{digest}: {detail}")
+                continue
+            keys[digest] = key
+            stats["uploaded"] += int(uploaded)
+
+    stored = [dict(record, s3_key=keys[record["content_hash"]]) for record in records if record["content_hash"] in keys]
+    stats["failed"] += len(records) - len(stored)
+    stats["deduplicated"] = len(stored) - stats["uploaded"]
+    records = stored
+
+    batch_size = int(os.environ.get("MAX_BATCH_REGISTER_PLOTS", "500"))
+    for start in range(0, len(records), batch_size):
+        response = register_plots_batch({"body": json.dumps({"plots": records[start:start + batch_size]})}, None)
+        body = json.loads(response["body"])
+        if "results" not in body:
+            stats["failed"] += len(records[start:start + batch_size])
+            stats["errors"].append(body.get("error", f"HTTP {response['statusCode']}"))
+            continue
+        stats["registered"] += body["registered"]
+        stats["unchanged"] += body["unchanged"]
+        for result in body["results"]:
+            if result["status"] in ("invalid", "failed"):
+                stats["failed"] += 1
+                stats["errors"].append(f"{result['city_scenario']} {result['outcome_stat_facet']}: {result['error']}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload plots to content-addressed storage and register them")
+    parser.add_argument("plots_dir", help="Directory of generated plots (plots/<city>/... or one city's directory)")
+    parser.add_argument("--city", help="City of every plot (default: first directory below plots_dir)")
+    parser.add_argument("--bucket", default=os.environ.get("S3_BUCKET_NAME", "prerun-plots-bucket-local"),
+                       help="Plot bucket (default: $S3_BUCKET_NAME)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent hash/upload threads (default: 8)")
+
+    args = parser.parse_args()
+    stats = upload_plots(args.plots_dir, args.bucket, args.city, args.workers)
+
+    print(f"📦 {stats['plots']} plots: {stats['uploaded']} uploaded, {stats['deduplicated']} already stored")
+    print(f"📋 {stats['registered']} registered, {stats['unchanged']} unchanged")
+    if stats["failed"]:
+        print(f"❌ {stats['failed']} failed:")
+        for error in stats["errors"][:20]:
+            print(f"   - {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
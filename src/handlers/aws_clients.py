@@ -0,0 +1,139 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+# Clients are built once per Lambda container and reused across warm invocations.
+# boto3 clients are thread-safe, so the same instance is shared by any worker
+# threads a handler spins up. The DynamoDB resource is shared too: handlers only
+# use it to build Table objects and call their actions, which go straight to
+# its (thread-safe) client, and it is only ever created under the lock.
+_lock = threading.Lock()
+_s3_client = None
+_dynamodb_resource = None
+
+# Test hooks: when set, these take precedence over the pooled instances
+_s3_client_override = None
+_dynamodb_client_override = None
+_dynamodb_resource_override = None
+
+
+def _endpoint_url(env_var):
+    """Return the endpoint override from the environment, ignoring empty strings"""
+    endpoint = os.environ.get(env_var)
+    if endpoint and endpoint.strip():
+        return endpoint.strip()
+    return None
+
+
+def _client_config():
+    """Connection pool, keep-alive, retry and timeout settings shared by all clients"""
+    return Config(
+        region_name=os.environ.get('AWS_REGION', 'us-east-1'),
+        max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50')),
+        tcp_keepalive=True,
+        connect_timeout=float(os.environ.get('AWS_CONNECT_TIMEOUT', '2')),
+        read_timeout=float(os.environ.get('AWS_READ_TIMEOUT', '10')),
+        retries={
+            'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '3')),
+            'mode': 'standard'
+        }
+    )
+
+
+def _client_args(env_var):
+    client_args = {'config': _client_config()}
+
+    # Only set endpoint_url if it's a valid URL (not empty string)
+    endpoint = _endpoint_url(env_var)
+    if endpoint:
+        client_args['endpoint_url'] = endpoint
+    return client_args
+
+
+def _build_client(service_name, env_var):
+    return boto3.session.Session().client(service_name, **_client_args(env_var))
+
+
+def get_s3_client():
+    """Return the container-wide S3 client, creating it on first use"""
+    global _s3_client
+
+    if _s3_client_override is not None:
+        return _s3_client_override
+
+    if _s3_client is None:
+        with _lock:
+            if _s3_client is None:
+                _s3_client = _build_client('s3', 'S3_ENDPOINT_URL')
+    return _s3_client
+
+
+def get_dynamodb_client():
+    """Return the container-wide low-level DynamoDB client (the pooled resource's client)"""
+    if _dynamodb_client_override is not None:
+        return _dynamodb_client_override
+    return get_dynamodb_resource().meta.client
+
+
+def get_dynamodb_resource():
+    """
+    Return the container-wide DynamoDB service resource, creating it on first use
+
+    The resource is built once and its client is the pooled low-level client,
+    so no throwaway client is created per call or per thread.
+    """
+    global _dynamodb_resource
+
+    if _dynamodb_resource_override is not None:
+        return _dynamodb_resource_override
+
+    if _dynamodb_resource is None:
+        with _lock:
+            if _dynamodb_resource is None:
+                resource = boto3.session.Session().resource('dynamodb', **_client_args('DYNAMODB_ENDPOINT_URL'))
+                if _dynamodb_client_override is not None:
+                    resource.meta.client = _dynamodb_client_override
+                _dynamodb_resource = resource
+    return _dynamodb_resource
+
+
+def get_plot_table():
+    """Return the plot metadata table named by DYNAMODB_TABLE_NAME"""
+    table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'jheem-plot-metadata')
+    return get_dynamodb_resource().Table(table_name)
+
+
+def set_s3_client(client):
+    """Inject an S3 client (e.g. a moto or LocalStack stand-in). Pass None to clear."""
+    global _s3_client_override
+    _s3_client_override = client
+
+
+def set_dynamodb_client(client):
+    """Inject a low-level DynamoDB client, also used by the pooled resource. Pass None to clear."""
+    global _dynamodb_client_override, _dynamodb_resource
+    with _lock:
+        _dynamodb_client_override = client
+        # Rebuilt around the new client on next use
+        _dynamodb_resource = None
+
+
+def set_dynamodb_resource(resource):
+    """Inject a DynamoDB resource (e.g. a moto or LocalStack stand-in). Pass None to clear."""
+    global _dynamodb_resource_override
+    _dynamodb_resource_override = resource
+
+
+def reset_clients():
+    """Drop all pooled clients and overrides so the next call rebuilds them (cold start)"""
+    global _s3_client, _dynamodb_resource, _s3_client_override, _dynamodb_client_override, \
+        _dynamodb_resource_override
+
+    with _lock:
+        _s3_client = None
+        _dynamodb_resource = None
+        _s3_client_override = None
+        _dynamodb_client_override = None
+        _dynamodb_resource_override = None
@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from botocore.exceptions import ClientError
+
+from src.handlers.aws_clients import get_s3_client
+from src.handlers.facet_aggregation import SummaryCube, parse_facet
+from src.handlers.http_utils import (
+    binary_body, cache_control, compress_body, content_etag, emit_metrics, etag_matches,
+    get_header, negotiate_encoding
+)
+from src.handlers.summary_data import summary_key
+
+# Cubes (with their memoized marginals) for recently used cities, keyed by
+# city and validated against the columnar object's ETag
+_cubes = OrderedDict()
+_cubes_lock = threading.Lock()
+
+
+def _error_response(status_code, message):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Methods': 'GET, OPTIONS'
+        },
+        'body': json.dumps({
+            'error': message
+        })
+    }
+
+
+def _parse_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+
+def load_cube(s3_client, bucket_name, city):
+    """
+    Return (cube, etag) for a city from its summary/<city>.col object
+
+    Only the decoded cube is kept; a warm cube is revalidated with a
+    conditional GET, so the columnar bytes are downloaded only when the
+    object has changed.
+    """
+    with _cubes_lock:
+        cached = _cubes.get(city)
+
+    request = {'Bucket': bucket_name, 'Key': summary_key(city, '.col')}
+    if cached is not None:
+        request['IfNoneMatch'] = cached[1]
+    try:
+        response = s3_client.get_object(**request)
+    except ClientError as e:
+        if cached is not None and e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+            with _cubes_lock:
+                if city in _cubes:
+                    _cubes.move_to_end(city)
+            return cached
+        raise
+
+    cube, etag = SummaryCube.from_columnar(response['Body'].read()), response.get('ETag')
+    with _cubes_lock:
+        _cubes[city] = (cube, etag)
+        _cubes.move_to_end(city)
+        while len(_cubes) > int(os.environ.get('AGGREGATION_CACHE_CITIES', '4')):
+            _cubes.popitem(last=False)
+    return cube, etag
+
+
+def aggregate_city_data(event, context):
+    """
+    Lambda handler for GET /v2/data/{city}/aggregate
+
+    Expected query parameters:
+    - outcome: Comma-separated outcomes (required)
+    - facet: Comma-separated facet choices such as "none", "age" or
+      "age+sex+risk" (default "none"); any combination of the city's
+      dimensions is accepted, not just the precomputed FACETS
+    - scenario: Optional comma-separated scenarios (default all)
+    - variant: Optional comma-separated variants, e.g. "baseline" (default all)
+
+    Response format:
+    {
+        "city": "C.12580",
+        "simulations": {scenario: {variant: {outcome: {facet: {stratum: [points]}}}}}
+    }
+
+    Strata are summed server-side from the finest-grained summary held as a
+    dense NumPy cube (see facet_aggregation), so clients download only the
+    marginal they display. Percentage outcomes cannot be summed and are
+    rejected with 400.
+    """
+
+    try:
+        city = (event.get('pathParameters') or {}).get('city')
+        query_params = event.get('queryStringParameters') or {}
+        outcomes = _parse_list(query_params.get('outcome'))
+        facets = _parse_list(query_params.get('facet')) or ['none']
+
+        if not city or not outcomes:
+            return _error_response(400, 'Missing required parameters: city and outcome')
+
+        bucket_name = os.environ.get('SUMMARY_BUCKET_NAME', 'jheem-summary-data')
+        try:
+            cube, source_etag = load_cube(get_s3_client(), bucket_name, city)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return _error_response(404, f'City not found: {city}')
+            raise
+
+        scenarios = _parse_list(query_params.get('scenario')) or cube.scenarios
+        variants = _parse_list(query_params.get('variant')) or cube.variants
+        unknown = (
+            [name for name in scenarios if name not in cube.scenarios] +
+            [name for name in variants if name not in cube.variants] +
+            [name for name in outcomes if name not in cube.outcomes] +
+            [name for facet in facets for name in parse_facet(facet) if name not in cube.dimensions]
+        )
+        if unknown:
+            return _error_response(400, f"Unknown scenario, variant, outcome or dimension: {', '.join(unknown)}")
+        percent = [outcome for outcome in outcomes if cube.is_percent(outcome)]
+        if percent:
+            return _error_response(400, f"Percentage outcomes cannot be aggregated: {', '.join(percent)}")
+
+        encoding = negotiate_encoding(get_header(event, 'Accept-Encoding'))
+        etag = content_etag('|'.join([
+            str(source_etag),
+            json.dumps([scenarios, variants, outcomes, facets]),
+            encoding or 'identity'
+        ]))
+        headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Methods': 'GET, OPTIONS',
+            'Vary': 'Accept-Encoding',
+            'ETag': etag,
+            'Cache-Control': cache_control('SUMMARY_MAX_AGE', 86400)
+        }
+        if etag_matches(get_header(event, 'If-None-Match'), etag):
+            return {
+                'statusCode': 304,
+                'headers': headers,
+                'body': ''
+            }
+
+        simulations = {}
+        for scenario in scenarios:
+            for variant in variants:
+                for outcome in outcomes:
+                    simulations.setdefault(scenario, {}).setdefault(variant, {})[outcome] = {
+                        facet: cube.aggregate(scenario, variant, outcome, facet) for facet in facets
+                    }
+
+        body = json.dumps({'city': city, 'simulations': simulations}, separators=(',', ':'))
+        emit_metrics(
+            'JHEEM/SummaryData',
+            {'Encoding': encoding or 'identity', 'Format': 'aggregate'},
+            {'ResponseBytes': (len(body), 'Bytes')},
+            {'city': city, 'facets': facets}
+        )
+
+        if encoding:
+            headers['Content-Encoding'] = encoding
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': binary_body(compress_body(body.encode('utf-8'), encoding)),
+                'isBase64Encoded': True
+            }
+
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': body
+        }
+
+    except Exception as e:
+        return _error_response(500, f'Internal server error: {str(e)}')
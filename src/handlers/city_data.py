@@ -0,0 +1,398 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+from src.handlers.aws_clients import get_s3_client
+from src.handlers.http_utils import (
+    accepts_encoding, binary_body, cache_control, compress_body, content_etag, emit_metrics,
+    etag_matches, get_header, http_date, negotiate_encoding, parse_etags
+)
+from src.handlers.plot_retrieval import fetch_plot
+from src.handlers.summary_columnar import COLUMNAR_MEDIA_TYPE, accepts_columnar, encode_columnar
+from src.handlers.summary_data import coalesce_ranges, index_key, parse_stratum_key, summary_key
+
+# Query parameters that select a slice instead of the whole city file
+SLICE_PARAMS = ('scenario', 'outcome', 'dimensions', 'year_from', 'year_to')
+
+
+def _error_response(status_code, message):
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Methods': 'GET, OPTIONS'
+        },
+        'body': json.dumps({
+            'error': message
+        })
+    }
+
+
+def _parse_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+
+def _parse_selection(query_params):
+    """
+    Parse slice parameters, or return None when the whole file is wanted
+
+    dimensions uses "name:value|value" pairs separated by commas, e.g.
+    "age:13-24 years|25-34 years,sex:female".
+
+    Raises:
+        ValueError: If a parameter is malformed
+    """
+    if not any(query_params.get(name) for name in SLICE_PARAMS):
+        return None
+
+    dimensions = {}
+    for part in _parse_list(query_params.get('dimensions')) or []:
+        name, separator, values = part.partition(':')
+        if not separator or not values:
+            raise ValueError(f'Invalid dimensions filter "{part}" (expected name:value|value)')
+        dimensions[name.strip()] = sorted(value.strip() for value in values.split('|') if value.strip())
+
+    years = {}
+    for name in ('year_from', 'year_to'):
+        if query_params.get(name):
+            try:
+                years[name] = int(query_params[name])
+            except ValueError:
+                raise ValueError(f'{name} must be an integer year')
+
+    return {
+        'scenarios': _parse_list(query_params.get('scenario')),
+        'outcomes': _parse_list(query_params.get('outcome')),
+        'dimensions': dimensions,
+        'year_from': years.get('year_from'),
+        'year_to': years.get('year_to')
+    }
+
+
+def _plan_slice(index, selection):
+    """
+    Pick the index entries a selection needs
+
+    Returns:
+        Tree mirroring the summary layout whose leaves are [start, end)
+        ranges; stratum leaves are wrapped as ('stratum', range) so their
+        points can be filtered by year
+    """
+    dimensions = index.get('dimensions', {})
+    scenarios, outcomes = selection['scenarios'], selection['outcomes']
+
+    def wanted_stratum(stratum):
+        if not selection['dimensions']:
+            return True
+        parsed = parse_stratum_key(stratum, dimensions)
+        return parsed is not None and all(
+            parsed.get(name) in values for name, values in selection['dimensions'].items()
+        )
+
+    simulations = {}
+    for scenario, variants in index.get('sections', {}).items():
+        if scenarios and scenario not in scenarios:
+            continue
+        for variant, sections in variants.items():
+            for outcome, section in sections.items():
+                if outcomes and outcome not in outcomes:
+                    continue
+                node = dict(section.get('fields', {}))
+                node['data'] = {
+                    stratum: ('stratum', byte_range)
+                    for stratum, byte_range in section.get('strata', {}).items()
+                    if wanted_stratum(stratum)
+                }
+                simulations.setdefault(scenario, {}).setdefault(variant, {})[outcome] = node
+
+    if not simulations:
+        return None
+
+    plan = dict(index.get('fields', {}))
+    plan['simulations'] = simulations
+    plan['observations'] = {
+        name: entry['range'] for name, entry in index.get('observations', {}).items()
+        if not outcomes or entry.get('simset_outcome') in outcomes
+    }
+    return plan
+
+
+def _plan_ranges(node):
+    if isinstance(node, tuple):
+        return [tuple(node[1])]
+    if isinstance(node, dict):
+        return [byte_range for child in node.values() for byte_range in _plan_ranges(child)]
+    return [tuple(node)]
+
+
+def _fetch_ranges(s3_client, bucket_name, object_key, source_etag, ranges):
+    """
+    Fetch byte ranges with concurrent, coalesced Range GETs
+
+    Nearby ranges (gaps up to SUMMARY_RANGE_GAP_BYTES) share one request.
+    IfMatch pins every request to the object the index was built from.
+
+    Returns:
+        ({(start, end): bytes}, request_count, bytes_fetched)
+    """
+    groups = coalesce_ranges(ranges, int(os.environ.get('SUMMARY_RANGE_GAP_BYTES', '65536')))
+
+    def fetch_group(group):
+        start, end, members = group
+        request = {'Bucket': bucket_name, 'Key': object_key, 'Range': f'bytes={start}-{end - 1}'}
+        if source_etag:
+            request['IfMatch'] = source_etag
+        data = s3_client.get_object(**request)['Body'].read()
+        return {(s, e): data[s - start:e - start] for s, e in members}, len(data)
+
+    pieces = {}
+    fetched = 0
+    max_workers = min(len(groups), int(os.environ.get('SUMMARY_RANGE_WORKERS', '8'))) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for group_pieces, size in executor.map(fetch_group, groups):
+            pieces.update(group_pieces)
+            fetched += size
+    return pieces, len(groups), fetched
+
+
+def _render(node, pieces, year_from, year_to):
+    """Assemble the sliced JSON from fetched pieces without re-serializing untouched values"""
+    if isinstance(node, tuple):
+        raw = pieces[tuple(node[1])]
+        if year_from is None and year_to is None:
+            return raw
+        points = [
+            point for point in json.loads(raw)
+            if (year_from is None or point.get('year', year_from) >= year_from)
+            and (year_to is None or point.get('year', year_to) <= year_to)
+        ]
+        return json.dumps(points, separators=(',', ':')).encode('utf-8')
+    if isinstance(node, dict):
+        return b'{' + b','.join(
+            json.dumps(key).encode('utf-8') + b':' + _render(child, pieces, year_from, year_to)
+            for key, child in node.items()
+        ) + b'}'
+    return pieces[tuple(node)]
+
+
+def _full_summary_response(event, s3_client, bucket_name, city, query_params, columnar):
+    """
+    Serve the whole city file (JSON or columnar)
+
+    Clients that accept gzip get the pre-gzipped object as-is; others, and
+    requests with compressed=0, get the uncompressed object. The two are
+    separate S3 objects, so their ETags already differ per representation.
+    """
+    compressed = (query_params.get('compressed', '1') != '0'
+                  and accepts_encoding(get_header(event, 'Accept-Encoding'), 'gzip'))
+    suffix = '.col' if columnar else '.json'
+    request = {'Bucket': bucket_name, 'Key': summary_key(city, suffix + '.gz' if compressed else suffix)}
+    if_none_match = get_header(event, 'If-None-Match')
+    client_tags = parse_etags(if_none_match)
+    # S3 checks a single tag; several are matched below once the ETag is known
+    if len(client_tags) == 1 and client_tags[0] != '*':
+        request['IfNoneMatch'] = client_tags[0]
+
+    headers = {
+        'Content-Type': COLUMNAR_MEDIA_TYPE if columnar else 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Methods': 'GET, OPTIONS',
+        'Vary': 'Accept, Accept-Encoding',
+        'Cache-Control': cache_control('SUMMARY_MAX_AGE', 86400)
+    }
+
+    try:
+        response = s3_client.get_object(**request)
+    except ClientError as e:
+        if e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+            headers['ETag'] = request['IfNoneMatch']
+            return {
+                'statusCode': 304,
+                'headers': headers,
+                'body': ''
+            }
+        raise
+
+    headers['ETag'] = response.get('ETag')
+    if response.get('LastModified'):
+        headers['Last-Modified'] = http_date(response['LastModified'])
+
+    if client_tags and etag_matches(if_none_match, headers['ETag']):
+        response['Body'].close()
+        return {
+            'statusCode': 304,
+            'headers': headers,
+            'body': ''
+        }
+
+    # base64 adds a third to binary bodies
+    binary = compressed or columnar
+    encoded_size = response['ContentLength'] * 4 // 3 if binary else response['ContentLength']
+    if encoded_size > int(os.environ.get('MAX_RESPONSE_BYTES', '6000000')):
+        response['Body'].close()
+        return _error_response(
+            413,
+            'City summary exceeds the response size limit; request it with Accept-Encoding: gzip or select '
+            'a slice with scenario, outcome, dimensions, year_from or year_to'
+        )
+
+    data = response['Body'].read()
+
+    if compressed:
+        headers['Content-Encoding'] = 'gzip'
+    if binary:
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': binary_body(data),
+            'isBase64Encoded': True
+        }
+
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': data.decode('utf-8')
+    }
+
+
+def _sliced_summary_response(event, s3_client, bucket_name, city, selection, columnar):
+    """Serve a scenario/outcome/stratum/year subtree read with Range GETs"""
+    try:
+        index_bytes, _, _, _ = fetch_plot(s3_client, bucket_name, index_key(city), validate=False)
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'NoSuchKey':
+            return _error_response(404, f'No summary index for city: {city}')
+        raise
+    index = json.loads(index_bytes)
+
+    encoding = negotiate_encoding(get_header(event, 'Accept-Encoding'))
+    # A slice is fully determined by the source object and the selection
+    etag = content_etag('|'.join([
+        str(index.get('source_etag')),
+        json.dumps(selection, sort_keys=True),
+        'columnar' if columnar else 'json',
+        encoding or 'identity'
+    ]))
+    headers = {
+        'Content-Type': COLUMNAR_MEDIA_TYPE if columnar else 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Methods': 'GET, OPTIONS',
+        'Vary': 'Accept, Accept-Encoding',
+        'ETag': etag,
+        'Cache-Control': cache_control('SUMMARY_MAX_AGE', 86400)
+    }
+    if etag_matches(get_header(event, 'If-None-Match'), etag):
+        return {
+            'statusCode': 304,
+            'headers': headers,
+            'body': ''
+        }
+
+    plan = _plan_slice(index, selection)
+    if plan is None:
+        return _error_response(404, f'No summary data for the requested slice of {city}')
+
+    try:
+        pieces, request_count, bytes_fetched = _fetch_ranges(
+            s3_client, bucket_name, summary_key(city), index.get('source_etag'), _plan_ranges(plan)
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'PreconditionFailed':
+            return _error_response(
+                409, f'Summary index for {city} is out of date; rebuild it with scripts/build_summary_index.py'
+            )
+        raise
+
+    sliced = _render(plan, pieces, selection['year_from'], selection['year_to'])
+    if columnar:
+        sliced = encode_columnar(json.loads(sliced))
+    if encoding:
+        headers['Content-Encoding'] = encoding
+        response_body = binary_body(compress_body(sliced, encoding))
+    elif columnar:
+        response_body = binary_body(sliced)
+    else:
+        response_body = sliced.decode('utf-8')
+
+    emit_metrics(
+        'JHEEM/SummaryData',
+        {'Encoding': encoding or 'identity', 'Format': 'columnar' if columnar else 'json'},
+        {
+            'ResponseBytes': (len(response_body), 'Bytes'),
+            'RangeRequests': (request_count, 'Count'),
+            'BytesFetched': (bytes_fetched, 'Bytes')
+        },
+        {'city': city, 'selection': selection}
+    )
+
+    # Lambda proxy responses are capped at 6 MB
+    if len(response_body) > int(os.environ.get('MAX_RESPONSE_BYTES', '6000000')):
+        return _error_response(413, 'Selected slice exceeds the response size limit; narrow the selection')
+
+    response = {
+        'statusCode': 200,
+        'headers': headers,
+        'body': response_body
+    }
+    if encoding or columnar:
+        response['isBase64Encoded'] = True
+    return response
+
+
+def get_city_data(event, context):
+    """
+    Lambda handler for GET /v2/data/{city}
+
+    Without slice parameters the whole city summary is returned: the
+    pre-gzipped summary/<city>.json.gz for clients that accept gzip, or
+    summary/<city>.json for others and with compressed=0.
+
+    Optional slice parameters return only part of the file:
+    - scenario: Comma-separated scenarios
+    - outcome: Comma-separated outcomes (observations are filtered to match)
+    - dimensions: Stratum filter, e.g. "age:13-24 years|25-34 years,sex:female"
+    - year_from, year_to: Inclusive year range for stratum points
+
+    Slices are read from the uncompressed object with concurrent S3 Range
+    GETs located through summary/<city>.index.json (written by
+    scripts/build_summary_index.py), so a single chart's data can be served
+    without downloading the whole city.
+    
+    Clients that send Accept: application/vnd.jheem.summary+columnar get the
+    columnar encoding (see summary_columnar) instead: whole files from the
+    summary/<city>.col(.gz) objects written by
+    scripts/convert_summary_columnar.py, slices encoded on the fly.
+    """
+
+    try:
+        city = (event.get('pathParameters') or {}).get('city')
+        query_params = event.get('queryStringParameters') or {}
+
+        if not city:
+            return _error_response(400, 'Missing city path parameter')
+
+        try:
+            selection = _parse_selection(query_params)
+        except ValueError as e:
+            return _error_response(400, str(e))
+
+        bucket_name = os.environ.get('SUMMARY_BUCKET_NAME', 'jheem-summary-data')
+        s3_client = get_s3_client()
+        columnar = accepts_columnar(get_header(event, 'Accept'))
+
+        try:
+            if selection is None:
+                return _full_summary_response(event, s3_client, bucket_name, city, query_params, columnar)
+            return _sliced_summary_response(event, s3_client, bucket_name, city, selection, columnar)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return _error_response(404, f'City not found: {city}')
+            raise
+
+    except Exception as e:
+        return _error_response(500, f'Internal server error: {str(e)}')
@@ -0,0 +1,201 @@
+import base64
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+
+def iter_pages(operation, **kwargs):
+    """
+    Yield successive response pages from a DynamoDB query or scan
+
+    Follows LastEvaluatedKey until the result set is exhausted, so callers
+    never see the 1 MB per-response truncation.
+
+    Args:
+        operation: A bound table method such as table.query or table.scan
+        **kwargs: Arguments passed through to every call
+    """
+    while True:
+        response = operation(**kwargs)
+        yield response
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+def iter_items(operation, **kwargs):
+    """Yield items one at a time across all pages of a query or scan"""
+    for page in iter_pages(operation, **kwargs):
+        yield from page.get('Items', [])
+
+
+def parallel_scan(table_factory, total_segments, segment_reducer, **kwargs):
+    """
+    Scan a table as `total_segments` concurrent segments
+
+    Each segment is paginated independently on its own thread and reduced to a
+    single value, so only the per-segment results are held in memory.
+
+    Args:
+        table_factory: Callable returning the Table to scan, called once per
+            segment; get_plot_table is fine, as the pooled resource's Table
+            actions go straight to its thread-safe client (see aws_clients)
+        total_segments: Number of DynamoDB scan segments / worker threads
+        segment_reducer: Callable taking an item iterator and returning a result
+        **kwargs: Arguments passed through to every scan call
+
+    Returns:
+        List of segment_reducer results, one per segment
+    """
+    def scan_segment(segment):
+        table = table_factory()
+        return segment_reducer(iter_items(
+            table.scan,
+            Segment=segment,
+            TotalSegments=total_segments,
+            **kwargs
+        ))
+
+    if total_segments <= 1:
+        return [segment_reducer(iter_items(table_factory().scan, **kwargs))]
+
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        return list(executor.map(scan_segment, range(total_segments)))
+
+
+def backoff_delay(attempt, base=0.05, cap=2.0):
+    """Exponential backoff with full jitter for retrying unprocessed batch entries"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def batch_get_items(resource, table_name, keys, max_attempts=6, **kwargs):
+    """
+    Fetch items by primary key with BatchGetItem
+
+    Keys are sent 100 at a time (the BatchGetItem limit) and UnprocessedKeys are
+    retried with exponential backoff. Missing keys are simply absent from the
+    result, and no particular order is guaranteed.
+
+    Args:
+        resource: DynamoDB service resource
+        table_name: Name of the table to read from
+        keys: List of primary key dicts
+        max_attempts: Attempts per chunk before giving up on unprocessed keys
+        **kwargs: Extra per-table options (e.g. ProjectionExpression)
+    """
+    items = []
+    for start in range(0, len(keys), 100):
+        request = {table_name: dict(kwargs, Keys=keys[start:start + 100])}
+
+        for attempt in range(max_attempts):
+            response = resource.batch_get_item(RequestItems=request)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+
+            request = response.get('UnprocessedKeys') or {}
+            if not request:
+                break
+            time.sleep(backoff_delay(attempt))
+        else:
+            raise RuntimeError(f'BatchGetItem left {len(request[table_name]["Keys"])} keys unprocessed')
+
+    return items
+
+
+def batch_put_chunk(resource, table_name, items, max_attempts=8):
+    """
+    Write up to 25 items with BatchWriteItem
+
+    UnprocessedItems (throttling, partition hot spots) are resent with
+    exponential backoff until max_attempts is reached. If a request fails
+    outright, the items it carried are reported as not written while those
+    accepted by earlier attempts still count as written.
+
+    Returns:
+        (unprocessed, error): the items not written, and the exception that
+        stopped the retries (None when they were only throttled)
+    """
+    if len(items) > 25:
+        raise ValueError('BatchWriteItem accepts at most 25 items per request')
+
+    request = {table_name: [{'PutRequest': {'Item': item}} for item in items]}
+
+    for attempt in range(max_attempts):
+        try:
+            response = resource.batch_write_item(RequestItems=request)
+        except Exception as e:
+            return [entry['PutRequest']['Item'] for entry in request[table_name]], e
+
+        request = response.get('UnprocessedItems') or {}
+        if not request:
+            return [], None
+        time.sleep(backoff_delay(attempt))
+
+    return [entry['PutRequest']['Item'] for entry in request.get(table_name, [])], None
+
+
+def read_page(operation, limit, next_token=None, **kwargs):
+    """
+    Read up to `limit` items starting from an opaque cursor
+
+    DynamoDB's own Limit caps items evaluated rather than items returned when a
+    FilterExpression is present, so this keeps requesting until it has `limit`
+    matches or the result set is exhausted.
+
+    Returns:
+        (items, next_token) where next_token is None on the last page
+    """
+    if next_token:
+        kwargs['ExclusiveStartKey'] = decode_next_token(next_token)
+
+    items = []
+    while True:
+        kwargs['Limit'] = limit - len(items)
+        response = operation(**kwargs)
+        items.extend(response.get('Items', []))
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return items, None
+        if len(items) >= limit:
+            return items, encode_next_token(last_key)
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+def _key_default(obj):
+    if isinstance(obj, Decimal):
+        return {'__decimal__': str(obj)}
+    raise TypeError(f'Unsupported key attribute type: {type(obj).__name__}')
+
+
+def _key_object_hook(obj):
+    if set(obj) == {'__decimal__'}:
+        return Decimal(obj['__decimal__'])
+    return obj
+
+
+def encode_next_token(last_evaluated_key):
+    """Encode a LastEvaluatedKey as a URL-safe cursor for API callers"""
+    raw = json.dumps(last_evaluated_key, default=_key_default, sort_keys=True, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_next_token(token):
+    """
+    Decode a cursor produced by encode_next_token
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')), object_hook=_key_object_hook)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f'Invalid next_token: {str(e)}')
+
+    if not isinstance(key, dict) or not key:
+        raise ValueError('Invalid next_token')
+    return key
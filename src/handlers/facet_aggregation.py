@@ -0,0 +1,282 @@
+import json
+import math
+
+import numpy as np
+
+from src.handlers.summary_columnar import COLUMNS, read_columnar
+from src.handlers.summary_data import parse_stratum_key
+
+# Stratum key used for the fully aggregated ("none" facet) series
+TOTAL_KEY = 'total'
+
+
+def parse_facet(facet):
+    """Split a facet choice such as "age+sex" (or "none") into dimension names"""
+    if not facet or facet == 'none':
+        return ()
+    return tuple(name.strip() for name in facet.split('+') if name.strip())
+
+
+def lattice_order(facets):
+    """
+    Order facet choices so every marginal is reduced from a finer one
+
+    Facets with more dimensions come first, so in a lattice such as
+    generate_orchestration_config.FACETS each three-way marginal is summed
+    from the four-way one, each two-way from a cached three-way, and so on.
+    """
+    return sorted(dict.fromkeys(facets), key=lambda facet: -len(parse_facet(facet)))
+
+
+class SummaryCube:
+    """
+    Dense ndarray view of a city summary for server-side facet aggregation
+
+    Values are held as one float64 array shaped
+    (column, scenario, variant, outcome, *dimensions, year), where column is
+    value/lower/upper and the dimension axes follow the summary metadata
+    order (e.g. age, sex, race, risk). Strata missing from the summary are
+    NaN and are skipped when summing.
+
+    Marginals are memoized per set of kept dimensions and each new one is
+    reduced from the smallest marginal already computed that contains it,
+    so e.g. age+race is summed from age+race+sex rather than the full cube.
+    Summing lower/upper bounds gives the same approximate interval the
+    browser-side aggregation produced.
+    """
+
+    def __init__(self, scenarios, variants, outcomes, dimensions, years, data, outcome_metadata=None):
+        self.scenarios = list(scenarios)
+        self.variants = list(variants)
+        self.outcomes = list(outcomes)
+        self.dimensions = {name: list(values) for name, values in dimensions.items()}
+        self.dimension_names = tuple(self.dimensions)
+        self.years = list(years)
+        self.outcome_metadata = outcome_metadata or {}
+
+        present = ~np.isnan(data)
+        self._marginals = {
+            self.dimension_names: (np.where(present, data, 0.0), present.astype(np.int32))
+        }
+
+    @classmethod
+    def _allocate(cls, scenarios, variants, outcomes, dimensions, years):
+        shape = (len(COLUMNS), len(scenarios), len(variants), len(outcomes)) + \
+            tuple(len(values) for values in dimensions.values()) + (len(years),)
+        return np.full(shape, np.nan)
+
+    @classmethod
+    def from_summary(cls, summary):
+        """Build a cube from the JSON summary layout, using only finest-grained strata"""
+        metadata = summary.get('metadata') or {}
+        dimensions = {name: list(spec.get('values', [])) for name, spec in (metadata.get('dimensions') or {}).items()}
+        simulations = summary.get('simulations') or {}
+
+        scenarios = list(simulations)
+        variants = list(dict.fromkeys(variant for variants in simulations.values() for variant in variants))
+        outcomes = list(dict.fromkeys(
+            outcome for variants in simulations.values() for sections in variants.values() for outcome in sections
+        ))
+        years = sorted({
+            point['year']
+            for variants in simulations.values()
+            for sections in variants.values()
+            for section in sections.values()
+            for points in (section.get('data') or {}).values()
+            for point in points
+        })
+        year_position = {year: i for i, year in enumerate(years)}
+        data = cls._allocate(scenarios, variants, outcomes, dimensions, years)
+
+        for s, scenario in enumerate(scenarios):
+            for variant, sections in simulations[scenario].items():
+                v = variants.index(variant)
+                for outcome, section in sections.items():
+                    o = outcomes.index(outcome)
+                    for stratum, points in (section.get('data') or {}).items():
+                        cell = cls._stratum_cell(stratum, dimensions)
+                        if cell is None:
+                            continue
+                        for point in points:
+                            for c, column in enumerate(COLUMNS):
+                                if point.get(column) is not None:
+                                    data[(c, s, v, o) + cell + (year_position[point['year']],)] = point[column]
+
+        return cls(scenarios, variants, outcomes, dimensions, years, data, metadata.get('outcomes'))
+
+    @classmethod
+    def from_columnar(cls, blob):
+        """Build a cube straight from the columnar encoding without a JSON round trip"""
+        header, columns = read_columnar(blob)
+        dimensions = header['dimensions']
+        sections = header['sections']
+        years = header['years']
+        width = len(years)
+
+        scenarios = list(dict.fromkeys(entry['scenario'] for entry in sections))
+        variants = list(dict.fromkeys(entry['variant'] for entry in sections))
+        outcomes = list(dict.fromkeys(entry['outcome'] for entry in sections))
+        data = cls._allocate(scenarios, variants, outcomes, dimensions, years)
+        flat = np.frombuffer(columns, dtype=np.float32)
+
+        for entry in sections:
+            count = entry['strata']
+            block = flat[entry['offset']:entry['offset'] + len(header['columns']) * count * width]
+            block = block.reshape(len(header['columns']), count, width)
+
+            if 'codes' in entry and list(entry['dimensions']) == list(dimensions):
+                cells = [tuple(codes) for codes in entry['codes']]
+            else:
+                keys = entry.get('keys') or [
+                    '_'.join(dimensions[name][code] for name, code in zip(entry['dimensions'], codes))
+                    for codes in entry['codes']
+                ]
+                cells = [cls._stratum_cell(key, dimensions) for key in keys]
+
+            s = scenarios.index(entry['scenario'])
+            v = variants.index(entry['variant'])
+            o = outcomes.index(entry['outcome'])
+            for row, cell in enumerate(cells):
+                if cell is None:
+                    continue
+                for c, column in enumerate(header['columns']):
+                    if column in COLUMNS:
+                        data[(COLUMNS.index(column), s, v, o) + cell] = block[c, row]
+
+        metadata = header.get('top', {}).get('metadata') or {}
+        return cls(scenarios, variants, outcomes, dimensions, years, data, metadata.get('outcomes'))
+
+    @staticmethod
+    def _stratum_cell(stratum, dimensions):
+        """Index tuple for a finest-grained stratum key, or None for coarser or unknown keys"""
+        parsed = parse_stratum_key(stratum, dimensions)
+        if parsed is None or len(parsed) != len(dimensions):
+            return None
+        return tuple(dimensions[name].index(parsed[name]) for name in dimensions)
+
+    def is_percent(self, outcome):
+        return bool((self.outcome_metadata.get(outcome) or {}).get('display_as_percent'))
+
+    def marginal(self, keep):
+        """
+        Return (sums, counts) with every dimension not in `keep` summed out
+
+        Both arrays are shaped (column, scenario, variant, outcome,
+        *kept dimensions, year); counts is the number of strata that
+        contributed to each sum.
+        """
+        keep = tuple(name for name in self.dimension_names if name in set(keep))
+        if keep in self._marginals:
+            return self._marginals[keep]
+
+        source = min(
+            (kept for kept in self._marginals if set(keep) <= set(kept)),
+            key=lambda kept: self._marginals[kept][0].size
+        )
+        sums, counts = self._marginals[source]
+        axes = tuple(4 + i for i, name in enumerate(source) if name not in keep)
+        result = (sums.sum(axis=axes), counts.sum(axis=axes))
+        self._marginals[keep] = result
+        return result
+
+    def aggregate(self, scenario, variant, outcome, facet):
+        """
+        Aggregate one scenario/variant/outcome to the strata of a facet
+
+        Args:
+            facet: Facet choice ("none", "age", "age+sex", ...) or a
+                sequence of dimension names
+
+        Returns:
+            {stratum_key: [{"year", "value", "lower", "upper"}, ...]} in the
+            same shape as the summary's "data" objects
+
+        Raises:
+            KeyError: For an unknown scenario, variant, outcome or dimension
+            ValueError: For outcomes displayed as percentages, which cannot
+                be summed across strata
+        """
+        keep = parse_facet(facet) if isinstance(facet, str) else tuple(facet)
+        unknown = [name for name in keep if name not in self.dimensions]
+        if unknown:
+            raise KeyError(f"Unknown dimension(s): {', '.join(unknown)}")
+        for kind, name, names in (('scenario', scenario, self.scenarios), ('variant', variant, self.variants),
+                                  ('outcome', outcome, self.outcomes)):
+            if name not in names:
+                raise KeyError(f"Unknown {kind}: {name}")
+        if self.is_percent(outcome):
+            raise ValueError(f'{outcome} is a percentage and cannot be aggregated by summing strata')
+
+        sums, counts = self.marginal(keep)
+        index = (slice(None), self.scenarios.index(scenario), self.variants.index(variant), self.outcomes.index(outcome))
+        sums, counts = sums[index], counts[index]
+
+        kept = [name for name in self.dimension_names if name in keep]
+        series = {}
+        for cell in np.ndindex(*(len(self.dimensions[name]) for name in kept)):
+            key = '_'.join(self.dimensions[name][i] for name, i in zip(kept, cell)) or TOTAL_KEY
+            cell_sums, cell_counts = sums[(slice(None),) + cell], counts[(slice(None),) + cell]
+            points = []
+            for y, year in enumerate(self.years):
+                if not cell_counts[0, y]:
+                    continue
+                point = {'year': year}
+                for c, column in enumerate(COLUMNS):
+                    if cell_counts[c, y]:
+                        value = float(cell_sums[c, y])
+                        point[column] = value if math.isfinite(value) else None
+                points.append(point)
+            if points:
+                series[key] = points
+        return series
+
+
+def write_marginals(cube, facets, out):
+    """
+    Compute the marginals for a set of facet choices and save them as one .npz
+
+    Each facet is stored under its facet choice (e.g. "age+race", "none")
+    as a float32 array shaped (column, scenario, variant, outcome,
+    *facet dimensions in cube order, year), with NaN
+    where no stratum contributed. Percentage outcomes cannot be summed and
+    are left as NaN. The axis labels are stored as JSON under "axes".
+
+    Returns:
+        {facet: [dimension names in axis order]} for the facets written; facets
+        naming a dimension the city does not have are skipped
+    """
+    percent = [o for o, outcome in enumerate(cube.outcomes) if cube.is_percent(outcome)]
+    arrays = {}
+    written = {}
+    for facet in lattice_order(facets):
+        dimensions = parse_facet(facet)
+        if any(name not in cube.dimensions for name in dimensions):
+            continue
+        keep = [name for name in cube.dimension_names if name in dimensions]
+        if keep in written.values():
+            continue
+
+        sums, counts = cube.marginal(keep)
+        marginal = np.where(counts > 0, sums, np.nan).astype(np.float32)
+        marginal[:, :, :, percent] = np.nan
+        arrays[facet or 'none'] = marginal
+        written[facet or 'none'] = keep
+
+    axes = {
+        'columns': list(COLUMNS),
+        'scenarios': cube.scenarios,
+        'variants': cube.variants,
+        'outcomes': cube.outcomes,
+        'dimensions': cube.dimensions,
+        'years': cube.years,
+        'facets': written
+    }
+    np.savez_compressed(out, axes=np.array(json.dumps(axes)), **arrays)
+    return written
+
+
+def read_marginals(source):
+    """Load a marginals artifact; returns (axes, {facet: ndarray})"""
+    with np.load(source) as artifact:
+        axes = json.loads(str(artifact['axes']))
+        return axes, {name: artifact[name] for name in axes['facets']}
@@ -0,0 +1,161 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import timezone
+from email.utils import format_datetime
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is always available
+    brotli = None
+
+
+def get_header(event, name):
+    """Case-insensitive lookup of a request header (API Gateway may pass None)"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def read_body(event, default='{}'):
+    """
+    Return the request body as text
+
+    application/json is a binaryMediaType (so compressed responses are
+    delivered as binary), so API Gateway base64-encodes JSON request bodies.
+    """
+    body = event.get('body')
+    if body is None:
+        return default
+    if event.get('isBase64Encoded'):
+        return base64.b64decode(body).decode('utf-8')
+    return body
+
+
+def parse_etags(if_none_match):
+    """Split an If-None-Match header into entity tags, dropping weak prefixes"""
+    tags = []
+    for tag in (if_none_match or '').split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header matches the current entity tag"""
+    tags = parse_etags(if_none_match)
+    return '*' in tags or etag in tags
+
+
+def content_etag(body):
+    """Stable strong ETag for a generated response body"""
+    return '"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def cache_control(max_age_env, default_max_age):
+    """Cache-Control value with a max-age configurable per endpoint"""
+    return f"public, max-age={int(os.environ.get(max_age_env, str(default_max_age)))}"
+
+
+def http_date(value):
+    """Format a datetime for Last-Modified (strings from S3 headers pass through)"""
+    if value is None or isinstance(value, str):
+        return value
+    # botocore returns dateutil's tzutc, which usegmt does not accept
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _accepted_encodings(accept_encoding):
+    """Parse an Accept-Encoding header into {coding: q-value}"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        pieces = [piece.strip() for piece in part.split(';')]
+        coding = pieces[0].lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick the response content coding for an Accept-Encoding header
+
+    Returns:
+        'br' (only if the brotli package is installed), 'gzip', or None for
+        an uncompressed response
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get('*', 0.0)
+
+    candidates = ['gzip']
+    if brotli is not None:
+        candidates.insert(0, 'br')
+
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def accepts_encoding(accept_encoding, coding):
+    """True if an Accept-Encoding header allows the given content coding"""
+    accepted = _accepted_encodings(accept_encoding)
+    return accepted.get(coding, accepted.get('*', 0.0)) > 0
+
+
+def compress_body(raw, encoding):
+    """Compress bytes with the negotiated coding"""
+    if encoding == 'br':
+        return brotli.compress(raw, quality=int(os.environ.get('BROTLI_QUALITY', '5')))
+    if encoding == 'gzip':
+        return gzip.compress(raw, compresslevel=int(os.environ.get('GZIP_LEVEL', '6')))
+    raise ValueError(f'Unsupported content encoding: {encoding}')
+
+
+def binary_body(raw):
+    """Encode bytes for an API Gateway proxy response with isBase64Encoded"""
+    return base64.b64encode(raw).decode('ascii')
+
+
+def emit_metrics(namespace, dimensions, metrics, properties=None):
+    """
+    Log metrics in CloudWatch Embedded Metric Format
+
+    Args:
+        namespace: CloudWatch namespace (e.g. "JHEEM/PlotRetrieval")
+        dimensions: {name: value} dimension set
+        metrics: {name: (value, unit)}
+        properties: Extra searchable fields that are not metrics
+    """
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in metrics.items()]
+            }]
+        }
+    }
+    record.update(dimensions)
+    record.update({name: value for name, (value, _) in metrics.items()})
+    record.update(properties or {})
+    print(json.dumps(record, default=str))
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import re
+
+from src.handlers.plot_validation import validate_plot_bytes
+
+# A plot stored inside a bundle is addressed as "<bundle key>#<offset>+<length>"
+BUNDLE_REF_PATTERN = re.compile(r'^(?P<key>.+)#(?P<offset>\d+)\+(?P<length>\d+)$')
+
+BUNDLE_FORMAT_VERSION = 1
+
+
+def bundle_key(city, scenario, digest):
+    """
+    S3 key of a city#scenario bundle, named by a hash of its contents
+
+    Rebuilding a partition with unchanged plots gives the same key, and a
+    changed one gets a new object, so registered offsets never point into a
+    bundle that was rewritten underneath them.
+    """
+    prefix = os.environ.get('PLOT_BUNDLE_PREFIX', 'plots/bundles/')
+    return f"{prefix}{city}/{scenario}/{digest[:16]}.bundle"
+
+
+def bundle_ref(key, offset, length):
+    return f"{key}#{offset}+{length}"
+
+
+def split_bundle_ref(plot_key):
+    """(bundle key, offset, length) for a bundle reference, or None for a plain object key"""
+    match = BUNDLE_REF_PATTERN.match(plot_key or '')
+    if match is None:
+        return None
+    return match.group('key'), int(match.group('offset')), int(match.group('length'))
+
+
+def byte_range(offset, length):
+    """HTTP Range header value for a bundle member"""
+    return f"bytes={offset}-{offset + length - 1}"
+
+
+def member_etag(etag, offset, length):
+    """
+    Entity tag for one plot inside a bundle
+
+    Ranged GETs return the whole bundle's ETag, which every member shares,
+    so the member's position is folded in to keep tags distinct per plot.
+    """
+    if not etag:
+        return etag
+    inner = etag.strip('"')
+    return f'"{inner}:{offset}+{length}"'
+
+
+def bundle_etag(tag, offset, length):
+    """The bundle ETag behind a member tag, or None if the tag is for another member"""
+    suffix = f':{offset}+{length}"'
+    if not tag or not tag.endswith(suffix):
+        return None
+    return tag[:-len(suffix)] + '"'
+
+
+def write_bundle(members):
+    """
+    Concatenate plot bodies into one bundle
+
+    Args:
+        members: {outcome_stat_facet: raw plot bytes}
+
+    Returns:
+        (bundle bytes, index) where index is
+        {"format_version", "content_hash", "plots": {outcome_stat_facet: [offset, length]}}
+
+    Raises:
+        ValueError: If a member is not valid JSON
+    """
+    parts = []
+    plots = {}
+    offset = 0
+    # Sorted so the same plots always produce the same bytes (and key)
+    for outcome_stat_facet in sorted(members):
+        raw = members[outcome_stat_facet]
+        validate_plot_bytes(raw)
+        parts.append(raw)
+        plots[outcome_stat_facet] = [offset, len(raw)]
+        offset += len(raw)
+
+    body = b''.join(parts)
+    index = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'content_hash': hashlib.sha256(body).hexdigest(),
+        'plots': plots
+    }
+    return body, index
+
+
+def index_bytes(index):
+    return json.dumps(index, separators=(',', ':')).encode('utf-8')
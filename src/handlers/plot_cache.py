@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    """A cached plot body along with the S3 validators needed to revalidate it"""
+
+    __slots__ = ('body', 'etag', 'last_modified', 'size', 'fetched_at')
+
+    def __init__(self, body, etag, last_modified, size):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+        self.fetched_at = time.monotonic()
+
+
+class PlotCache:
+    """
+    Size-bounded LRU cache for plot bodies, shared by warm invocations
+
+    Entries younger than ttl_seconds are served as-is. Older entries are kept
+    but must be revalidated against S3 (If-None-Match on the stored ETag)
+    before use, which costs a request but no body transfer when unchanged.
+    """
+
+    def __init__(self, max_bytes, ttl_seconds, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 8
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (entry, is_fresh) for a cached key, or (None, False)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            self._entries.move_to_end(key)
+            return entry, (time.monotonic() - entry.fetched_at) < self.ttl_seconds
+
+    def put(self, key, body, etag, last_modified, size):
+        """Insert or replace an entry, evicting least recently used entries to fit"""
+        if size > self.max_entry_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.size
+
+            self._entries[key] = CacheEntry(body, etag, last_modified, size)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.evictions += 1
+
+    def mark_fresh(self, key):
+        """Restart the TTL of an entry after S3 confirmed it is unchanged"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.fetched_at = time.monotonic()
+
+    def record(self, outcome):
+        """Count a lookup outcome: 'hit', 'miss' or 'revalidated'"""
+        with self._lock:
+            if outcome == 'hit':
+                self.hits += 1
+            elif outcome == 'revalidated':
+                self.revalidations += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'evictions': self.evictions
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+# One cache per Lambda container
+plot_cache = PlotCache(
+    max_bytes=int(os.environ.get('PLOT_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+    ttl_seconds=float(os.environ.get('PLOT_CACHE_TTL_SECONDS', '300'))
+)
@@ -0,0 +1,223 @@
+import os
+import zlib
+from datetime import datetime, timezone
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from src.handlers.dynamodb_pagination import iter_items, parallel_scan
+
+# The catalog index lives in the plot table as one counter item per
+# city#scenario, spread over CATALOG_SHARDS partition keys ("_catalog_0",
+# "_catalog_1", ...) so concurrent registrations do not all hit one item or
+# one partition. The catalog partitions have no '#', so code that groups real
+# partitions skips them. Changing CATALOG_SHARDS requires a rebuild.
+CATALOG_PREFIX = '_catalog_'
+
+# The single-item index used before the counters were sharded; removed by rebuilds
+LEGACY_CATALOG_KEY = {
+    'city_scenario': '_catalog',
+    'outcome_stat_facet': '_index'
+}
+
+# Partition map entry for a city#scenario with no registered plots yet
+_EMPTY_ENTRY = {'plot_count': 0, 'total_bytes': 0}
+
+_NAMES = {
+    '#plot_count': 'plot_count',
+    '#total_bytes': 'total_bytes',
+    '#last_updated': 'last_updated',
+    '#version': 'version'
+}
+
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def catalog_shards():
+    return max(1, int(os.environ.get('CATALOG_SHARDS', '8')))
+
+
+def catalog_key(city_scenario):
+    """Key of the counter item for a city#scenario"""
+    shard = zlib.crc32(city_scenario.encode('utf-8')) % catalog_shards()
+    return {'city_scenario': f"{CATALOG_PREFIX}{shard}", 'outcome_stat_facet': city_scenario}
+
+
+def read_catalog(table):
+    """
+    Read every counter item, one Query per shard
+
+    Returns:
+        {'partitions': {city_scenario: {'plot_count', 'total_bytes',
+        'last_updated', 'version'}}, 'last_updated': ...}, or None if no
+        counter has been written yet
+    """
+    partitions = {}
+    for shard in range(catalog_shards()):
+        for item in iter_items(
+            table.query,
+            KeyConditionExpression=Key('city_scenario').eq(f"{CATALOG_PREFIX}{shard}"),
+            ConsistentRead=True
+        ):
+            partitions[item['outcome_stat_facet']] = {
+                name: item[name] for name in ('plot_count', 'total_bytes', 'last_updated', 'version') if name in item
+            }
+    if not partitions:
+        return None
+    return {
+        'partitions': partitions,
+        'last_updated': max((entry.get('last_updated') or '' for entry in partitions.values()), default=None)
+    }
+
+
+def apply_catalog_delta(table, city_scenario, count_delta, bytes_delta, updated_at=None):
+    """
+    Adjust the plot count and byte total recorded for one city#scenario
+
+    A single atomic UpdateItem; ADD creates the counter item on first use.
+    Every delta also bumps the item's version so a concurrent rebuild can
+    tell that its snapshot went stale.
+    """
+    table.update_item(
+        Key=catalog_key(city_scenario),
+        UpdateExpression=(
+            'SET #last_updated = :now '
+            'ADD #plot_count :count, #total_bytes :bytes, #version :one'
+        ),
+        ExpressionAttributeNames=_NAMES,
+        ExpressionAttributeValues={
+            ':now': updated_at or utc_now(), ':count': count_delta, ':bytes': bytes_delta, ':one': 1
+        }
+    )
+
+
+def count_partition(table, city_scenario):
+    """Plot count and byte total of one city#scenario, read with a Query"""
+    entry = dict(_EMPTY_ENTRY)
+    for item in iter_items(
+        table.query,
+        KeyConditionExpression=Key('city_scenario').eq(city_scenario),
+        ProjectionExpression='file_size',
+        ConsistentRead=True
+    ):
+        entry['plot_count'] += 1
+        entry['total_bytes'] += int(item.get('file_size') or 0)
+    return entry
+
+
+def scan_catalog(table_factory, total_segments=4):
+    """
+    Aggregate the catalog from a full (parallel) scan of the plot table
+
+    Returns:
+        {city_scenario: {'plot_count': int, 'total_bytes': int}}
+    """
+    def reduce_segment(items):
+        partitions = {}
+        for item in items:
+            city_scenario = item['city_scenario']
+            if '#' not in city_scenario:
+                continue
+            entry = partitions.setdefault(city_scenario, dict(_EMPTY_ENTRY))
+            entry['plot_count'] += 1
+            entry['total_bytes'] += int(item.get('file_size') or 0)
+        return partitions
+
+    segment_results = parallel_scan(
+        table_factory,
+        total_segments,
+        reduce_segment,
+        ProjectionExpression='city_scenario, file_size'
+    )
+
+    partitions = {}
+    for segment in segment_results:
+        for city_scenario, counts in segment.items():
+            entry = partitions.setdefault(city_scenario, dict(_EMPTY_ENTRY))
+            entry['plot_count'] += counts['plot_count']
+            entry['total_bytes'] += counts['total_bytes']
+    return partitions
+
+
+def write_catalog(table, partitions, indexed_partitions=None, updated_at=None, max_attempts=5):
+    """
+    Store freshly aggregated partition counts
+
+    Each counter is written only if its version still matches the one in
+    indexed_partitions (read_catalog output taken before the scan). When a
+    registration's delta landed in the meantime, the partition is recounted
+    with a Query and written again instead of overwriting that delta.
+    Counters for partitions missing from the scan are reset to zero.
+
+    Returns:
+        Number of partitions that had to be recounted
+    """
+    updated_at = updated_at or utc_now()
+    indexed_partitions = indexed_partitions or {}
+    recounted = 0
+
+    for city_scenario in sorted(set(partitions) | set(indexed_partitions)):
+        counts = partitions.get(city_scenario) or dict(_EMPTY_ENTRY)
+        version = (indexed_partitions.get(city_scenario) or {}).get('version')
+
+        for attempt in range(max_attempts):
+            condition = Attr('version').not_exists() if version is None else Attr('version').eq(version)
+            try:
+                table.put_item(
+                    Item=dict(
+                        catalog_key(city_scenario),
+                        plot_count=counts['plot_count'],
+                        total_bytes=counts['total_bytes'],
+                        last_updated=updated_at,
+                        version=(version or 0) + 1
+                    ),
+                    ConditionExpression=condition
+                )
+                break
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+            current = table.get_item(Key=catalog_key(city_scenario), ConsistentRead=True).get('Item') or {}
+            version = current.get('version')
+            counts = count_partition(table, city_scenario)
+            recounted += 1
+        else:
+            raise RuntimeError(f'Catalog counter for {city_scenario} kept changing during the rebuild')
+
+    table.delete_item(Key=LEGACY_CATALOG_KEY)
+    return recounted
+
+
+def compare_catalog(indexed_partitions, scanned_partitions):
+    """
+    Compare the stored index against a full scan
+
+    Returns:
+        List of (city_scenario, indexed_counts, scanned_counts) for every
+        partition whose plot_count or total_bytes disagree
+    """
+    mismatches = []
+    for city_scenario in sorted(set(indexed_partitions) | set(scanned_partitions)):
+        indexed = indexed_partitions.get(city_scenario) or _EMPTY_ENTRY
+        scanned = scanned_partitions.get(city_scenario) or _EMPTY_ENTRY
+        indexed_counts = {
+            'plot_count': int(indexed.get('plot_count', 0)),
+            'total_bytes': int(indexed.get('total_bytes', 0))
+        }
+        if indexed_counts != scanned:
+            mismatches.append((city_scenario, indexed_counts, scanned))
+    return mismatches
+
+
+def catalog_city_data(partitions):
+    """Group catalog partitions with at least one plot into {city: [scenarios]}"""
+    city_scenarios = {}
+    for city_scenario, counts in partitions.items():
+        if '#' not in city_scenario or int(counts.get('plot_count', 0)) <= 0:
+            continue
+        city, scenario = city_scenario.split('#', 1)
+        city_scenarios.setdefault(city, set()).add(scenario)
+
+    return {city: sorted(city_scenarios[city]) for city in sorted(city_scenarios)}
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import re
+from botocore.exceptions import ClientError
+
+from src.handlers.plot_validation import VALIDATED_METADATA_KEY, validate_plot_bytes
+
+# Content hashes are lowercase hex SHA-256 digests of the plot JSON bytes
+CONTENT_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def content_hash(raw):
+    """SHA-256 hex digest identifying a plot body"""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def content_key(digest):
+    """
+    S3 key of the content-addressed object for a digest
+
+    Objects are fanned out by the first two hex digits under
+    CONTENT_ADDRESSED_PREFIX (default "plots/sha256/"), e.g.
+    plots/sha256/3f/3fa9...e1.json
+    """
+    prefix = os.environ.get('CONTENT_ADDRESSED_PREFIX', 'plots/sha256/')
+    return f"{prefix}{digest[:2]}/{digest}.json"
+
+
+def store_plot(s3_client, bucket_name, raw):
+    """
+    Upload a plot body under its content hash unless it is already stored
+
+    Identical plots (regenerated, or shared between facets) map to the same
+    key, so a rerun only PUTs bodies that actually changed and existing
+    objects, their ETags and any downstream caches stay untouched. New
+    objects are validated here and tagged as validated on the PUT, so
+    scripts/tag_validated_plots.py never needs to visit them.
+
+    Returns:
+        (s3_key, digest, uploaded)
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    digest = content_hash(raw)
+    key = content_key(digest)
+
+    try:
+        s3_client.head_object(Bucket=bucket_name, Key=key)
+        return key, digest, False
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+
+    validate_plot_bytes(raw)
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=key,
+        Body=raw,
+        ContentType='application/json',
+        Metadata={VALIDATED_METADATA_KEY: 'true', 'sha256': digest}
+    )
+    return key, digest, True
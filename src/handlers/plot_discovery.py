@@ -1,9 +1,22 @@
 import json
-import boto3
 import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from botocore.exceptions import ClientError
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Key, Attr
+
+from src.handlers.aws_clients import get_dynamodb_resource, get_plot_table
+from src.handlers.dynamodb_pagination import batch_get_items, batch_put_chunk, iter_items, parallel_scan, read_page
+from src.handlers.http_utils import cache_control, content_etag, etag_matches, get_header, read_body
+from src.handlers.plot_catalog import apply_catalog_delta, catalog_city_data, read_catalog
+from src.handlers.plot_content import CONTENT_HASH_PATTERN
+from src.handlers.plot_bundle import split_bundle_ref
+
+# Upper bound on the page size API callers may request via `limit`
+MAX_SEARCH_LIMIT = 1000
+
+REQUIRED_PLOT_FIELDS = ['city', 'scenario', 'outcome', 'statistic_type', 'facet_choice', 's3_key']
 
 # Helper function to convert DynamoDB Decimal objects to regular numbers
 def decimal_default(obj):
@@ -11,6 +24,160 @@ def decimal_default(obj):
         return int(obj) if obj % 1 == 0 else float(obj)
     raise TypeError
 
+def _collect_city_scenarios(items):
+    """Reduce a stream of scan items to the set of distinct city_scenario keys"""
+    return {item['city_scenario'] for item in items}
+
+def _missing_plot_fields(record):
+    return [field for field in REQUIRED_PLOT_FIELDS if not record.get(field)]
+
+def _invalid_content_hash(record):
+    content_hash = record.get('content_hash')
+    return content_hash is not None and not (
+        isinstance(content_hash, str) and CONTENT_HASH_PATTERN.match(content_hash)
+    )
+
+def _is_unchanged(item, previous):
+    """True if a registration repeats the stored content hash and key, so nothing needs writing"""
+    return bool(
+        previous and item.get('content_hash') and
+        previous.get('content_hash') == item['content_hash'] and previous.get('s3_key') == item['s3_key']
+    )
+
+def _build_plot_item(record):
+    """Build the DynamoDB item for a validated plot registration record"""
+    item = {
+        'city_scenario': f"{record['city']}#{record['scenario']}",
+        'outcome_stat_facet': f"{record['outcome']}#{record['statistic_type']}#{record['facet_choice']}",
+        'outcome': record['outcome'],
+        'statistic_type': record['statistic_type'],
+        'facet_choice': record['facet_choice'],
+        # Sort key of the sparse stat_facet_outcome GSI used by search_plots
+        'stat_facet_outcome': f"{record['statistic_type']}#{record['facet_choice']}#{record['outcome']}",
+        's3_key': record['s3_key'],
+        'file_size': record.get('file_size', 0),
+        'created_at': record.get('created_at', '2025-06-10T20:00:00Z')
+    }
+    if record.get('content_hash'):
+        item['content_hash'] = record['content_hash']
+    ref = split_bundle_ref(record['s3_key'])
+    if ref:
+        # Plots packed into a bundle are read back with a ranged GET
+        item['bundle_offset'], item['bundle_length'] = ref[1], ref[2]
+    return item
+
+def _parse_list(value):
+    """Split a comma-separated query parameter into unique, non-empty values"""
+    values = []
+    for value in (value or '').split(','):
+        value = value.strip()
+        if value and value not in values:
+            values.append(value)
+    return values
+
+def _attribute_filter(**attributes):
+    """Build a FilterExpression requiring each named attribute to be in its list"""
+    condition = None
+    for name, values in attributes.items():
+        if not values:
+            continue
+        clause = Attr(name).is_in(values)
+        condition = clause if condition is None else condition & clause
+    return condition
+
+def _build_query_plan(partition_key, outcomes, statistics, facets):
+    """
+    Return a list of Query arguments that together cover the requested plots
+    
+    Key conditions do as much of the filtering as possible so DynamoDB only
+    reads matching rows:
+    - outcomes: one begins_with query per outcome on outcome_stat_facet
+      (extended with the statistic when exactly one is requested)
+    - statistic without outcomes: begins_with on the sparse stat_facet_outcome
+      GSI when DYNAMODB_STAT_FACET_INDEX is configured
+    - anything not expressible as a key prefix falls back to a FilterExpression
+    """
+    partition = Key('city_scenario').eq(partition_key)
+    
+    if outcomes:
+        plan = []
+        remaining_statistics = statistics if len(statistics) != 1 else []
+        for outcome in outcomes:
+            prefix = f"{outcome}#"
+            if len(statistics) == 1:
+                prefix += f"{statistics[0]}#"
+            query_args = {
+                'KeyConditionExpression': partition & Key('outcome_stat_facet').begins_with(prefix)
+            }
+            condition = _attribute_filter(statistic_type=remaining_statistics, facet_choice=facets)
+            if condition is not None:
+                query_args['FilterExpression'] = condition
+            plan.append(query_args)
+        return plan
+    
+    index_name = os.environ.get('DYNAMODB_STAT_FACET_INDEX')
+    if index_name and len(statistics) == 1:
+        prefix = f"{statistics[0]}#"
+        if len(facets) == 1:
+            prefix += f"{facets[0]}#"
+        query_args = {
+            'IndexName': index_name,
+            'KeyConditionExpression': partition & Key('stat_facet_outcome').begins_with(prefix)
+        }
+        if len(facets) > 1:
+            query_args['FilterExpression'] = _attribute_filter(facet_choice=facets)
+        return [query_args]
+    
+    query_args = {'KeyConditionExpression': partition}
+    condition = _attribute_filter(statistic_type=statistics, facet_choice=facets)
+    if condition is not None:
+        query_args['FilterExpression'] = condition
+    return [query_args]
+
+def _get_exact_plots(table, partition_key, outcomes, statistics, facets):
+    """Fetch fully specified outcome/statistic/facet combinations with BatchGetItem"""
+    keys = [
+        {'city_scenario': partition_key, 'outcome_stat_facet': f"{outcome}#{statistic}#{facet}"}
+        for outcome in outcomes
+        for statistic in statistics
+        for facet in facets
+    ]
+    items = batch_get_items(get_dynamodb_resource(), table.name, keys)
+    
+    # Return plots in request order, matching the query paths
+    order = {key['outcome_stat_facet']: i for i, key in enumerate(keys)}
+    return sorted(items, key=lambda item: order[item['outcome_stat_facet']])
+
+def _iter_plan_items(table, plan):
+    for query_args in plan:
+        yield from iter_items(table.query, **query_args)
+
+def _conditional_response(event, body, max_age_env, default_max_age):
+    """
+    Build a 200 response with a content-hash ETag, or a bodiless 304 when the
+    client's If-None-Match already names it
+    """
+    etag = content_etag(body)
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Methods': 'GET, OPTIONS',
+        'ETag': etag,
+        'Cache-Control': cache_control(max_age_env, default_max_age)
+    }
+    if etag_matches(get_header(event, 'If-None-Match'), etag):
+        return {
+            'statusCode': 304,
+            'headers': headers,
+            'body': ''
+        }
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': body
+    }
+
 def search_plots(event, context):
     """
     Lambda handler to search for available plots in DynamoDB
@@ -19,6 +186,19 @@ def search_plots(event, context):
     - city: The city code (e.g., "C.12580")
     - scenario: The scenario name (e.g., "cessation")
     - outcomes: Optional comma-separated list of outcomes to filter by
+    - statistic: Optional comma-separated list of statistic types to filter by
+    - facet: Optional comma-separated list of facet choices to filter by
+    - limit: Optional page size; when set the response includes next_token
+      if more plots are available
+    - next_token: Optional cursor returned by a previous paged request
+    
+    Without limit, all matching plots are returned across every DynamoDB page.
+    When outcomes, statistic and facet are all given, exactly those plots are
+    fetched with BatchGetItem. Paged requests that would need several queries
+    use a single filtered partition query so the cursor stays valid.
+    
+    The response carries a hash of its body as ETag (304 on a matching
+    If-None-Match) and Cache-Control max-age=SEARCH_MAX_AGE.
     """
     
     try:
@@ -26,7 +206,30 @@ def search_plots(event, context):
         query_params = event.get('queryStringParameters') or {}
         city = query_params.get('city')
         scenario = query_params.get('scenario')
-        outcomes_filter = query_params.get('outcomes')
+        outcomes = _parse_list(query_params.get('outcomes'))
+        statistics = _parse_list(query_params.get('statistic'))
+        facets = _parse_list(query_params.get('facet'))
+        limit = query_params.get('limit')
+        next_token = query_params.get('next_token')
+        
+        if limit is not None or next_token:
+            try:
+                limit = int(limit) if limit is not None else MAX_SEARCH_LIMIT
+                if limit < 1 or limit > MAX_SEARCH_LIMIT:
+                    raise ValueError
+            except ValueError:
+                return {
+                    'statusCode': 400,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Allow-Headers': 'Content-Type',
+                        'Access-Control-Allow-Methods': 'GET, OPTIONS'
+                    },
+                    'body': json.dumps({
+                        'error': f'limit must be an integer between 1 and {MAX_SEARCH_LIMIT}'
+                    })
+                }
         
         if not city or not scenario:
             return {
@@ -42,35 +245,43 @@ def search_plots(event, context):
                 })
             }
         
-        # Initialize DynamoDB client
-        dynamodb_endpoint = os.environ.get('DYNAMODB_ENDPOINT_URL')
-        
-        # Build client args conditionally
-        client_args = {'region_name': 'us-east-1'}
-        
-        # Only set endpoint_url if it's a valid URL (not empty string)
-        if dynamodb_endpoint and dynamodb_endpoint.strip():
-            client_args['endpoint_url'] = dynamodb_endpoint
-            
-        dynamodb = boto3.resource('dynamodb', **client_args)
-        
-        table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'jheem-plot-metadata')
-        table = dynamodb.Table(table_name)
+        # Reuse the container-wide DynamoDB connection pool
+        table = get_plot_table()
         
         # Query DynamoDB by partition key
         partition_key = f"{city}#{scenario}"
         
+        plan = _build_query_plan(partition_key, outcomes, statistics, facets)
+        
         try:
-            response = table.query(
-                KeyConditionExpression=Key('city_scenario').eq(partition_key)
-            )
-            
-            items = response['Items']
-            
-            # Filter by outcomes if specified
-            if outcomes_filter:
-                requested_outcomes = [outcome.strip() for outcome in outcomes_filter.split(',')]
-                items = [item for item in items if item.get('outcome') in requested_outcomes]
+            if limit is not None:
+                if len(plan) > 1:
+                    # Keep the statistic/facet plan's own filter and add the outcomes to it
+                    plan = _build_query_plan(partition_key, [], statistics, facets)
+                    condition = _attribute_filter(outcome=outcomes)
+                    if plan[0].get('FilterExpression') is not None:
+                        condition = plan[0]['FilterExpression'] & condition
+                    plan[0]['FilterExpression'] = condition
+                try:
+                    items, next_token = read_page(table.query, limit, next_token, **plan[0])
+                except ValueError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {
+                            'Content-Type': 'application/json',
+                            'Access-Control-Allow-Origin': '*',
+                            'Access-Control-Allow-Headers': 'Content-Type',
+                            'Access-Control-Allow-Methods': 'GET, OPTIONS'
+                        },
+                        'body': json.dumps({
+                            'error': str(e)
+                        })
+                    }
+            elif outcomes and statistics and facets:
+                items = _get_exact_plots(table, partition_key, outcomes, statistics, facets)
+            else:
+                # Stream every page rather than stopping at the first 1 MB response
+                items = _iter_plan_items(table, plan)
             
             # Format response
             plots = []
@@ -84,21 +295,14 @@ def search_plots(event, context):
                     'created_at': item.get('created_at')
                 })
             
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type',
-                    'Access-Control-Allow-Methods': 'GET, OPTIONS'
-                },
-                'body': json.dumps({
-                    'city': city,
-                    'scenario': scenario,
-                    'total_plots': len(plots),
-                    'plots': plots
-                }, default=decimal_default)
-            }
+            body = json.dumps({
+                'city': city,
+                'scenario': scenario,
+                'total_plots': len(plots),
+                'plots': plots,
+                'next_token': next_token if limit is not None else None
+            }, default=decimal_default)
+            return _conditional_response(event, body, 'SEARCH_MAX_AGE', 300)
             
         except ClientError as e:
             return {
@@ -141,14 +345,22 @@ def register_plot(event, context):
         "statistic_type": "mean.and.interval",
         "facet_choice": "sex",
         "s3_key": "plots/jheem_real_plot.json",
-        "file_size": 32768
+        "file_size": 32768,
+        "content_hash": "3fa9...e1"  (optional SHA-256 hex of the plot body)
     }
+    
+    The S3 object is not read here. Plots are tagged as validated by their
+    uploader or later by scripts/tag_validated_plots.py; until then get_plot
+    validates them when it serves them.
+    
+    With a content_hash, re-registering a plot whose stored hash and s3_key
+    are unchanged writes nothing and returns 200 with "unchanged": true.
     """
     
     try:
         # Parse request body
         try:
-            body = json.loads(event.get('body', '{}'))
+            body = json.loads(read_body(event))
         except json.JSONDecodeError:
             return {
                 'statusCode': 400,
@@ -164,8 +376,7 @@ def register_plot(event, context):
             }
         
         # Validate required fields
-        required_fields = ['city', 'scenario', 'outcome', 'statistic_type', 'facet_choice', 's3_key']
-        missing_fields = [field for field in required_fields if not body.get(field)]
+        missing_fields = _missing_plot_fields(body)
         
         if missing_fields:
             return {
@@ -181,39 +392,72 @@ def register_plot(event, context):
                 })
             }
         
-        # Initialize DynamoDB client
-        dynamodb_endpoint = os.environ.get('DYNAMODB_ENDPOINT_URL')
-        
-        # Build client args conditionally
-        client_args = {'region_name': 'us-east-1'}
-        
-        # Only set endpoint_url if it's a valid URL (not empty string)
-        if dynamodb_endpoint and dynamodb_endpoint.strip():
-            client_args['endpoint_url'] = dynamodb_endpoint
-            
-        dynamodb = boto3.resource('dynamodb', **client_args)
+        if _invalid_content_hash(body):
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Access-Control-Allow-Methods': 'POST, OPTIONS'
+                },
+                'body': json.dumps({
+                    'error': 'content_hash must be a lowercase hex SHA-256 digest'
+                })
+            }
         
-        table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'jheem-plot-metadata')
-        table = dynamodb.Table(table_name)
+        # Reuse the container-wide DynamoDB connection pool
+        table = get_plot_table()
         
         # Prepare item for insertion
-        city_scenario = f"{body['city']}#{body['scenario']}"
-        outcome_stat_facet = f"{body['outcome']}#{body['statistic_type']}#{body['facet_choice']}"
-        
-        item = {
-            'city_scenario': city_scenario,
-            'outcome_stat_facet': outcome_stat_facet,
-            'outcome': body['outcome'],
-            'statistic_type': body['statistic_type'],
-            'facet_choice': body['facet_choice'],
-            's3_key': body['s3_key'],
-            'file_size': body.get('file_size', 0),
-            'created_at': body.get('created_at', '2025-06-10T20:00:00Z')
-        }
+        item = _build_plot_item(body)
+        city_scenario = item['city_scenario']
+        outcome_stat_facet = item['outcome_stat_facet']
         
         try:
-            # Insert item into DynamoDB
-            table.put_item(Item=item)
+            # Insert item into DynamoDB, keeping the previous version (if any)
+            # so the catalog index is only adjusted by the net change. A
+            # content-hashed plot is only written if its hash or key changed.
+            put_args = {'Item': item, 'ReturnValues': 'ALL_OLD'}
+            if item.get('content_hash'):
+                put_args['ConditionExpression'] = (
+                    Attr('content_hash').not_exists() | Attr('content_hash').ne(item['content_hash']) |
+                    Attr('s3_key').ne(item['s3_key'])
+                )
+            try:
+                response = table.put_item(**put_args)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Allow-Headers': 'Content-Type',
+                        'Access-Control-Allow-Methods': 'POST, OPTIONS'
+                    },
+                    'body': json.dumps({
+                        'message': 'Plot unchanged',
+                        'city_scenario': city_scenario,
+                        'outcome_stat_facet': outcome_stat_facet,
+                        's3_key': body['s3_key'],
+                        'unchanged': True
+                    })
+                }
+            previous = response.get('Attributes')
+            
+            # The index is derived data; a failed update is repaired by
+            # scripts/rebuild_catalog_index.py rather than failing registration
+            try:
+                apply_catalog_delta(
+                    table,
+                    city_scenario,
+                    0 if previous else 1,
+                    int(item['file_size'] or 0) - int((previous or {}).get('file_size') or 0)
+                )
+            except ClientError as e:
+                print(f"Warning: catalog index update failed for {city_scenario}: {str(e)}")
             
             return {
                 'statusCode': 201,
@@ -227,7 +471,8 @@ def register_plot(event, context):
                     'message': 'Plot registered successfully',
                     'city_scenario': city_scenario,
                     'outcome_stat_facet': outcome_stat_facet,
-                    's3_key': body['s3_key']
+                    's3_key': body['s3_key'],
+                    'unchanged': False
                 })
             }
             
@@ -260,6 +505,225 @@ def register_plot(event, context):
         }
 
 
+def _validate_batch_record(record):
+    """Return an error message for an invalid batch record, or None"""
+    if not isinstance(record, dict):
+        return 'Plot record must be a JSON object'
+    
+    missing_fields = _missing_plot_fields(record)
+    if missing_fields:
+        return f'Missing required fields: {", ".join(missing_fields)}'
+    
+    file_size = record.get('file_size', 0)
+    if isinstance(file_size, bool) or not isinstance(file_size, int) or file_size < 0:
+        return 'file_size must be a non-negative integer'
+    
+    if _invalid_content_hash(record):
+        return 'content_hash must be a lowercase hex SHA-256 digest'
+    
+    return None
+
+def _write_plot_chunk(items):
+    """Write one BatchWriteItem chunk; returns {(pk, sk): error} for items that were not written"""
+    table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'jheem-plot-metadata')
+    unprocessed, error = batch_put_chunk(get_dynamodb_resource(), table_name, items)
+    message = f'DynamoDB error: {str(error)}' if error else 'Unprocessed after retries (throttled)'
+    return {
+        (item['city_scenario'], item['outcome_stat_facet']): message
+        for item in unprocessed
+    }
+
+def register_plots_batch(event, context):
+    """
+    Lambda handler to register many plots in DynamoDB in one request
+    
+    Expected JSON body:
+    {
+        "plots": [
+            {
+                "city": "C.12580",
+                "scenario": "cessation",
+                "outcome": "incidence",
+                "statistic_type": "mean.and.interval",
+                "facet_choice": "sex",
+                "s3_key": "plots/jheem_real_plot.json",
+                "file_size": 32768,
+                "content_hash": "3fa9...e1"  (optional)
+            },
+            ...
+        ]
+    }
+    
+    Records are validated individually and written 25 at a time with
+    BatchWriteItem; unprocessed items are retried with exponential backoff.
+    Records whose content_hash and s3_key match the stored item are not
+    written. As in register_plot, the S3 objects are not read here.
+    
+    At most MAX_BATCH_REGISTER_PLOTS (default 500) records are accepted. The
+    response lists a status for every record, in request order: "registered",
+    "unchanged", "invalid" or "failed". Returns 201 when every record was
+    registered or unchanged and 207 when only some were.
+    """
+    
+    try:
+        # Parse request body
+        try:
+            body = json.loads(read_body(event))
+        except json.JSONDecodeError:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Access-Control-Allow-Methods': 'POST, OPTIONS'
+                },
+                'body': json.dumps({
+                    'error': 'Invalid JSON in request body'
+                })
+            }
+        
+        records = body.get('plots') if isinstance(body, dict) else None
+        # 500 records are 20 BatchWriteItem chunks, 3 rounds over 8 workers;
+        # even with every chunk retried through its full backoff (about 7 s)
+        # the request stays inside API Gateway's 29 s limit
+        max_plots = int(os.environ.get('MAX_BATCH_REGISTER_PLOTS', '500'))
+        
+        if not isinstance(records, list) or not records or len(records) > max_plots:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Access-Control-Allow-Methods': 'POST, OPTIONS'
+                },
+                'body': json.dumps({
+                    'error': f'Request body must contain a "plots" list of 1 to {max_plots} records'
+                })
+            }
+        
+        # Validate every record; BatchWriteItem rejects a request that repeats
+        # a key, so a repeated plot is reported against its later occurrence
+        results = []
+        items_by_key = {}
+        for index, record in enumerate(records):
+            error = _validate_batch_record(record)
+            item = None
+            if error is None:
+                item = _build_plot_item(record)
+                key = (item['city_scenario'], item['outcome_stat_facet'])
+                if key in items_by_key:
+                    error = f'Duplicate of plot at index {items_by_key[key][0]}'
+                else:
+                    items_by_key[key] = (index, item)
+            
+            results.append({
+                'index': index,
+                'status': 'invalid' if error else 'pending',
+                'city_scenario': item['city_scenario'] if item else None,
+                'outcome_stat_facet': item['outcome_stat_facet'] if item else None,
+                'error': error
+            })
+        
+        if items_by_key:
+            table = get_plot_table()
+            
+            # Read the current versions so the catalog index gets net changes
+            # and unchanged content-hashed plots can be skipped
+            previous_items = {
+                (previous['city_scenario'], previous['outcome_stat_facet']): previous
+                for previous in batch_get_items(
+                    get_dynamodb_resource(),
+                    table.name,
+                    [{'city_scenario': pk, 'outcome_stat_facet': sk} for pk, sk in items_by_key],
+                    ProjectionExpression='city_scenario, outcome_stat_facet, file_size, s3_key, content_hash'
+                )
+            }
+            existing = {key: int(previous.get('file_size') or 0) for key, previous in previous_items.items()}
+            
+            for key, (index, item) in list(items_by_key.items()):
+                if _is_unchanged(item, previous_items.get(key)):
+                    results[index]['status'] = 'unchanged'
+                    del items_by_key[key]
+            items = [item for _, item in items_by_key.values()]
+            
+            # Write 25-item chunks concurrently over the pooled connections
+            chunks = [items[start:start + 25] for start in range(0, len(items), 25)]
+            failures = {}
+            max_workers = int(os.environ.get('BATCH_REGISTER_WORKERS', '8'))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for chunk_failures in executor.map(_write_plot_chunk, chunks):
+                    failures.update(chunk_failures)
+            
+            catalog_deltas = defaultdict(lambda: [0, 0])
+            for key, (index, item) in items_by_key.items():
+                if key in failures:
+                    results[index]['status'] = 'failed'
+                    results[index]['error'] = failures[key]
+                    continue
+                
+                results[index]['status'] = 'registered'
+                delta = catalog_deltas[item['city_scenario']]
+                delta[0] += 0 if key in existing else 1
+                delta[1] += int(item['file_size'] or 0) - existing.get(key, 0)
+            
+            # Only written items reach catalog_deltas. The index is derived
+            # data; a failed update is repaired by
+            # scripts/rebuild_catalog_index.py rather than failing registration
+            for city_scenario, (count_delta, bytes_delta) in catalog_deltas.items():
+                try:
+                    apply_catalog_delta(table, city_scenario, count_delta, bytes_delta)
+                except ClientError as e:
+                    print(f"Warning: catalog index update failed for {city_scenario}: {str(e)}")
+        
+        registered = sum(1 for result in results if result['status'] == 'registered')
+        unchanged = sum(1 for result in results if result['status'] == 'unchanged')
+        invalid = sum(1 for result in results if result['status'] == 'invalid')
+        failed = len(results) - registered - unchanged - invalid
+        
+        if registered + unchanged == len(results):
+            status_code = 201
+        elif registered or unchanged:
+            status_code = 207
+        elif failed:
+            status_code = 500
+        else:
+            status_code = 400
+        
+        return {
+            'statusCode': status_code,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Methods': 'POST, OPTIONS'
+            },
+            'body': json.dumps({
+                'message': f'Registered {registered} of {len(results)} plots',
+                'registered': registered,
+                'unchanged': unchanged,
+                'invalid': invalid,
+                'failed': failed,
+                'results': results
+            })
+        }
+        
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Methods': 'POST, OPTIONS'
+            },
+            'body': json.dumps({
+                'error': f'Internal server error: {str(e)}'
+            })
+        }
+
+
 def get_all_available_cities(event, context):
     """
     Lambda handler to get all cities that have plot data available
@@ -271,61 +735,57 @@ def get_all_available_cities(event, context):
             "C.12580": ["cessation", "brief_interruption"],
             "C.12940": ["cessation"]
         },
-        "total_cities": 2
+        "total_cities": 2,
+        "last_updated": "2025-06-10T20:00:00Z"
     }
+    
+    Reads the per-partition catalog counters maintained by plot registration
+    (one Query per CATALOG_SHARDS shard). If the index has not been built
+    yet, falls back to scanning the table as CATALOG_SCAN_SEGMENTS parallel
+    segments (default 4).
+    
+    Like search_plots, the response is hashed into an ETag for conditional
+    requests and cached for CITIES_MAX_AGE seconds.
     """
     
     try:
-        # Initialize DynamoDB client
-        dynamodb_endpoint = os.environ.get('DYNAMODB_ENDPOINT_URL')
-        
-        # Build client args conditionally
-        client_args = {'region_name': 'us-east-1'}
-        
-        # Only set endpoint_url if it's a valid URL (not empty string)
-        if dynamodb_endpoint and dynamodb_endpoint.strip():
-            client_args['endpoint_url'] = dynamodb_endpoint
+        catalog = read_catalog(get_plot_table())
+        if catalog is not None:
+            city_data = catalog_city_data(catalog.get('partitions', {}))
             
-        dynamodb = boto3.resource('dynamodb', **client_args)
-        
-        table_name = os.environ.get('DYNAMODB_TABLE_NAME', 'jheem-plot-metadata')
-        table = dynamodb.Table(table_name)
+            body = json.dumps({
+                'cities': city_data,
+                'total_cities': len(city_data),
+                'last_updated': catalog.get('last_updated')
+            }, default=decimal_default)
+            return _conditional_response(event, body, 'CITIES_MAX_AGE', 300)
         
-        # Single scan to get all city_scenario combinations
-        response = table.scan(
+        # Segmented parallel scan; each segment reduces its pages to a set of
+        # distinct city_scenario keys, so dedup is O(1) per item
+        total_segments = int(os.environ.get('CATALOG_SCAN_SEGMENTS', '4'))
+        segment_results = parallel_scan(
+            get_plot_table,
+            total_segments,
+            _collect_city_scenarios,
             ProjectionExpression='city_scenario'
         )
         
         # Process data to group by city
-        city_data = {}
-        for item in response['Items']:
-            city_scenario = item['city_scenario']
+        city_scenarios = {}
+        for city_scenario in set().union(*segment_results):
             if '#' in city_scenario:
                 city, scenario = city_scenario.split('#', 1)
-                
-                if city not in city_data:
-                    city_data[city] = []
-                
-                if scenario not in city_data[city]:
-                    city_data[city].append(scenario)
+                city_scenarios.setdefault(city, set()).add(scenario)
         
-        # Sort scenarios for consistency
-        for city in city_data:
-            city_data[city].sort()
+        # Sort cities and scenarios for consistency
+        city_data = {city: sorted(city_scenarios[city]) for city in sorted(city_scenarios)}
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS'
-            },
-            'body': json.dumps({
-                'cities': city_data,
-                'total_cities': len(city_data)
-            }, default=decimal_default)
-        }
+        body = json.dumps({
+            'cities': city_data,
+            'total_cities': len(city_data),
+            'last_updated': None
+        }, default=decimal_default)
+        return _conditional_response(event, body, 'CITIES_MAX_AGE', 300)
         
     except Exception as e:
         return {
@@ -1,25 +1,331 @@
 import json
-import boto3
 import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 from botocore.exceptions import ClientError
 
+from src.handlers.aws_clients import get_dynamodb_resource, get_plot_table, get_s3_client
+from src.handlers.dynamodb_pagination import batch_get_items
+from src.handlers.http_utils import (
+    binary_body, cache_control, compress_body, emit_metrics, etag_matches, get_header, http_date,
+    negotiate_encoding, parse_etags, read_body
+)
+from src.handlers.plot_bundle import bundle_etag, byte_range, member_etag, split_bundle_ref
+from src.handlers.plot_cache import plot_cache
+from src.handlers.plot_validation import is_tagged_valid, validate_plot_bytes
+
+DELIVERY_MODES = ('proxy', 'redirect', 'url')
+
+class PlotTooLarge(Exception):
+    """Raised by fetch_plot when an object exceeds the caller's size limit"""
+    
+    def __init__(self, size):
+        super().__init__(f'Plot is {size} bytes')
+        self.size = size
+
+class NotModified(Exception):
+    """Raised by fetch_plot when the caller's If-None-Match ETag is current"""
+    
+    def __init__(self, etag, last_modified):
+        super().__init__(f'Not modified: {etag}')
+        self.etag = etag
+        self.last_modified = last_modified
+
+def _is_not_modified(error):
+    return error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304
+
+def fetch_plot(s3_client, bucket_name, plot_key, validate=True, missing_ok=False, size_limit=None,
+               if_none_match=None):
+    """
+    Return (raw_bytes, etag, last_modified, cache_status) for a plot object,
+    using the container cache when possible
+    
+    cache_status is 'hit' (served from memory), 'revalidated' (S3 confirmed
+    the cached ETag is current) or 'miss' (body fetched from S3).
+    
+    With missing_ok, a missing object returns None instead of raising, and the
+    absence is cached too so optional variants (e.g. .json.gz) do not cost a
+    failed GET on every request.
+    
+    With size_limit, PlotTooLarge is raised as soon as the object's length is
+    known (from the cache or the GetObject headers), before the body is read.
+    
+    With if_none_match (an S3 ETag the client already holds), NotModified is
+    raised when it is still current; S3 answers that check with a 304 and no
+    body, so the object is never read.
+    
+    A bundle reference ("<bundle key>#<offset>+<length>", see plot_bundle)
+    is read with a ranged GET of just that plot's bytes, and its ETag is the
+    bundle's ETag qualified by the member's position.
+    
+    Entries are cached per bucket, since the summary and plot buckets use
+    overlapping key layouts.
+    """
+    cache_key = f"{bucket_name}/{plot_key}"
+    entry, is_fresh = plot_cache.get(cache_key)
+    
+    if size_limit is not None and entry is not None and entry.body is not None and entry.size > size_limit:
+        raise PlotTooLarge(entry.size)
+    
+    if entry is not None and is_fresh:
+        plot_cache.record('hit')
+        if entry.body is None:
+            return None
+        if if_none_match and if_none_match == entry.etag:
+            raise NotModified(entry.etag, entry.last_modified)
+        return entry.body, entry.etag, entry.last_modified, 'hit'
+    
+    ref = split_bundle_ref(plot_key)
+    request = {'Bucket': bucket_name, 'Key': plot_key}
+    if ref:
+        request.update({'Key': ref[0], 'Range': byte_range(ref[1], ref[2])})
+    known_etag = if_none_match or (entry.etag if entry is not None else None)
+    if known_etag:
+        # S3 only knows the bundle's ETag, not the per-member one
+        s3_etag = bundle_etag(known_etag, ref[1], ref[2]) if ref else known_etag
+        if s3_etag:
+            request['IfNoneMatch'] = s3_etag
+    
+    try:
+        response = s3_client.get_object(**request)
+    except ClientError as e:
+        if _is_not_modified(e):
+            confirmed_etag = known_etag
+            if entry is not None and entry.etag == confirmed_etag:
+                plot_cache.mark_fresh(cache_key)
+                plot_cache.record('revalidated')
+                if not if_none_match:
+                    return entry.body, entry.etag, entry.last_modified, 'revalidated'
+            headers = e.response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+            raise NotModified(confirmed_etag, headers.get('last-modified'))
+        if missing_ok and e.response['Error']['Code'] == 'NoSuchKey':
+            plot_cache.put(cache_key, None, None, None, 0)
+            plot_cache.record('miss')
+            return None
+        raise
+    
+    if size_limit is not None and response.get('ContentLength', 0) > size_limit:
+        response['Body'].close()
+        raise PlotTooLarge(response['ContentLength'])
+    
+    raw = response['Body'].read()
+    
+    # Objects tagged at upload/registration are passed through untouched;
+    # only untagged ones pay for a full parse
+    if validate and not is_tagged_valid(response.get('Metadata')):
+        validate_plot_bytes(raw)
+    
+    etag = response.get('ETag')
+    if ref:
+        etag = member_etag(etag, ref[1], ref[2])
+    last_modified = response.get('LastModified')
+    plot_cache.put(cache_key, raw, etag, last_modified, len(raw))
+    plot_cache.record('miss')
+    return raw, etag, last_modified, 'miss'
+
+def _representation_etag(etag, encoding):
+    """
+    Entity tag for the representation actually sent
+    
+    Compressed and uncompressed bodies are different representations, so the
+    encoding is folded into the tag ("abc" -> "abc-gzip").
+    """
+    if not encoding or not etag:
+        return etag
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f'{etag}-{encoding}'
+
+def _client_etag(if_none_match, encoding):
+    """
+    Return the S3 ETag behind the client's If-None-Match for this
+    representation, or None if the client holds no matching representation
+    """
+    suffix = f'-{encoding}"' if encoding else None
+    for tag in parse_etags(if_none_match):
+        if not tag.endswith('"'):
+            continue
+        if suffix:
+            if tag.endswith(suffix):
+                return tag[:-len(suffix)] + '"'
+        elif not tag.endswith(('-gzip"', '-br"')):
+            return tag
+    return None
+
+def _not_modified_response(etag, last_modified):
+    """304 for a plot representation the client already holds"""
+    headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Methods': 'GET, OPTIONS',
+        'Vary': 'Accept-Encoding',
+        'ETag': etag,
+        'Cache-Control': cache_control('PLOT_MAX_AGE', 86400)
+    }
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified)
+    return {
+        'statusCode': 304,
+        'headers': headers,
+        'body': ''
+    }
+
+def encode_plot(plot_key, raw, etag, encoding):
+    """
+    Compress a plot body for the negotiated encoding, caching the result
+    against the source ETag so hot plots are compressed once per container
+    """
+    variant_key = f"{plot_key}|{encoding}"
+    entry, _ = plot_cache.get(variant_key)
+    if entry is not None and entry.etag == etag:
+        return entry.body
+    
+    compressed = compress_body(raw, encoding)
+    plot_cache.put(variant_key, compressed, etag, None, len(compressed))
+    return compressed
+
+def _lookup_plot_record(query_params):
+    """
+    Resolve city/scenario/outcome/statistic/facet parameters to the plot's
+    metadata record, or None if any are missing or no plot is registered
+    """
+    fields = [query_params.get(name) for name in ('city', 'scenario', 'outcome', 'statistic', 'facet')]
+    if not all(fields):
+        return None
+    
+    city, scenario, outcome, statistic, facet = fields
+    response = get_plot_table().get_item(
+        Key={
+            'city_scenario': f"{city}#{scenario}",
+            'outcome_stat_facet': f"{outcome}#{statistic}#{facet}"
+        },
+        ProjectionExpression='s3_key, file_size'
+    )
+    return response.get('Item')
+
+def _plot_link_response(s3_client, bucket_name, plot_key, file_size, delivery):
+    """Point the client at the object instead of proxying it through Lambda"""
+    expires_in = int(os.environ.get('PRESIGNED_URL_TTL_SECONDS', '300'))
+    cdn_base_url = os.environ.get('PLOT_CDN_BASE_URL', '').strip()
+    
+    if cdn_base_url:
+        url = f"{cdn_base_url.rstrip('/')}/{quote(plot_key)}"
+    else:
+        url = s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket_name, 'Key': plot_key},
+            ExpiresIn=expires_in
+        )
+    
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Methods': 'GET, OPTIONS',
+        # The presigned URL expires, so the pointer itself must not be cached
+        'Cache-Control': 'no-store'
+    }
+    
+    if delivery == 'redirect':
+        headers['Location'] = url
+        return {
+            'statusCode': 302,
+            'headers': headers,
+            'body': ''
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({
+            'plotKey': plot_key,
+            'url': url,
+            'expires_in': None if cdn_base_url else expires_in,
+            'file_size': file_size
+        })
+    }
+
 def get_plot(event, context):
     """
     Lambda handler to retrieve prerun plot JSON from S3
     
     Expected query parameters:
-    - plotKey: The key/path to the plot file in S3
+    - plotKey: The key/path to the plot file in S3, or instead
+    - city, scenario, outcome, statistic, facet: resolved to the plot through
+      the metadata table (which also supplies its file_size)
+    - delivery: Optional "proxy", "redirect" or "url" (default LARGE_PLOT_MODE)
+    
+    In redirect/url mode, plots larger than LARGE_PLOT_THRESHOLD_BYTES are not
+    proxied: the handler returns a 302 or a JSON {url, expires_in} pointing at
+    a short-lived presigned S3 URL (or PLOT_CDN_BASE_URL when set). Size comes
+    from the metadata record when available, otherwise from the GetObject
+    headers before the body is read, so no HEAD request is needed.
+    
+    Plot objects are immutable once generated, so bodies are kept in a
+    per-container LRU cache (PLOT_CACHE_MAX_BYTES, PLOT_CACHE_TTL_SECONDS) and
+    revalidated against S3 by ETag once their TTL expires. The X-Cache
+    response header reports Hit, RefreshHit or Miss.
+    
+    Responses honour Accept-Encoding. For gzip, a pre-compressed
+    "<plotKey>.gz" object is served when one exists; otherwise bodies of at
+    least COMPRESSION_MIN_BYTES are compressed on the fly (brotli when the
+    package is installed and accepted, else gzip) and returned base64 encoded
+    with isBase64Encoded. Response sizes are logged as CloudWatch EMF metrics.
+    
+    A plot registered inside a bundle (s3_key "<bundle>#<offset>+<length>")
+    is read with a ranged GET and always proxied: the presigned link and
+    pre-compressed variants only exist for standalone objects.
+    
+    The S3 ETag (suffixed with the content coding for compressed bodies) and
+    Last-Modified are forwarded with Cache-Control max-age=PLOT_MAX_AGE. An
+    If-None-Match naming the current ETag gets a 304; the check is a
+    conditional GetObject, so the body is never read. If-None-Match: * also
+    gets a 304 for any existing plot.
     """
     
     try:
         # Parse query parameters
         query_params = event.get('queryStringParameters') or {}
         plot_key = query_params.get('plotKey')
+        delivery = (query_params.get('delivery') or os.environ.get('LARGE_PLOT_MODE', 'proxy')).lower()
         
         # Fix: Convert metadata file paths to actual plot file paths
         if plot_key and plot_key.endswith('_metadata.json'):
             plot_key = plot_key.replace('_metadata.json', '.json')
         
+        if delivery not in DELIVERY_MODES:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Access-Control-Allow-Methods': 'GET, OPTIONS'
+                },
+                'body': json.dumps({
+                    'error': f'delivery must be one of: {", ".join(DELIVERY_MODES)}'
+                })
+            }
+        
+        # Without a plotKey, resolve the plot through its metadata record
+        file_size = None
+        if not plot_key and query_params.get('city'):
+            record = _lookup_plot_record(query_params)
+            if record is not None:
+                plot_key = record.get('s3_key')
+                file_size = int(record['file_size']) if record.get('file_size') else None
+            elif all(query_params.get(name) for name in ('scenario', 'outcome', 'statistic', 'facet')):
+                return {
+                    'statusCode': 404,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Allow-Headers': 'Content-Type',
+                        'Access-Control-Allow-Methods': 'GET, OPTIONS'
+                    },
+                    'body': json.dumps({
+                        'error': 'No plot registered for the requested city/scenario/outcome/statistic/facet'
+                    })
+                }
+        
         if not plot_key:
             return {
                 'statusCode': 400,
@@ -30,40 +336,124 @@ def get_plot(event, context):
                     'Access-Control-Allow-Methods': 'GET, OPTIONS'
                 },
                 'body': json.dumps({
-                    'error': 'Missing plotKey parameter'
+                    'error': 'Missing plotKey parameter (or a registered city/scenario/outcome/statistic/facet)'
                 })
             }
         
-        # Initialize S3 client
-        s3_endpoint = os.environ.get('S3_ENDPOINT_URL')
+        # Reuse the container-wide S3 connection pool
         bucket_name = os.environ.get('S3_BUCKET_NAME', 'prerun-plots-bucket-local')
+        s3_client = get_s3_client()
         
-        # Build client args conditionally
-        client_args = {'region_name': 'us-east-1'}
-        
-        # Only set endpoint_url if it's a valid URL (not empty string)
-        if s3_endpoint and s3_endpoint.strip():
-            client_args['endpoint_url'] = s3_endpoint
-            
-        s3_client = boto3.client('s3', **client_args)
+        threshold = int(os.environ.get('LARGE_PLOT_THRESHOLD_BYTES', str(4 * 1024 * 1024)))
+        bundled = split_bundle_ref(plot_key) is not None
+        size_limit = threshold if delivery != 'proxy' and not bundled else None
+        if size_limit is not None and file_size is not None and file_size > size_limit:
+            return _plot_link_response(s3_client, bucket_name, plot_key, file_size, delivery)
         
         # Retrieve the plot JSON from S3
         try:
-            response = s3_client.get_object(Bucket=bucket_name, Key=plot_key)
-            plot_data = response['Body'].read().decode('utf-8')
+            encoding = negotiate_encoding(get_header(event, 'Accept-Encoding'))
+            if_none_match = get_header(event, 'If-None-Match')
+            
+            try:
+                # Prefer an object compressed at generation time
+                plot_object = None
+                source = 'compressed_on_the_fly'
+                if (encoding == 'gzip' and not bundled
+                        and os.environ.get('PRECOMPRESSED_PLOTS', 'true').lower() != 'false'):
+                    try:
+                        plot_object = fetch_plot(
+                            s3_client, bucket_name, f"{plot_key}.gz",
+                            validate=False, missing_ok=True, size_limit=size_limit,
+                            if_none_match=_client_etag(if_none_match, 'gzip')
+                        )
+                    except PlotTooLarge as e:
+                        return _plot_link_response(s3_client, bucket_name, plot_key, e.size, delivery)
+                    if plot_object is not None:
+                        source = 'precompressed'
+                
+                if plot_object is not None:
+                    body_bytes, etag, last_modified, cache_status = plot_object
+                    uncompressed_size = None
+                else:
+                    # Small bodies are sent uncompressed, so a client may
+                    # hold the identity representation even when it accepts
+                    # compression
+                    min_bytes = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+                    if encoding and file_size is not None and file_size < min_bytes:
+                        encoding = None
+                    negotiated = encoding
+                    client_etag = _client_etag(if_none_match, encoding)
+                    if client_etag is None and encoding:
+                        client_etag = _client_etag(if_none_match, None)
+                        if client_etag is not None:
+                            encoding = None
+                    try:
+                        raw, etag, last_modified, cache_status = fetch_plot(
+                            s3_client, bucket_name, plot_key, size_limit=size_limit,
+                            if_none_match=client_etag
+                        )
+                    except PlotTooLarge as e:
+                        return _plot_link_response(s3_client, bucket_name, plot_key, e.size, delivery)
+                    encoding = negotiated
+                    uncompressed_size = len(raw)
+                    if encoding and uncompressed_size < min_bytes:
+                        encoding = None
+                    if encoding:
+                        body_bytes = encode_plot(plot_key, raw, etag, encoding)
+                    else:
+                        body_bytes = raw
+                        source = 'identity'
+            
+            except NotModified as e:
+                return _not_modified_response(_representation_etag(e.etag, encoding), e.last_modified)
+            
+            # "*" (any current representation) is not an S3 ETag, so it is
+            # matched here, as etag_matches does for the other endpoints
+            if etag and etag_matches(if_none_match, _representation_etag(etag, encoding)):
+                return _not_modified_response(_representation_etag(etag, encoding), last_modified)
+            
+            metrics = {
+                'ResponseBytes': (len(body_bytes), 'Bytes'),
+                'CacheHit': (0 if cache_status == 'miss' else 1, 'Count')
+            }
+            if uncompressed_size is not None:
+                metrics['UncompressedBytes'] = (uncompressed_size, 'Bytes')
+            emit_metrics(
+                'JHEEM/PlotRetrieval',
+                {'Encoding': encoding or 'identity'},
+                metrics,
+                {'plotKey': plot_key, 'source': source, 'cache': dict(plot_cache.stats(), status=cache_status)}
+            )
+            
+            headers = {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Methods': 'GET, OPTIONS',
+                'Vary': 'Accept-Encoding',
+                'X-Cache': {'hit': 'Hit', 'revalidated': 'RefreshHit', 'miss': 'Miss'}[cache_status],
+                # Plot objects are immutable once generated
+                'Cache-Control': cache_control('PLOT_MAX_AGE', 86400)
+            }
+            if etag:
+                headers['ETag'] = _representation_etag(etag, encoding)
+            if last_modified:
+                headers['Last-Modified'] = http_date(last_modified)
             
-            # Try to parse as JSON to validate
-            json.loads(plot_data)
+            if encoding:
+                headers['Content-Encoding'] = encoding
+                return {
+                    'statusCode': 200,
+                    'headers': headers,
+                    'body': binary_body(body_bytes),
+                    'isBase64Encoded': True
+                }
             
             return {
                 'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type',
-                    'Access-Control-Allow-Methods': 'GET, OPTIONS'
-                },
-                'body': plot_data
+                'headers': headers,
+                'body': body_bytes.decode('utf-8')
             }
             
         except ClientError as e:
@@ -97,3 +487,265 @@ def get_plot(event, context):
                 'error': f'Internal server error: {str(e)}'
             })
         }
+
+
+def _fetch_for_bulk(s3_client, bucket_name, plot_key):
+    """Fetch one plot for get_plots_bulk; returns (plot_key, raw_bytes, error)"""
+    try:
+        raw, _, _, _ = fetch_plot(s3_client, bucket_name, plot_key)
+        return plot_key, raw, None
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'NoSuchKey':
+            return plot_key, None, 'Plot not found'
+        return plot_key, None, f'S3 error: {str(e)}'
+    except ValueError as e:
+        return plot_key, None, f'Invalid plot JSON: {str(e)}'
+
+def get_plots_bulk(event, context):
+    """
+    Lambda handler to retrieve several plots in one request
+    
+    Expected JSON body (either or both lists):
+    {
+        "plotKeys": ["plots/a.json", "plots/b.json"],
+        "plots": [
+            {"city": "C.12580", "scenario": "cessation", "outcome": "incidence",
+             "statistic": "mean.and.interval", "facet": "sex"}
+        ]
+    }
+    
+    Tuples are resolved to plot keys through the metadata table with
+    BatchGetItem, then all plots are fetched concurrently (BULK_FETCH_WORKERS
+    threads) through the same cache and validation as get_plot. The combined
+    response embeds each plot's JSON unchanged:
+    {
+        "plots": {"plots/a.json": {...}},
+        "resolved": {"C.12580/cessation/incidence/mean.and.interval/sex": "plots/a.json"},
+        "errors": {"plots/b.json": "Plot not found"}
+    }
+    and is compressed when the client sends Accept-Encoding.
+    
+    Plots are fetched BULK_FETCH_WORKERS at a time against a running size
+    total (registered file_size is checked before fetching), so a request
+    that would exceed the MAX_RESPONSE_BYTES response limit stops early.
+    Plots that did not fit are listed, in request order, under
+    "continuation" for a follow-up {"plotKeys": continuation} request; a
+    plot too large for any response is reported in "errors".
+    """
+    
+    try:
+        # Parse request body
+        try:
+            body = json.loads(read_body(event))
+        except json.JSONDecodeError:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Access-Control-Allow-Methods': 'POST, OPTIONS'
+                },
+                'body': json.dumps({
+                    'error': 'Invalid JSON in request body'
+                })
+            }
+        
+        body = body if isinstance(body, dict) else {}
+        plot_keys = [key for key in (body.get('plotKeys') or []) if isinstance(key, str) and key]
+        tuples = [plot for plot in (body.get('plots') or []) if isinstance(plot, dict)]
+        max_plots = int(os.environ.get('BULK_MAX_PLOTS', '50'))
+        
+        if (not plot_keys and not tuples) or len(plot_keys) + len(tuples) > max_plots:
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Access-Control-Allow-Methods': 'POST, OPTIONS'
+                },
+                'body': json.dumps({
+                    'error': f'Request must list between 1 and {max_plots} plotKeys/plots'
+                })
+            }
+        
+        errors = {}
+        resolved = {}
+        known_sizes = {}
+        
+        # Resolve city/scenario/outcome/statistic/facet tuples to plot keys
+        if tuples:
+            tuple_fields = ('city', 'scenario', 'outcome', 'statistic', 'facet')
+            keys_by_id = {}
+            for plot in tuples:
+                values = [plot.get(name) for name in tuple_fields]
+                plot_id = '/'.join(str(value) for value in values)
+                if not all(isinstance(value, str) and value for value in values):
+                    errors[plot_id] = f'Missing required fields: {", ".join(tuple_fields)}'
+                    continue
+                city, scenario, outcome, statistic, facet = values
+                keys_by_id[plot_id] = {
+                    'city_scenario': f"{city}#{scenario}",
+                    'outcome_stat_facet': f"{outcome}#{statistic}#{facet}"
+                }
+            
+            table = get_plot_table()
+            records = batch_get_items(
+                get_dynamodb_resource(),
+                table.name,
+                list({(key['city_scenario'], key['outcome_stat_facet']): key for key in keys_by_id.values()}.values()),
+                ProjectionExpression='city_scenario, outcome_stat_facet, s3_key, file_size'
+            )
+            s3_keys = {(record['city_scenario'], record['outcome_stat_facet']): record['s3_key'] for record in records}
+            known_sizes.update(
+                (record['s3_key'], int(record['file_size'])) for record in records if record.get('file_size')
+            )
+            
+            for plot_id, key in keys_by_id.items():
+                s3_key = s3_keys.get((key['city_scenario'], key['outcome_stat_facet']))
+                if s3_key:
+                    resolved[plot_id] = s3_key
+                    if s3_key not in plot_keys:
+                        plot_keys.append(s3_key)
+                else:
+                    errors[plot_id] = 'No plot registered'
+        
+        bucket_name = os.environ.get('S3_BUCKET_NAME', 'prerun-plots-bucket-local')
+        s3_client = get_s3_client()
+        plot_keys = list(dict.fromkeys(plot_keys))
+        encoding = negotiate_encoding(get_header(event, 'Accept-Encoding'))
+        
+        # Lambda proxy responses are capped at 6 MB. Compressed bodies are
+        # base64 encoded (4/3) but plot JSON shrinks several-fold, so allow
+        # BULK_COMPRESSION_RATIO times as many raw bytes before measuring
+        max_response_bytes = int(os.environ.get('MAX_RESPONSE_BYTES', '6000000'))
+        budget = max_response_bytes
+        if encoding:
+            budget = int(max_response_bytes * 3 / 4 * float(os.environ.get('BULK_COMPRESSION_RATIO', '4')))
+        too_large = 'Plot exceeds the response size limit; fetch it with GET /plot?delivery=url'
+        
+        # Fetch a window of plots at a time over the pooled S3 connections,
+        # stopping as soon as the running total reaches the budget
+        bodies = {}
+        continuation = []
+        used = 0
+        window = max(1, int(os.environ.get('BULK_FETCH_WORKERS', '8')))
+        pending = list(plot_keys)
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            while pending and not continuation:
+                batch = []
+                projected = used
+                while pending and len(batch) < window:
+                    plot_key = pending[0]
+                    size = known_sizes.get(plot_key)
+                    if size is not None and size > budget:
+                        errors[plot_key] = too_large
+                        pending.pop(0)
+                        continue
+                    # The first plot always goes in, so a continuation never repeats a request
+                    if size is not None and projected + size > budget and (bodies or batch):
+                        break
+                    projected += size or 0
+                    batch.append(pending.pop(0))
+                if not batch:
+                    continuation = pending
+                    break
+                
+                fetched = list(executor.map(lambda key: _fetch_for_bulk(s3_client, bucket_name, key), batch))
+                for position, (plot_key, raw, error) in enumerate(fetched):
+                    if error:
+                        errors[plot_key] = error
+                    elif len(raw) > budget:
+                        errors[plot_key] = too_large
+                    elif bodies and used + len(raw) + len(plot_key) + 6 > budget:
+                        continuation = [key for key, _, _ in fetched[position:]] + pending
+                        break
+                    else:
+                        bodies[plot_key] = raw
+                        used += len(raw) + len(plot_key) + 6
+        
+        def assemble():
+            # Splice the validated plot bodies in as-is rather than re-serializing them
+            combined = b''.join([
+                b'{"plots": {',
+                b', '.join(json.dumps(key).encode('utf-8') + b': ' + raw for key, raw in bodies.items()),
+                b'}, "resolved": ', json.dumps(resolved).encode('utf-8'),
+                b', "errors": ', json.dumps(errors).encode('utf-8'),
+                b', "continuation": ', json.dumps(continuation).encode('utf-8'),
+                b'}'
+            ])
+            return binary_body(compress_body(combined, encoding)) if encoding else combined.decode('utf-8')
+        
+        # The compression estimate can be optimistic: hand back plots from
+        # the end until the encoded response fits. A plot that does not fit
+        # even on its own (it barely compresses) is reported instead, and
+        # whatever was deferred behind it is left to the continuation
+        response_body = assemble()
+        while len(response_body) > max_response_bytes and bodies:
+            plot_key = next(reversed(bodies))
+            del bodies[plot_key]
+            if bodies:
+                continuation.insert(0, plot_key)
+            else:
+                errors[plot_key] = too_large
+            response_body = assemble()
+        
+        if len(response_body) > max_response_bytes:
+            # Only the resolved/errors/continuation lists are left
+            return {
+                'statusCode': 413,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Access-Control-Allow-Methods': 'POST, OPTIONS'
+                },
+                'body': json.dumps({
+                    'error': 'Request names too many plots for one response; request fewer plots'
+                })
+            }
+        
+        headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Access-Control-Allow-Methods': 'POST, OPTIONS',
+            'Vary': 'Accept-Encoding'
+        }
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        
+        emit_metrics(
+            'JHEEM/PlotRetrieval',
+            {'Encoding': encoding or 'identity'},
+            {
+                'BulkResponseBytes': (len(response_body), 'Bytes'),
+                'BulkPlots': (len(bodies), 'Count'),
+                'BulkErrors': (len(errors), 'Count'),
+                'BulkDeferred': (len(continuation), 'Count')
+            }
+        )
+        
+        response = {
+            'statusCode': 200,
+            'headers': headers,
+            'body': response_body
+        }
+        if encoding:
+            response['isBase64Encoded'] = True
+        return response
+        
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Methods': 'POST, OPTIONS'
+            },
+            'body': json.dumps({
+                'error': f'Internal server error: {str(e)}'
+            })
+        }
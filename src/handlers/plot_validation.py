@@ -0,0 +1,75 @@
+import json
+from botocore.exceptions import ClientError
+
+# S3 user metadata (x-amz-meta-jheem-validated) marking a plot object whose
+# JSON has already been validated, either by its uploader or afterwards by
+# scripts/tag_validated_plots.py
+VALIDATED_METADATA_KEY = 'jheem-validated'
+
+
+def is_tagged_valid(metadata):
+    """True if an object's user metadata says its JSON was validated at upload"""
+    return (metadata or {}).get(VALIDATED_METADATA_KEY) == 'true'
+
+
+def validate_plot_bytes(raw):
+    """
+    Check that a plot body is well-formed JSON without keeping the parse result
+
+    The stdlib has no incremental parser, and a pure-Python one is slower than
+    the C decoder, so untagged objects get a single C-level parse straight
+    from the bytes (no intermediate str copy) that is discarded immediately.
+
+    Raises:
+        ValueError: If the body is not valid UTF-8 JSON
+    """
+    json.loads(raw)
+
+
+# Object headers that a MetadataDirective=REPLACE copy resets unless restated
+_PRESERVED_HEADERS = (
+    'ContentType', 'ContentEncoding', 'ContentDisposition', 'ContentLanguage', 'CacheControl', 'Expires',
+    'WebsiteRedirectLocation', 'StorageClass', 'ServerSideEncryption', 'SSEKMSKeyId', 'BucketKeyEnabled'
+)
+
+
+def tag_plot_validated(s3_client, bucket_name, plot_key):
+    """
+    Validate a stored plot once and tag it so get_plot can skip parsing
+
+    Writers that validate before uploading (store_plot, the bundle builder)
+    set the flag on the PUT itself, so this only costs a HEAD for them.
+    Other objects are read, validated and copied onto themselves with the
+    flag added to their user metadata and every other header preserved; the
+    body (and therefore the single-part ETag) is unchanged.
+
+    Returns:
+        True if the object is (now) tagged, False if it is missing or invalid
+    """
+    try:
+        head = s3_client.head_object(Bucket=bucket_name, Key=plot_key)
+        if is_tagged_valid(head.get('Metadata')):
+            return True
+
+        response = s3_client.get_object(Bucket=bucket_name, Key=plot_key, IfMatch=head['ETag'])
+        validate_plot_bytes(response['Body'].read())
+
+        copy_args = {
+            'Bucket': bucket_name,
+            'Key': plot_key,
+            'CopySource': {'Bucket': bucket_name, 'Key': plot_key},
+            'CopySourceIfMatch': head['ETag'],
+            'Metadata': dict(head.get('Metadata') or {}, **{VALIDATED_METADATA_KEY: 'true'}),
+            'MetadataDirective': 'REPLACE'
+        }
+        # REPLACE drops every header not restated, so carry them all over
+        for header in _PRESERVED_HEADERS:
+            if head.get(header) is not None:
+                copy_args[header] = head[header]
+
+        s3_client.copy_object(**copy_args)
+        return True
+
+    except (ClientError, ValueError) as e:
+        print(f"Warning: could not validate {plot_key}: {str(e)}")
+        return False
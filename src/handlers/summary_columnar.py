@@ -0,0 +1,188 @@
+import json
+import math
+import struct
+import sys
+from array import array
+
+from src.handlers.summary_data import parse_stratum_key
+
+# Media type clients send in Accept to get the columnar form from /v2/data
+COLUMNAR_MEDIA_TYPE = 'application/vnd.jheem.summary+columnar'
+
+MAGIC = b'JHMC'
+FORMAT_VERSION = 1
+
+# Per-point fields stored as float32 columns; any other point field is dropped
+COLUMNS = ('value', 'lower', 'upper')
+
+_PREAMBLE = struct.Struct('<4sBI')
+_NAN = float('nan')
+
+
+def _stratum_labels(strata, dimensions):
+    """
+    Dictionary-encode stratum keys as indexes into the dimension value lists
+
+    Returns:
+        {"dimensions": [...], "codes": [[...], ...]} when every key parses
+        with the same dimension order, else {"keys": [...]}
+    """
+    parsed = [parse_stratum_key(stratum, dimensions) for stratum in strata]
+    if parsed and all(p is not None for p in parsed):
+        order = list(parsed[0])
+        if order and all(list(p) == order for p in parsed):
+            return {
+                'dimensions': order,
+                'codes': [[dimensions[name].index(p[name]) for name in order] for p in parsed]
+            }
+    return {'keys': list(strata)}
+
+
+def encode_columnar(summary):
+    """
+    Encode a summary as a header plus packed float32 columns
+
+    Layout (little-endian):
+        b"JHMC", version (u8), header length (u32), header JSON, zero padding
+        to a 4-byte boundary, then float32 data
+
+    The header holds the summary metadata, the shared year axis, the
+    dimension dictionaries, observations (as JSON) and one entry per
+    scenario/variant/outcome section with its stratum labels and the float
+    offset of its block. Each block is len(COLUMNS) matrices of
+    strata x years in row-major order; years a stratum lacks are NaN.
+    """
+    metadata = summary.get('metadata') or {}
+    dimensions = {name: list(spec.get('values', [])) for name, spec in (metadata.get('dimensions') or {}).items()}
+    simulations = summary.get('simulations') or {}
+
+    years = sorted({
+        point['year']
+        for variants in simulations.values()
+        for sections in variants.values()
+        for section in sections.values()
+        for points in (section.get('data') or {}).values()
+        for point in points
+    })
+    year_position = {year: i for i, year in enumerate(years)}
+
+    data = array('f')
+    sections = []
+    for scenario, variants in simulations.items():
+        for variant, outcomes in variants.items():
+            for outcome, section in outcomes.items():
+                strata = section.get('data') or {}
+                entry = {
+                    'scenario': scenario,
+                    'variant': variant,
+                    'outcome': outcome,
+                    'fields': {key: value for key, value in section.items() if key != 'data'},
+                    'offset': len(data),
+                    'strata': len(strata)
+                }
+                entry.update(_stratum_labels(strata, dimensions))
+                sections.append(entry)
+
+                for column in COLUMNS:
+                    for points in strata.values():
+                        row = [_NAN] * len(years)
+                        for point in points:
+                            value = point.get(column)
+                            if value is not None:
+                                row[year_position[point['year']]] = value
+                        data.extend(row)
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'columns': list(COLUMNS),
+        'years': years,
+        'dimensions': dimensions,
+        'sections': sections,
+        'top': {key: value for key, value in summary.items() if key != 'simulations'}
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    padding = b'\0' * (-(_PREAMBLE.size + len(header_bytes)) % 4)
+
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return _PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)) + header_bytes + padding + data.tobytes()
+
+
+def read_columnar(blob):
+    """
+    Parse the header and map the float32 data without building per-point objects
+
+    Returns:
+        (header, data) where data is an array('f')
+
+    Raises:
+        ValueError: If the blob is not a supported columnar summary
+    """
+    if len(blob) < _PREAMBLE.size:
+        raise ValueError('Truncated columnar summary')
+    magic, version, header_length = _PREAMBLE.unpack_from(blob)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError('Not a columnar summary (bad magic or version)')
+
+    header_end = _PREAMBLE.size + header_length
+    header = json.loads(blob[_PREAMBLE.size:header_end])
+    data_start = header_end + (-header_end % 4)
+
+    data = array('f')
+    data.frombytes(blob[data_start:])
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return header, data
+
+
+def decode_columnar(blob):
+    """Rebuild the JSON summary layout from a columnar blob (values are float32-rounded)"""
+    header, data = read_columnar(blob)
+    years = header['years']
+    width = len(years)
+    dimensions = header['dimensions']
+
+    summary = dict(header['top'])
+    simulations = {}
+    for entry in header['sections']:
+        if 'keys' in entry:
+            keys = entry['keys']
+        else:
+            keys = [
+                '_'.join(dimensions[name][code] for name, code in zip(entry['dimensions'], codes))
+                for codes in entry['codes']
+            ]
+
+        count = entry['strata']
+        strata = {}
+        for row, key in enumerate(keys):
+            columns = [
+                data[entry['offset'] + (c * count + row) * width:entry['offset'] + (c * count + row + 1) * width]
+                for c in range(len(header['columns']))
+            ]
+            points = []
+            for i, year in enumerate(years):
+                if math.isnan(columns[0][i]):
+                    continue
+                point = {'year': year}
+                for name, column in zip(header['columns'], columns):
+                    if not math.isnan(column[i]):
+                        point[name] = column[i]
+                points.append(point)
+            strata[key] = points
+
+        section = dict(entry['fields'])
+        section['data'] = strata
+        simulations.setdefault(entry['scenario'], {}).setdefault(entry['variant'], {})[entry['outcome']] = section
+
+    summary['simulations'] = simulations
+    return summary
+
+
+def accepts_columnar(accept):
+    """True if an Accept header asks for the columnar media type"""
+    for part in (accept or '').split(','):
+        pieces = [piece.strip() for piece in part.split(';')]
+        if pieces[0].lower() == COLUMNAR_MEDIA_TYPE:
+            return not any(param.replace(' ', '') in ('q=0', 'q=0.0') for param in pieces[1:])
+    return False
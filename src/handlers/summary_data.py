@@ -0,0 +1,167 @@
+import json
+
+# Per-city summary objects (docs/native-plotting-architecture.md) live under
+# this prefix as <city>.json, <city>.json.gz and the section index below
+SUMMARY_PREFIX = 'summary/'
+
+INDEX_FORMAT_VERSION = 1
+
+
+def summary_key(city, suffix='.json'):
+    return f"{SUMMARY_PREFIX}{city}{suffix}"
+
+
+def index_key(city):
+    return summary_key(city, '.index.json')
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def write_indexed_summary(summary, out):
+    """
+    Write a summary as compact JSON and record where each section lands
+
+    The byte offsets index the uncompressed object, so the v2 data endpoint
+    can fetch a scenario/outcome/stratum subtree with S3 Range GETs instead of
+    downloading the whole city.
+
+    Args:
+        summary: Parsed summary ({"metadata", "simulations", "observations"})
+        out: Binary file object to write the JSON to
+
+    Returns:
+        Index dict with [start, end) offsets:
+        {
+            "fields": {"metadata": [s, e]},
+            "dimensions": {"age": ["13-24 years", ...]},
+            "sections": {scenario: {variant: {outcome: {
+                "fields": {"metadata": [s, e]},
+                "strata": {"13-24 years_female_black": [s, e]}
+            }}}},
+            "observations": {name: {"range": [s, e], "simset_outcome": ...}}
+        }
+    """
+    position = 0
+
+    def emit(text):
+        nonlocal position
+        data = text.encode('utf-8')
+        out.write(data)
+        position += len(data)
+
+    def emit_value(value):
+        start = position
+        emit(_dumps(value))
+        return [start, position]
+
+    def emit_object(items, write_item):
+        emit('{')
+        for i, (key, value) in enumerate(items):
+            if i:
+                emit(',')
+            emit(_dumps(key) + ':')
+            write_item(key, value)
+        emit('}')
+
+    dimensions = (summary.get('metadata') or {}).get('dimensions') or {}
+    index = {
+        'format_version': INDEX_FORMAT_VERSION,
+        'fields': {},
+        'dimensions': {name: list(spec.get('values', [])) for name, spec in dimensions.items()},
+        'sections': {},
+        'observations': {}
+    }
+
+    def write_section(section_index, section):
+        fields = section_index.setdefault('fields', {})
+        strata = section_index.setdefault('strata', {})
+
+        def write_stratum(stratum, points):
+            strata[stratum] = emit_value(points)
+
+        def write_field(key, value):
+            if key == 'data' and isinstance(value, dict):
+                emit_object(value.items(), write_stratum)
+            else:
+                fields[key] = emit_value(value)
+
+        emit_object(section.items(), write_field)
+
+    def write_simulations(simulations):
+        def write_scenario(scenario, variants):
+            def write_variant(variant, outcomes):
+                def write_outcome(outcome, section):
+                    section_index = index['sections'].setdefault(scenario, {}).setdefault(variant, {}).setdefault(outcome, {})
+                    write_section(section_index, section)
+                emit_object(outcomes.items(), write_outcome)
+            emit_object(variants.items(), write_variant)
+        emit_object(simulations.items(), write_scenario)
+
+    def write_observation(name, observation):
+        index['observations'][name] = {
+            'range': emit_value(observation),
+            'simset_outcome': ((observation or {}).get('metadata') or {}).get('simset_outcome')
+        }
+
+    def write_top(key, value):
+        if key == 'simulations':
+            write_simulations(value)
+        elif key == 'observations':
+            emit_object(value.items(), write_observation)
+        else:
+            index['fields'][key] = emit_value(value)
+
+    emit_object(summary.items(), write_top)
+    index['size'] = position
+    return index
+
+
+def parse_stratum_key(key, dimensions):
+    """
+    Split a stratum key such as "13-24 years_heterosexual_male_black" into
+    {dimension: value}
+
+    Values may themselves contain underscores, so at each position the
+    longest dimension value followed by "_" (or the end of the key) wins.
+
+    Returns:
+        Dict of dimension values, or None if the key does not parse
+    """
+    candidates = sorted(
+        ((value, name) for name, values in dimensions.items() for value in values),
+        key=lambda candidate: len(candidate[0]),
+        reverse=True
+    )
+
+    parsed = {}
+    position = 0
+    while position < len(key):
+        for value, name in candidates:
+            end = position + len(value)
+            if name not in parsed and key.startswith(value, position) and (end == len(key) or key[end] == '_'):
+                parsed[name] = value
+                position = end + 1
+                break
+        else:
+            return None
+    return parsed
+
+
+def coalesce_ranges(ranges, max_gap):
+    """
+    Merge sorted [start, end) ranges whose gaps are at most max_gap bytes
+
+    Returns:
+        List of (start, end, members) where members are the original ranges
+        covered by that single request
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start - merged[-1][1] <= max_gap:
+            merged[-1][1] = max(merged[-1][1], end)
+            merged[-1][2].append((start, end))
+        else:
+            merged.append([start, end, [(start, end)]])
+    return [tuple(group) for group in merged]
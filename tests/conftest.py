@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+# Everything runs against moto; never pick up real credentials or LocalStack
+os.environ.update({
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_REGION": "us-east-1",
+    "S3_ENDPOINT_URL": "",
+    "DYNAMODB_ENDPOINT_URL": "",
+    "S3_BUCKET_NAME": "test-plots",
+    "DYNAMODB_TABLE_NAME": "test-plot-metadata",
+})
+
+from moto import mock_aws  # noqa: E402
+
+from src.handlers import aws_clients  # noqa: E402
+from src.handlers.plot_cache import plot_cache  # noqa: E402
+
+BUCKET = os.environ["S3_BUCKET_NAME"]
+
+
+def create_plot_table(resource, with_index=False):
+    """The plot metadata table as serverless.yml defines it"""
+    kwargs = {}
+    attributes = [
+        {"AttributeName": "city_scenario", "AttributeType": "S"},
+        {"AttributeName": "outcome_stat_facet", "AttributeType": "S"},
+    ]
+    if with_index:
+        attributes.append({"AttributeName": "stat_facet_outcome", "AttributeType": "S"})
+        kwargs["GlobalSecondaryIndexes"] = [{
+            "IndexName": "stat-facet-outcome-index",
+            "KeySchema": [
+                {"AttributeName": "city_scenario", "KeyType": "HASH"},
+                {"AttributeName": "stat_facet_outcome", "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "ALL"},
+        }]
+    return resource.create_table(
+        TableName=os.environ["DYNAMODB_TABLE_NAME"],
+        KeySchema=[
+            {"AttributeName": "city_scenario", "KeyType": "HASH"},
+            {"AttributeName": "outcome_stat_facet", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=attributes,
+        BillingMode="PAY_PER_REQUEST",
+        **kwargs
+    )
+
+
+@pytest.fixture
+def aws():
+    """moto-backed S3 and DynamoDB with fresh pooled clients and an empty plot cache"""
+    with mock_aws():
+        aws_clients.reset_clients()
+        plot_cache.clear()
+        yield
+        aws_clients.reset_clients()
+        plot_cache.clear()
+
+
+@pytest.fixture
+def s3(aws):
+    client = aws_clients.get_s3_client()
+    client.create_bucket(Bucket=BUCKET)
+    return client
+
+
+@pytest.fixture
+def table(aws):
+    return create_plot_table(aws_clients.get_dynamodb_resource())
+
+
+def plot_record(city="C.12580", scenario="cessation", outcome="incidence",
+                statistic="mean.and.interval", facet="none", **extra):
+    """A registration record for register_plot / register_plots_batch"""
+    return dict({
+        "city": city,
+        "scenario": scenario,
+        "outcome": outcome,
+        "statistic_type": statistic,
+        "facet_choice": facet,
+        "s3_key": f"plots/{city}/{scenario}/{outcome}_{statistic}_{facet}.json",
+        "file_size": 100,
+    }, **extra)
+
+
+def write_plot(plots_dir, city, scenario, outcome, body=None, facet="none"):
+    """A plot as R writes it under plots_dir, with its <name>_metadata.json sidecar"""
+    directory = plots_dir / city / scenario
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{outcome}_mean.and.interval_{facet}"
+    plot = directory / f"{name}.json"
+    plot.write_text(body or json.dumps({"outcome": outcome, "data": [1, 2]}))
+    (directory / f"{name}_metadata.json").write_text(json.dumps({
+        "scenario": [scenario], "outcome": [outcome], "statistic_type": ["mean.and.interval"], "facet_choice": [facet]
+    }))
+    return plot
+
+
+def plot_items(table):
+    """Registered plots, leaving out the catalog counter items"""
+    return [item for item in table.scan()["Items"] if not item["city_scenario"].startswith("_catalog")]
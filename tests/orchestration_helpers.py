@@ -0,0 +1,56 @@
+"""
+Fixtures and job specs shared by the orchestration tests
+
+Kept out of conftest so the handler tests do not import the orchestration
+scripts (and their psutil/yaml dependencies).
+"""
+import os
+
+import pytest
+import yaml
+
+from local_orchestration import LocalOrchestrator
+
+
+def job_spec(city, outcomes=("incidence",), scenarios=("cessation",)):
+    """A city job as generate_orchestration_config writes it"""
+    return {"city": city, "scenarios": list(scenarios), "outcomes": list(outcomes),
+            "statistics": ["mean.and.interval"], "facets": ["none"],
+            "expected_plots": len(scenarios) * len(outcomes)}
+
+
+@pytest.fixture
+def make_orchestrator(tmp_path, monkeypatch):
+    """Build an orchestrator over the given jobs, running in tmp_path with a stand-in R script"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("JHEEM_API_GATEWAY_ID", "test-api")
+    r_script = tmp_path / "batch_plot_generator.R"
+    r_script.write_text("")
+
+    def make(jobs, **kwargs):
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump({"jobs": jobs}))
+        kwargs.setdefault("max_parallel", 2)
+        return LocalOrchestrator(
+            config, resource_monitoring=False, r_script_path=r_script, working_dir=tmp_path,
+            progress_interval=0, **kwargs
+        )
+    return make
+
+
+@pytest.fixture
+def fake_rscript(tmp_path, monkeypatch):
+    """An Rscript on PATH that prints plot lines for every outcome and exits with $FAKE_R_EXIT"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "Rscript"
+    script.write_text(
+        "#!/bin/sh\n"
+        "outcomes=$(echo \"$@\" | sed 's/.*--outcomes \\([^ ]*\\).*/\\1/' | tr ',' ' ')\n"
+        "for outcome in $outcomes; do echo \"SUCCESS: Generated ${outcome}_mean.and.interval_none\"; done\n"
+        "echo 'warning: slow' >&2\n"
+        "exit ${FAKE_R_EXIT:-0}\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    return script
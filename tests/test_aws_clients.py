@@ -0,0 +1,39 @@
+import threading
+
+from src.handlers import aws_clients
+
+
+def test_clients_are_pooled_across_calls(aws):
+    assert aws_clients.get_s3_client() is aws_clients.get_s3_client()
+    assert aws_clients.get_dynamodb_resource() is aws_clients.get_dynamodb_resource()
+
+
+def test_resource_wraps_the_pooled_client(aws):
+    assert aws_clients.get_dynamodb_client() is aws_clients.get_dynamodb_resource().meta.client
+
+
+def test_threads_share_one_resource(aws):
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(aws_clients.get_dynamodb_resource())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(resource) for resource in seen}) == 1
+
+
+def test_overrides_take_precedence_and_reset_clears_them(aws):
+    pooled = aws_clients.get_dynamodb_client()
+    injected = aws_clients._build_client("dynamodb", "DYNAMODB_ENDPOINT_URL")
+
+    aws_clients.set_dynamodb_client(injected)
+    assert aws_clients.get_dynamodb_client() is injected
+    assert aws_clients.get_dynamodb_resource().meta.client is injected
+
+    s3_stub = object()
+    aws_clients.set_s3_client(s3_stub)
+    assert aws_clients.get_s3_client() is s3_stub
+
+    aws_clients.reset_clients()
+    assert aws_clients.get_s3_client() is not s3_stub
+    assert aws_clients.get_dynamodb_client() not in (injected, pooled)
@@ -0,0 +1,34 @@
+import json
+import subprocess
+import sys
+
+from src.handlers.facet_aggregation import read_marginals
+from src.handlers.summary_columnar import encode_columnar
+from tests.conftest import ROOT
+from tests.test_facet_aggregation import SUMMARY
+
+
+def test_importable_as_a_package_module():
+    # A fresh interpreter, so the sys.path set up by conftest cannot mask a bad import
+    result = subprocess.run(
+        [sys.executable, '-c', 'import scripts.build_marginal_cubes'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_build_city_from_json_and_columnar(tmp_path):
+    from build_marginal_cubes import build_city
+
+    json_path = tmp_path / 'C.12580.json'
+    json_path.write_text(json.dumps(SUMMARY))
+    col_path = tmp_path / 'C.12580.col'
+    col_path.write_bytes(encode_columnar(SUMMARY))
+
+    for input_path in (json_path, col_path):
+        city, artifact_path, written, _ = build_city(input_path, tmp_path / 'out', ['none', 'age', 'race'])
+        assert city == 'C.12580'
+        assert artifact_path.name == 'C.12580.marginals.npz'
+        assert set(written) == {'none', 'age'}
+        axes, arrays = read_marginals(artifact_path)
+        assert axes['facets'] == written and set(arrays) == {'none', 'age'}
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from src.handlers import city_aggregation
+from src.handlers.city_aggregation import aggregate_city_data, load_cube
+from src.handlers.plot_cache import plot_cache
+from src.handlers.summary_columnar import encode_columnar
+from src.handlers.summary_data import summary_key
+from tests.test_facet_aggregation import SUMMARY
+
+SUMMARY_BUCKET = 'test-summary'
+
+
+class CountingS3:
+    """Passes calls through to the real client, recording get_object requests"""
+
+    def __init__(self, client):
+        self.client = client
+        self.requests = []
+
+    def get_object(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.client.get_object(**kwargs)
+
+
+@pytest.fixture
+def summary(s3, monkeypatch):
+    monkeypatch.setenv('SUMMARY_BUCKET_NAME', SUMMARY_BUCKET)
+    monkeypatch.setattr(city_aggregation, '_cubes', type(city_aggregation._cubes)())
+    s3.create_bucket(Bucket=SUMMARY_BUCKET)
+    s3.put_object(Bucket=SUMMARY_BUCKET, Key=summary_key('C.12580', '.col'), Body=encode_columnar(SUMMARY))
+    return s3
+
+
+def _get(params, headers=None):
+    return aggregate_city_data({
+        'pathParameters': {'city': 'C.12580'},
+        'queryStringParameters': params,
+        'headers': headers or {}
+    }, None)
+
+
+def test_load_cube_keeps_only_the_cube_and_revalidates_it(summary):
+    client = CountingS3(summary)
+    cube, etag = load_cube(client, SUMMARY_BUCKET, 'C.12580')
+    assert 'IfNoneMatch' not in client.requests[0]
+
+    assert load_cube(client, SUMMARY_BUCKET, 'C.12580') == (cube, etag)
+    assert client.requests[1]['IfNoneMatch'] == etag
+    # The columnar bytes never enter the plot cache
+    assert plot_cache.stats()['entries'] == 0
+
+    changed = dict(SUMMARY, metadata=dict(SUMMARY['metadata'], outcomes={}))
+    summary.put_object(Bucket=SUMMARY_BUCKET, Key=summary_key('C.12580', '.col'), Body=encode_columnar(changed))
+    reloaded, new_etag = load_cube(client, SUMMARY_BUCKET, 'C.12580')
+    assert new_etag != etag and reloaded is not cube
+    assert not reloaded.is_percent('suppression')
+
+
+def test_load_cube_evicts_least_recent_cities(summary, monkeypatch):
+    monkeypatch.setenv('AGGREGATION_CACHE_CITIES', '1')
+    summary.put_object(Bucket=SUMMARY_BUCKET, Key=summary_key('C.00001', '.col'), Body=encode_columnar(SUMMARY))
+    load_cube(summary, SUMMARY_BUCKET, 'C.12580')
+    load_cube(summary, SUMMARY_BUCKET, 'C.00001')
+    assert list(city_aggregation._cubes) == ['C.00001']
+
+
+def test_aggregate_endpoint(summary):
+    response = _get({'outcome': 'incidence', 'facet': 'none,age'})
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    facets = body['simulations']['cessation']['base']['incidence']
+    assert facets['none']['total'][0]['value'] == 7.0
+    assert set(facets['age']) == {'13-24 years', '25-34 years'}
+
+    again = _get({'outcome': 'incidence', 'facet': 'none,age'}, {'If-None-Match': response['headers']['ETag']})
+    assert again['statusCode'] == 304
+
+    assert _get({'outcome': 'suppression'})['statusCode'] == 400
+    assert _get({'outcome': 'incidence', 'facet': 'race'})['statusCode'] == 400
+    assert _get({})['statusCode'] == 400
+    missing = aggregate_city_data({'pathParameters': {'city': 'C.0'}, 'queryStringParameters': {'outcome': 'x'}}, None)
+    assert missing['statusCode'] == 404
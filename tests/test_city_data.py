@@ -0,0 +1,145 @@
+import base64
+import gzip
+import io
+import json
+
+import pytest
+
+from src.handlers.city_data import get_city_data
+from src.handlers.plot_retrieval import fetch_plot
+from src.handlers.summary_data import index_key, summary_key, write_indexed_summary
+from tests.conftest import BUCKET
+
+SUMMARY_BUCKET = 'test-summary'
+CITY = 'C.12580'
+
+SUMMARY = {
+    'metadata': {
+        'city': CITY,
+        'dimensions': {
+            'age': {'values': ['13-24 years', '25-34 years']},
+            'sex': {'values': ['female', 'male']}
+        }
+    },
+    'simulations': {
+        'cessation': {'base': {
+            'incidence': {
+                'metadata': {'units': 'cases'},
+                'data': {
+                    '13-24 years_female': [{'year': 2020, 'value': 1}, {'year': 2030, 'value': 2}],
+                    '25-34 years_male': [{'year': 2020, 'value': 3}, {'year': 2030, 'value': 4}]
+                }
+            },
+            'prevalence': {'metadata': {}, 'data': {'13-24 years_female': [{'year': 2020, 'value': 5}]}}
+        }},
+        'brief_interruption': {'base': {
+            'incidence': {'metadata': {}, 'data': {'13-24 years_female': [{'year': 2020, 'value': 6}]}}
+        }}
+    },
+    'observations': {
+        'incidence_obs': {'metadata': {'simset_outcome': 'incidence'}, 'data': [1]},
+        'prevalence_obs': {'metadata': {'simset_outcome': 'prevalence'}, 'data': [2]}
+    }
+}
+
+
+def _get(params=None, headers=None, city=CITY):
+    return get_city_data({
+        'pathParameters': {'city': city},
+        'queryStringParameters': params,
+        'headers': headers or {}
+    }, None)
+
+
+def _body_bytes(response):
+    if response.get('isBase64Encoded'):
+        return base64.b64decode(response['body'])
+    return response['body'].encode()
+
+
+@pytest.fixture
+def summary(s3, monkeypatch):
+    monkeypatch.setenv('SUMMARY_BUCKET_NAME', SUMMARY_BUCKET)
+    s3.create_bucket(Bucket=SUMMARY_BUCKET)
+    out = io.BytesIO()
+    index = write_indexed_summary(SUMMARY, out)
+    raw = out.getvalue()
+    index['source_etag'] = s3.put_object(Bucket=SUMMARY_BUCKET, Key=summary_key(CITY), Body=raw)['ETag']
+    s3.put_object(Bucket=SUMMARY_BUCKET, Key=summary_key(CITY, '.json.gz'), Body=gzip.compress(raw))
+    s3.put_object(Bucket=SUMMARY_BUCKET, Key=index_key(CITY), Body=json.dumps(index).encode())
+    return raw
+
+
+def test_whole_file_is_gzipped_only_for_clients_that_accept_it(summary):
+    compressed = _get(headers={'Accept-Encoding': 'gzip, br'})
+    assert compressed['statusCode'] == 200
+    assert compressed['headers']['Content-Encoding'] == 'gzip'
+    assert compressed['headers']['Vary'] == 'Accept, Accept-Encoding'
+    assert gzip.decompress(_body_bytes(compressed)) == summary
+
+    for headers in ({}, {'Accept-Encoding': 'br, gzip;q=0'}):
+        plain = _get(headers=headers)
+        assert 'Content-Encoding' not in plain['headers']
+        assert plain['headers']['Vary'] == 'Accept, Accept-Encoding'
+        assert _body_bytes(plain) == summary
+        assert plain['headers']['ETag'] != compressed['headers']['ETag']
+
+    forced = _get({'compressed': '0'}, {'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in forced['headers'] and _body_bytes(forced) == summary
+
+
+def test_whole_file_matches_any_if_none_match_tag(summary):
+    etag = _get(headers={'Accept-Encoding': 'gzip'})['headers']['ETag']
+
+    single = _get(headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert single['statusCode'] == 304 and single['headers']['ETag'] == etag
+
+    several = _get(headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"stale", W/{etag}'})
+    assert several['statusCode'] == 304 and several['headers']['ETag'] == etag
+
+    # The gzip tag does not validate the identity representation
+    other = _get(headers={'If-None-Match': f'"stale", {etag}'})
+    assert other['statusCode'] == 200
+
+
+def test_summary_and_plot_buckets_do_not_share_cache_entries(s3):
+    s3.create_bucket(Bucket=SUMMARY_BUCKET)
+    s3.put_object(Bucket=BUCKET, Key='shared.json', Body=b'{"bucket": "plots"}')
+    s3.put_object(Bucket=SUMMARY_BUCKET, Key='shared.json', Body=b'{"bucket": "summary"}')
+
+    assert fetch_plot(s3, BUCKET, 'shared.json')[0] == b'{"bucket": "plots"}'
+    assert fetch_plot(s3, SUMMARY_BUCKET, 'shared.json')[0] == b'{"bucket": "summary"}'
+    assert fetch_plot(s3, BUCKET, 'shared.json')[3] == 'hit'
+
+
+def test_slice_selects_scenario_outcome_strata_and_years(summary):
+    response = _get({
+        'scenario': 'cessation',
+        'outcome': 'incidence',
+        'dimensions': 'sex:female',
+        'year_from': '2025'
+    })
+    assert response['statusCode'] == 200
+    assert response['headers']['Vary'] == 'Accept, Accept-Encoding'
+    sliced = json.loads(_body_bytes(response))
+
+    assert list(sliced['simulations']) == ['cessation']
+    incidence = sliced['simulations']['cessation']['base']
+    assert list(incidence) == ['incidence']
+    assert incidence['incidence']['data'] == {'13-24 years_female': [{'year': 2030, 'value': 2}]}
+    assert incidence['incidence']['metadata'] == {'units': 'cases'}
+    assert list(sliced['observations']) == ['incidence_obs']
+    assert sliced['metadata'] == SUMMARY['metadata']
+
+    again = _get({
+        'scenario': 'cessation', 'outcome': 'incidence', 'dimensions': 'sex:female', 'year_from': '2025'
+    }, {'If-None-Match': response['headers']['ETag']})
+    assert again['statusCode'] == 304
+
+
+def test_slice_errors(summary):
+    assert _get({'outcome': 'nope'})['statusCode'] == 404
+    assert _get({'dimensions': 'sex'})['statusCode'] == 400
+    assert _get({'year_from': 'soon'})['statusCode'] == 400
+    assert _get(city='C.00000')['statusCode'] == 404
+    assert _get({'outcome': 'incidence'}, city='C.00000')['statusCode'] == 404
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from src.handlers.http_utils import etag_matches, parse_etags
+from src.handlers.plot_cache import plot_cache
+from src.handlers.plot_discovery import get_all_available_cities, search_plots
+from src.handlers.plot_retrieval import get_plot
+from tests.conftest import BUCKET
+
+PLOT = json.dumps({'data': list(range(1000))}).encode()
+
+
+def _get(headers=None):
+    return get_plot({'queryStringParameters': {'plotKey': 'plots/a.json'}, 'headers': headers or {}}, None)
+
+
+@pytest.fixture
+def plot(s3):
+    s3.put_object(Bucket=BUCKET, Key='plots/a.json', Body=PLOT)
+    return s3
+
+
+def test_plot_responses_carry_validators(plot):
+    response = _get()
+    assert response['headers']['ETag'] == plot.head_object(Bucket=BUCKET, Key='plots/a.json')['ETag']
+    assert response['headers']['Last-Modified'].endswith('GMT')
+    assert response['headers']['Cache-Control'] == 'public, max-age=86400'
+
+
+def test_matching_etag_gets_304_for_each_representation(plot):
+    identity = _get()['headers']['ETag']
+    gzipped = _get({'Accept-Encoding': 'gzip'})['headers']['ETag']
+    assert gzipped != identity
+
+    not_modified = _get({'If-None-Match': identity})
+    assert not_modified['statusCode'] == 304 and not_modified['body'] == ''
+    assert not_modified['headers']['ETag'] == identity
+
+    assert _get({'If-None-Match': gzipped, 'Accept-Encoding': 'gzip'})['statusCode'] == 304
+    # Any tag in the list may match, weak or not
+    assert _get({'If-None-Match': f'"other", W/{gzipped}', 'Accept-Encoding': 'gzip'})['statusCode'] == 304
+
+
+def test_stale_etag_gets_the_new_body(plot):
+    etag = _get()['headers']['ETag']
+    plot.put_object(Bucket=BUCKET, Key='plots/a.json', Body=json.dumps({'data': [0]}).encode())
+    plot_cache.clear()
+    response = _get({'If-None-Match': etag})
+    assert response['statusCode'] == 200 and json.loads(response['body']) == {'data': [0]}
+
+
+def test_search_and_cities_304(table):
+    table.put_item(Item={'city_scenario': 'C.1#a', 'outcome_stat_facet': 'o#s#none', 'outcome': 'o',
+                         'statistic_type': 's', 'facet_choice': 'none', 's3_key': 'k', 'file_size': 1})
+    for handler, params in [(search_plots, {'city': 'C.1', 'scenario': 'a'}), (get_all_available_cities, {})]:
+        event = {'queryStringParameters': params, 'headers': {}}
+        etag = handler(event, None)['headers']['ETag']
+        response = handler(dict(event, headers={'if-none-match': etag}), None)
+        assert response['statusCode'] == 304 and response['body'] == ''
+
+
+@pytest.mark.parametrize('header, tags', [
+    (None, []), ('"a"', ['"a"']), ('W/"a", "b"', ['"a"', '"b"']), (' * ', ['*'])
+])
+def test_parse_etags(header, tags):
+    assert parse_etags(header) == tags
+
+
+def test_wildcard_matches_anything():
+    assert etag_matches('*', '"x"') and not etag_matches('"y"', '"x"')
+
+
+def test_any_tag_wildcard_matches_every_representation(plot):
+    for headers in ({}, {'Accept-Encoding': 'gzip'}):
+        response = _get(dict(headers, **{'If-None-Match': '*'}))
+        assert response['statusCode'] == 304 and response['body'] == ''
+        assert response['headers']['ETag'] == _get(headers)['headers']['ETag']
+    missing = get_plot({'queryStringParameters': {'plotKey': 'plots/missing.json'},
+                        'headers': {'If-None-Match': '*'}}, None)
+    assert missing['statusCode'] == 404
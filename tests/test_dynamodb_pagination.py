@@ -0,0 +1,147 @@
+from decimal import Decimal
+
+import pytest
+
+from src.handlers import dynamodb_pagination
+from src.handlers.dynamodb_pagination import (
+    backoff_delay, batch_get_items, batch_put_chunk, decode_next_token, encode_next_token, iter_items,
+    iter_pages, read_page
+)
+
+
+class FakeOperation:
+    """A query/scan stand-in that serves `items` in pages of `page_size` evaluated items"""
+
+    def __init__(self, items, page_size, predicate=None):
+        self.items = items
+        self.page_size = page_size
+        self.predicate = predicate or (lambda item: True)
+        self.calls = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(dict(kwargs))
+        start = 0
+        if 'ExclusiveStartKey' in kwargs:
+            start = kwargs['ExclusiveStartKey']['i'] + 1
+        size = min(self.page_size, kwargs.get('Limit', self.page_size))
+        evaluated = self.items[start:start + size]
+        response = {'Items': [item for item in evaluated if self.predicate(item)]}
+        if start + size < len(self.items):
+            response['LastEvaluatedKey'] = {'i': evaluated[-1]['i']}
+        return response
+
+
+def test_iter_pages_follows_last_evaluated_key():
+    operation = FakeOperation([{'i': i} for i in range(10)], page_size=3)
+    pages = list(iter_pages(operation, TableName='t'))
+    assert len(pages) == 4
+    assert [item['i'] for item in iter_items(FakeOperation([{'i': i} for i in range(10)], 3))] == list(range(10))
+    assert all(call['TableName'] == 't' for call in operation.calls)
+
+
+def test_read_page_fills_the_limit_past_filtered_pages():
+    # Only even items match, so each evaluated page yields fewer than Limit
+    operation = FakeOperation([{'i': i} for i in range(20)], page_size=4, predicate=lambda item: item['i'] % 2 == 0)
+    items, token = read_page(operation, 5)
+    assert [item['i'] for item in items] == [0, 2, 4, 6, 8]
+    assert token is not None
+
+    rest, token = read_page(operation, 100, token)
+    assert [item['i'] for item in rest] == [10, 12, 14, 16, 18]
+    assert token is None
+
+
+def test_read_page_last_page_has_no_token():
+    items, token = read_page(FakeOperation([{'i': i} for i in range(3)], page_size=10), 10)
+    assert len(items) == 3 and token is None
+
+
+def test_next_token_round_trips_decimals():
+    key = {'city_scenario': 'C.12580#cessation', 'outcome_stat_facet': 'a#b#c', 'n': Decimal('12.5')}
+    token = encode_next_token(key)
+    assert '=' not in token
+    assert decode_next_token(token) == key
+
+
+@pytest.mark.parametrize('token', ['!!!', encode_next_token({'a': 1})[:-2] + '$$', 'W10'])
+def test_malformed_next_token_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_next_token(token)
+
+
+class FlakyBatchResource:
+    """BatchWriteItem/BatchGetItem stand-in that leaves part of each request unprocessed"""
+
+    def __init__(self, unprocessed_rounds=2, fail_on_call=None):
+        self.unprocessed_rounds = unprocessed_rounds
+        self.fail_on_call = fail_on_call
+        self.written = []
+        self.calls = 0
+
+    def batch_write_item(self, RequestItems):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError('boom')
+        (table_name, entries), = RequestItems.items()
+        if self.calls <= self.unprocessed_rounds:
+            keep, rest = entries[:1], entries[1:]
+        else:
+            keep, rest = entries, []
+        self.written.extend(entry['PutRequest']['Item'] for entry in keep)
+        return {'UnprocessedItems': {table_name: rest} if rest else {}}
+
+    def batch_get_item(self, RequestItems):
+        self.calls += 1
+        (table_name, request), = RequestItems.items()
+        keys = request['Keys']
+        served, rest = (keys[:1], keys[1:]) if self.calls <= self.unprocessed_rounds else (keys, [])
+        return {
+            'Responses': {table_name: [dict(key, found=True) for key in served]},
+            'UnprocessedKeys': {table_name: dict(request, Keys=rest)} if rest else {}
+        }
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    delays = []
+    monkeypatch.setattr(dynamodb_pagination.time, 'sleep', delays.append)
+    return delays
+
+
+def test_batch_put_retries_unprocessed_items_with_backoff(no_sleep):
+    resource = FlakyBatchResource(unprocessed_rounds=2)
+    items = [{'k': i} for i in range(5)]
+    assert batch_put_chunk(resource, 't', items) == ([], None)
+    assert sorted(item['k'] for item in resource.written) == list(range(5))
+    assert len(no_sleep) == 2
+
+
+def test_batch_put_gives_up_and_reports_leftovers(no_sleep):
+    resource = FlakyBatchResource(unprocessed_rounds=100)
+    unprocessed, error = batch_put_chunk(resource, 't', [{'k': i} for i in range(5)], max_attempts=3)
+    assert [item['k'] for item in unprocessed] == [3, 4] and error is None
+
+
+def test_batch_put_failure_keeps_items_written_by_earlier_attempts(no_sleep):
+    resource = FlakyBatchResource(unprocessed_rounds=100, fail_on_call=2)
+    unprocessed, error = batch_put_chunk(resource, 't', [{'k': i} for i in range(5)])
+    assert [item['k'] for item in resource.written] == [0]
+    assert [item['k'] for item in unprocessed] == [1, 2, 3, 4]
+    assert isinstance(error, RuntimeError)
+
+
+def test_batch_put_rejects_oversized_chunks():
+    with pytest.raises(ValueError):
+        batch_put_chunk(FlakyBatchResource(), 't', [{'k': i} for i in range(26)])
+
+
+def test_batch_get_chunks_by_100_and_retries_unprocessed_keys(no_sleep):
+    resource = FlakyBatchResource(unprocessed_rounds=1)
+    items = batch_get_items(resource, 't', [{'k': i} for i in range(150)], ProjectionExpression='k')
+    assert sorted(item['k'] for item in items) == list(range(150))
+    assert resource.calls == 3 and len(no_sleep) == 1
+
+
+def test_backoff_is_jittered_and_capped():
+    assert all(0 <= backoff_delay(attempt) <= 2.0 for attempt in range(20))
+    assert max(backoff_delay(0) for _ in range(50)) <= 0.05
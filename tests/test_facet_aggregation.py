@@ -0,0 +1,115 @@
+import io
+
+import numpy as np
+import pytest
+
+from src.handlers.facet_aggregation import (
+    TOTAL_KEY, SummaryCube, lattice_order, parse_facet, read_marginals, write_marginals
+)
+from src.handlers.summary_columnar import encode_columnar
+
+AGES = ['13-24 years', '25-34 years']
+SEXES = ['female', 'male']
+
+
+def _points(base):
+    return [
+        {'year': 2020, 'value': base, 'lower': base - 1, 'upper': base + 1},
+        {'year': 2030, 'value': base * 2}
+    ]
+
+
+SUMMARY = {
+    'metadata': {
+        'dimensions': {'age': {'values': AGES}, 'sex': {'values': SEXES}},
+        'outcomes': {'suppression': {'display_as_percent': True}}
+    },
+    'simulations': {
+        'cessation': {'base': {
+            'incidence': {'data': {
+                '13-24 years_female': _points(1),
+                '13-24 years_male': _points(2),
+                '25-34 years_female': _points(4),
+                # Missing strata are skipped, and coarser ones are ignored
+                '13-24 years': _points(100)
+            }},
+            'suppression': {'data': {'13-24 years_female': _points(50)}}
+        }}
+    }
+}
+
+
+@pytest.fixture
+def cube():
+    return SummaryCube.from_summary(SUMMARY)
+
+
+def test_parse_facet_and_lattice_order():
+    assert parse_facet('none') == ()
+    assert parse_facet(None) == ()
+    assert parse_facet('age+ sex') == ('age', 'sex')
+    assert lattice_order(['none', 'age', 'age+sex', 'sex', 'age']) == ['age+sex', 'age', 'sex', 'none']
+
+
+def test_aggregate_sums_strata_to_each_facet(cube):
+    total = cube.aggregate('cessation', 'base', 'incidence', 'none')
+    assert total == {TOTAL_KEY: [
+        {'year': 2020, 'value': 7.0, 'lower': 4.0, 'upper': 10.0},
+        {'year': 2030, 'value': 14.0}
+    ]}
+
+    by_age = cube.aggregate('cessation', 'base', 'incidence', 'age')
+    assert by_age['13-24 years'][0]['value'] == 3.0
+    assert by_age['25-34 years'][0]['value'] == 4.0
+
+    by_age_sex = cube.aggregate('cessation', 'base', 'incidence', ['sex', 'age'])
+    assert set(by_age_sex) == {'13-24 years_female', '13-24 years_male', '25-34 years_female'}
+
+
+def test_marginals_are_reduced_from_the_smallest_cached_superset(cube):
+    # Poison the cached age marginal: "none" must now be summed from it
+    sums, counts = cube.marginal(['age'])
+    sums[0, 0, 0, 0, :, 0] = [10.0, 20.0]
+    none_sums, none_counts = cube.marginal([])
+    assert none_sums[0, 0, 0, 0, 0] == 30.0
+    assert none_counts[0, 0, 0, 0, 0] == 3
+    assert cube.marginal(('age',)) is cube.marginal(['age'])
+
+
+def test_aggregate_rejects_percentages_and_unknown_dimensions(cube):
+    with pytest.raises(ValueError):
+        cube.aggregate('cessation', 'base', 'suppression', 'none')
+    with pytest.raises(KeyError):
+        cube.aggregate('cessation', 'base', 'incidence', 'race')
+
+
+@pytest.mark.parametrize('scenario, variant, outcome', [
+    ('brief', 'base', 'incidence'), ('cessation', 'noint', 'incidence'), ('cessation', 'base', 'prevalence')
+])
+def test_unknown_names_raise_key_error_not_value_error(cube, scenario, variant, outcome):
+    # KeyError is not a ValueError, so callers can tell this from a percentage outcome
+    with pytest.raises(KeyError, match='Unknown'):
+        cube.aggregate(scenario, variant, outcome, 'age')
+
+
+def test_columnar_cube_matches_json_cube(cube):
+    columnar = SummaryCube.from_columnar(encode_columnar(SUMMARY))
+    for facet in ('none', 'age', 'sex', 'age+sex'):
+        assert columnar.aggregate('cessation', 'base', 'incidence', facet) == \
+            cube.aggregate('cessation', 'base', 'incidence', facet)
+    assert columnar.is_percent('suppression')
+
+
+def test_write_and_read_marginals(cube):
+    out = io.BytesIO()
+    written = write_marginals(cube, ['none', 'age', 'age+sex', 'race'], out)
+    assert written == {'age+sex': ['age', 'sex'], 'age': ['age'], 'none': []}
+
+    out.seek(0)
+    axes, arrays = read_marginals(out)
+    assert axes['outcomes'] == ['incidence', 'suppression']
+    assert arrays['age'].shape == (3, 1, 1, 2, 2, 2)
+    assert arrays['none'][0, 0, 0, 0, 0] == pytest.approx(7.0)
+    # Empty cells and percentage outcomes are NaN
+    assert np.isnan(arrays['age+sex'][0, 0, 0, 0, 1, 1, 0])
+    assert np.isnan(arrays['none'][0, 0, 0, 1]).all()
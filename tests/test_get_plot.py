@@ -0,0 +1,97 @@
+import base64
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src.handlers.plot_retrieval import get_plot
+from src.handlers.summary_columnar import COLUMNAR_MEDIA_TYPE
+from tests.conftest import BUCKET
+
+LARGE = json.dumps({'data': list(range(2000))}).encode()
+SMALL = json.dumps({'data': [1]}).encode()
+
+
+def _get(params, headers=None):
+    return get_plot({'queryStringParameters': params, 'headers': headers or {}}, None)
+
+
+def _body_bytes(response):
+    if response.get('isBase64Encoded'):
+        return base64.b64decode(response['body'])
+    return response['body'].encode()
+
+
+@pytest.fixture
+def plots(s3):
+    s3.put_object(Bucket=BUCKET, Key='plots/large.json', Body=LARGE)
+    s3.put_object(Bucket=BUCKET, Key='plots/small.json', Body=SMALL)
+    return s3
+
+
+def test_large_plots_are_gzipped_on_the_fly(plots):
+    response = _get({'plotKey': 'plots/large.json'}, {'Accept-Encoding': 'gzip, deflate'})
+    assert response['statusCode'] == 200
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+    assert response['headers']['ETag'].endswith('-gzip"')
+    assert gzip.decompress(_body_bytes(response)) == LARGE
+
+
+def test_small_plots_and_clients_without_gzip_get_identity(plots):
+    small = _get({'plotKey': 'plots/small.json'}, {'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small['headers'] and _body_bytes(small) == SMALL
+
+    plain = _get({'plotKey': 'plots/large.json'}, {'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in plain['headers'] and _body_bytes(plain) == LARGE
+
+
+def test_precompressed_variant_is_preferred(plots):
+    precompressed = gzip.compress(LARGE, compresslevel=9)
+    plots.put_object(Bucket=BUCKET, Key='plots/large.json.gz', Body=precompressed)
+    response = _get({'plotKey': 'plots/large.json'}, {'Accept-Encoding': 'gzip'})
+    assert _body_bytes(response) == precompressed
+
+
+def test_missing_plots_are_404(plots):
+    assert _get({'plotKey': 'plots/nope.json'})['statusCode'] == 404
+    assert _get({})['statusCode'] == 400
+    assert _get({'plotKey': 'plots/large.json', 'delivery': 'carrier-pigeon'})['statusCode'] == 400
+
+
+@pytest.mark.parametrize('delivery, status', [('url', 200), ('redirect', 302)])
+def test_large_plots_are_delivered_by_link(plots, monkeypatch, delivery, status):
+    monkeypatch.setenv('LARGE_PLOT_THRESHOLD_BYTES', '1000')
+    response = _get({'plotKey': 'plots/large.json', 'delivery': delivery})
+    assert response['statusCode'] == status
+    assert response['headers']['Cache-Control'] == 'no-store'
+    url = response['headers']['Location'] if delivery == 'redirect' else json.loads(response['body'])['url']
+    assert 'plots/large.json' in url and 'Signature' in url
+
+    # Small plots are still proxied
+    assert _body_bytes(_get({'plotKey': 'plots/small.json', 'delivery': delivery})) == SMALL
+
+
+def test_link_uses_the_registered_size_and_cdn(plots, table, monkeypatch):
+    monkeypatch.setenv('LARGE_PLOT_THRESHOLD_BYTES', '1000')
+    monkeypatch.setenv('PLOT_CDN_BASE_URL', 'https://cdn.example.org/')
+    table.put_item(Item={'city_scenario': 'C.1#a', 'outcome_stat_facet': 'o#s#none',
+                         's3_key': 'plots/large.json', 'file_size': len(LARGE)})
+    response = _get({'city': 'C.1', 'scenario': 'a', 'outcome': 'o', 'statistic': 's', 'facet': 'none',
+                     'delivery': 'url'})
+    body = json.loads(response['body'])
+    assert body == {'plotKey': 'plots/large.json', 'url': 'https://cdn.example.org/plots/large.json',
+                    'expires_in': None, 'file_size': len(LARGE)}
+
+
+def test_unregistered_plot_parameters_are_404(table):
+    response = _get({'city': 'C.1', 'scenario': 'a', 'outcome': 'o', 'statistic': 's', 'facet': 'none'})
+    assert response['statusCode'] == 404
+
+
+def test_binary_media_types_are_the_compressed_response_types():
+    # A wildcard would route CORS preflights (Accept: */*) to the binary path
+    config = yaml.safe_load((Path(__file__).resolve().parent.parent / 'serverless.yml').read_text())
+    assert config['provider']['apiGateway']['binaryMediaTypes'] == ['application/json', COLUMNAR_MEDIA_TYPE]
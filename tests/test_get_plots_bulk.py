@@ -0,0 +1,141 @@
+import base64
+import gzip
+import json
+import random
+
+import pytest
+
+from src.handlers import plot_retrieval
+from src.handlers.plot_retrieval import get_plots_bulk
+from tests.conftest import BUCKET
+
+
+def _plot(i, size=1000):
+    return json.dumps({'id': i, 'pad': 'x' * size}).encode()
+
+
+def _bulk(payload, headers=None):
+    response = get_plots_bulk({'body': json.dumps(payload), 'headers': headers or {}}, None)
+    body = response['body']
+    if response.get('isBase64Encoded'):
+        body = gzip.decompress(base64.b64decode(body)).decode()
+    return response, json.loads(body)
+
+
+@pytest.fixture
+def plots(s3):
+    keys = []
+    for i in range(10):
+        key = f'plots/p{i}.json'
+        s3.put_object(Bucket=BUCKET, Key=key, Body=_plot(i))
+        keys.append(key)
+    return keys
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    calls = []
+    original = plot_retrieval._fetch_for_bulk
+
+    def counting(s3_client, bucket_name, plot_key):
+        calls.append(plot_key)
+        return original(s3_client, bucket_name, plot_key)
+
+    monkeypatch.setattr(plot_retrieval, '_fetch_for_bulk', counting)
+    return calls
+
+
+def test_bulk_returns_plots_resolved_tuples_and_errors(plots, table):
+    table.put_item(Item={'city_scenario': 'C.1#a', 'outcome_stat_facet': 'o#s#none', 's3_key': plots[3], 'file_size': 1010})
+    response, body = _bulk({
+        'plotKeys': [plots[0], 'plots/missing.json'],
+        'plots': [{'city': 'C.1', 'scenario': 'a', 'outcome': 'o', 'statistic': 's', 'facet': 'none'},
+                  {'city': 'C.1', 'scenario': 'a', 'outcome': 'nope', 'statistic': 's', 'facet': 'none'}]
+    })
+    assert response['statusCode'] == 200
+    assert set(body['plots']) == {plots[0], plots[3]} and body['plots'][plots[3]]['id'] == 3
+    assert body['resolved'] == {'C.1/a/o/s/none': plots[3]}
+    assert body['errors'] == {'C.1/a/nope/s/none': 'No plot registered', 'plots/missing.json': 'Plot not found'}
+    assert body['continuation'] == []
+
+
+def test_bulk_stops_fetching_at_the_size_budget_and_continues(plots, fetched, monkeypatch):
+    monkeypatch.setenv('MAX_RESPONSE_BYTES', '3500')
+    monkeypatch.setenv('BULK_FETCH_WORKERS', '2')
+
+    response, body = _bulk({'plotKeys': plots})
+    assert response['statusCode'] == 200
+    assert list(body['plots']) == plots[:3]
+    assert body['continuation'] == plots[3:]
+    assert len(fetched) <= 4  # at most one window past the budget
+
+    collected = dict(body['plots'])
+    while body['continuation']:
+        _, body = _bulk({'plotKeys': body['continuation']})
+        collected.update(body['plots'])
+    assert list(collected) == plots
+
+
+def test_registered_sizes_stop_before_fetching(plots, table, fetched, monkeypatch):
+    monkeypatch.setenv('MAX_RESPONSE_BYTES', '2500')
+    for i, key in enumerate(plots[:3]):
+        table.put_item(Item={'city_scenario': 'C.1#a', 'outcome_stat_facet': f'o{i}#s#none',
+                             's3_key': key, 'file_size': 1010})
+    _, body = _bulk({'plots': [{'city': 'C.1', 'scenario': 'a', 'outcome': f'o{i}', 'statistic': 's',
+                                'facet': 'none'} for i in range(3)]})
+    assert list(body['plots']) == plots[:2] and body['continuation'] == [plots[2]]
+    assert fetched == plots[:2]
+
+
+def test_a_plot_larger_than_any_response_is_an_error(s3, monkeypatch):
+    monkeypatch.setenv('MAX_RESPONSE_BYTES', '2000')
+    s3.put_object(Bucket=BUCKET, Key='plots/big.json', Body=_plot(0, 5000))
+    s3.put_object(Bucket=BUCKET, Key='plots/small.json', Body=_plot(1, 10))
+    _, body = _bulk({'plotKeys': ['plots/big.json', 'plots/small.json']})
+    assert list(body['plots']) == ['plots/small.json']
+    assert 'delivery=url' in body['errors']['plots/big.json']
+    assert body['continuation'] == []
+
+
+def test_compressed_responses_are_trimmed_to_fit(s3, monkeypatch):
+    # Random payloads barely compress, so the ratio estimate is far too optimistic
+    monkeypatch.setenv('MAX_RESPONSE_BYTES', '6000')
+    rng = random.Random(0)
+    keys = []
+    for i in range(6):
+        key = f'plots/r{i}.json'
+        s3.put_object(Bucket=BUCKET, Key=key, Body=json.dumps({'r': '%x' % rng.getrandbits(8000)}).encode())
+        keys.append(key)
+
+    response, body = _bulk({'plotKeys': keys}, {'Accept-Encoding': 'gzip'})
+    assert response['statusCode'] == 200 and len(response['body']) <= 6000
+    assert list(body['plots']) + body['continuation'] == keys
+    assert body['plots'] and body['continuation']
+
+
+def test_a_plot_that_does_not_fit_once_compressed_is_an_error(s3, monkeypatch):
+    monkeypatch.setenv('MAX_RESPONSE_BYTES', '3000')
+    metrics = []
+    monkeypatch.setattr(plot_retrieval, 'emit_metrics', lambda namespace, dimensions, values: metrics.append(values))
+    # Within the raw budget, but random hex only halves under gzip
+    s3.put_object(Bucket=BUCKET, Key='plots/dense.json',
+                  Body=json.dumps({'r': '%x' % random.Random(1).getrandbits(32000)}).encode())
+    s3.put_object(Bucket=BUCKET, Key='plots/small.json', Body=_plot(1, 10))
+
+    response, body = _bulk({'plotKeys': ['plots/dense.json', 'plots/small.json']}, {'Accept-Encoding': 'gzip'})
+    assert response['statusCode'] == 200 and len(response['body']) <= 3000
+    assert body['plots'] == {}
+    assert 'delivery=url' in body['errors']['plots/dense.json']
+    assert body['continuation'] == ['plots/small.json']
+    # Metrics describe the response that was actually sent
+    assert [(values['BulkPlots'][0], values['BulkErrors'][0], values['BulkDeferred'][0]) for values in metrics] == [
+        (0, 1, 1)
+    ]
+
+
+def test_bulk_request_validation(s3, monkeypatch):
+    monkeypatch.setenv('BULK_MAX_PLOTS', '2')
+    assert get_plots_bulk({'body': '{}', 'headers': {}}, None)['statusCode'] == 400
+    assert get_plots_bulk({'body': 'nope', 'headers': {}}, None)['statusCode'] == 400
+    too_many = json.dumps({'plotKeys': ['a', 'b', 'c']})
+    assert get_plots_bulk({'body': too_many, 'headers': {}}, None)['statusCode'] == 400
@@ -0,0 +1,311 @@
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import local_orchestration
+from local_orchestration import (
+    AdaptiveConcurrency, PlotProgress, WorkStealingScheduler, parse_generated_plot, split_job
+)
+from orchestration_ledger import FAILED, SUCCEEDED, JobLedger
+from tests.orchestration_helpers import fake_rscript, job_spec, make_orchestrator  # noqa: F401 (fixtures)
+
+
+
+def _fake_execute(calls, failing=()):
+    def execute_job(job):
+        calls.append(job["city"])
+        return {"job": job, "city": job["city"], "success": job["city"] not in failing,
+                "duration": 1.0, "expected_plots": job["expected_plots"]}
+    return execute_job
+
+
+def test_resume_skips_succeeded_jobs_and_retries_the_rest(make_orchestrator, tmp_path):
+    jobs = [job_spec("C.1"), job_spec("C.2"), job_spec("C.3")]
+
+    first = make_orchestrator(jobs)
+    first_calls = []
+    first.execute_job = _fake_execute(first_calls, failing={"C.2"})
+    assert first.run_orchestration() is False
+    assert sorted(first_calls) == ["C.1", "C.2", "C.3"]
+
+    ledger = JobLedger(first.ledger_path)
+    assert [ledger.state(job) for job in jobs] == [SUCCEEDED, FAILED, SUCCEEDED]
+    ledger.close()
+
+    resumed = make_orchestrator(jobs, resume=True)
+    resumed_calls = []
+    resumed.execute_job = _fake_execute(resumed_calls)
+    assert resumed.run_orchestration() is True
+    assert resumed_calls == ["C.2"]
+    assert sorted(r["city"] for r in resumed.results if r.get("resumed")) == ["C.1", "C.3"]
+
+    # Without --resume every job runs again
+    fresh = make_orchestrator(jobs)
+    fresh_calls = []
+    fresh.execute_job = _fake_execute(fresh_calls)
+    fresh.run_orchestration()
+    assert sorted(fresh_calls) == ["C.1", "C.2", "C.3"]
+
+
+def _run_with_timeout(orchestrator, seconds=30):
+    """Run orchestration on a daemon thread so a hang fails the test instead of the suite"""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(value=orchestrator.run_orchestration()), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "orchestration hung waiting for a job result"
+    return outcome["value"]
+
+
+def test_job_that_raises_is_reported_as_failed_instead_of_hanging(make_orchestrator, monkeypatch):
+    def broken_ledger(self, job):
+        raise OSError("ledger disk full")
+    monkeypatch.setattr(JobLedger, "job_started", broken_ledger)
+
+    orchestrator = make_orchestrator([job_spec("C.1"), job_spec("C.2"), job_spec("C.3")])
+    assert _run_with_timeout(orchestrator) is False
+    assert len(orchestrator.results) == 3
+    for result in orchestrator.results:
+        assert result["success"] is False
+        assert result["error"] == "ledger disk full"
+        assert "duration" in result
+
+    ledger = JobLedger(orchestrator.ledger_path)
+    assert all(ledger.state(job_spec(city)) == FAILED for city in ("C.1", "C.2", "C.3"))
+    ledger.close()
+
+
+def test_split_job_by_scenario_and_outcome():
+    job = job_spec("C.1", outcomes=("incidence", "prevalence"), scenarios=("cessation", "brief"))
+    assert split_job(job, "city") == [job]
+
+    chunks = split_job(job, "scenario")
+    assert [chunk["scenarios"] for chunk in chunks] == [["cessation"], ["brief"]]
+    assert [chunk["chunk"] for chunk in chunks] == ["scenario=cessation", "scenario=brief"]
+    assert all(chunk["outcomes"] == ["incidence", "prevalence"] and chunk["expected_plots"] == 2
+               for chunk in chunks)
+
+    assert [chunk["outcomes"] for chunk in split_job(job, "outcome")] == [["incidence"], ["prevalence"]]
+
+
+def _cost(job):
+    return job["expected_plots"]
+
+
+def test_scheduler_assigns_whole_cities_longest_first():
+    jobs = (split_job(job_spec("C.big", outcomes=("a", "b", "c", "d")), "outcome") +
+            [job_spec("C.mid", outcomes=("a", "b", "c")), job_spec("C.small", outcomes=("a", "b")),
+             job_spec("C.tiny")])
+    scheduler = WorkStealingScheduler(jobs, 2, _cost)
+
+    assert [{job["city"] for job in worker_queue} for worker_queue in scheduler.queues] == [
+        {"C.big", "C.tiny"}, {"C.mid", "C.small"}
+    ]
+    assert scheduler.remaining == [5, 5]
+    # A worker runs its cities' chunks back to back
+    assert [job["city"] for job in scheduler.queues[0]] == ["C.big"] * 4 + ["C.tiny"]
+
+
+def test_scheduler_steals_unstarted_cities_then_single_chunks():
+    jobs = (split_job(job_spec("C.big", outcomes=("a", "b", "c", "d")), "outcome") +
+            split_job(job_spec("C.small", outcomes=("a", "b")), "outcome"))
+    scheduler = WorkStealingScheduler(jobs, 3, _cost)
+    assert [len(worker_queue) for worker_queue in scheduler.queues] == [4, 2, 0]
+
+    # The idle worker takes the whole of a city its victim has not started
+    scheduler.queues[1].clear()
+    scheduler.remaining[1] = 0
+    scheduler.queues[0].append(job_spec("C.late"))
+    scheduler.remaining[0] += 1
+    assert scheduler.next_job(2)["city"] == "C.late"
+
+    # With only one city left, a single chunk at a time is stolen
+    assert scheduler.next_job(2)["city"] == "C.big"
+    assert len(scheduler.queues[0]) == 3 and not scheduler.queues[2]
+
+    taken = []
+    while True:
+        job = scheduler.next_job(1)
+        if job is None:
+            break
+        taken.append(job)
+    assert len(taken) == 3 and scheduler.next_job(0) is None
+    assert scheduler.remaining == [0, 0, 0]
+
+
+def test_every_job_runs_exactly_once_across_workers(make_orchestrator):
+    jobs = [chunk for city in ("C.1", "C.2", "C.3", "C.4", "C.5")
+            for chunk in split_job(job_spec(city, outcomes=("a", "b")), "outcome")]
+    orchestrator = make_orchestrator(jobs, max_parallel=3)
+    calls = []
+    lock = threading.Lock()
+    execute = _fake_execute(calls)
+
+    def slow_execute(job):
+        time.sleep(0.01)
+        with lock:
+            return execute(job)
+    orchestrator.execute_job = slow_execute
+
+    assert _run_with_timeout(orchestrator) is True
+    assert sorted(calls) == sorted(job["city"] for job in jobs)
+
+
+GB = 1024 ** 3
+
+
+@pytest.fixture
+def telemetry(monkeypatch):
+    """Fake memory, load and per-process RSS readings for AdaptiveConcurrency.sample"""
+    state = {"available": 32 * GB, "percent": 50.0, "load": 1.0, "cpus": 8, "rss": {}}
+    monkeypatch.setattr(local_orchestration.psutil, "virtual_memory",
+                        lambda: SimpleNamespace(available=state["available"], percent=state["percent"]))
+    monkeypatch.setattr(local_orchestration.psutil, "cpu_count", lambda: state["cpus"])
+    monkeypatch.setattr(local_orchestration.os, "getloadavg", lambda: (state["load"], 0.0, 0.0))
+    monkeypatch.setattr(AdaptiveConcurrency, "_tree_rss", staticmethod(lambda pid: state["rss"].get(pid, 0)))
+    return state
+
+
+def test_concurrency_fills_free_memory_up_to_the_ceiling(telemetry):
+    concurrency = AdaptiveConcurrency(1, 6, memory_per_job_gb=4, memory_reserve_gb=2)
+    concurrency.sample()
+    # (32 - 2) GB free at 4 GB per job, capped at max_parallel
+    assert concurrency.limit == 6
+
+    telemetry["available"] = 14 * GB
+    concurrency.sample()
+    assert concurrency.limit == 3
+
+
+def test_concurrency_reserves_growth_of_running_jobs(telemetry):
+    concurrency = AdaptiveConcurrency(1, 8, memory_per_job_gb=4, memory_reserve_gb=2)
+    concurrency.sample()
+    for key, pid in (("a", 1), ("b", 2)):
+        concurrency.acquire()
+        concurrency.track(key, pid)
+    telemetry["rss"] = {1: 1 * GB, 2: 3 * GB}
+    telemetry["available"] = 16 * GB
+
+    concurrency.sample()
+    # 16 - 2 reserved - (3 + 1) GB still to grow = 10 GB: two more 4 GB jobs
+    assert concurrency.limit == 4
+
+    telemetry["rss"] = {1: 6 * GB, 2: 3 * GB}
+    concurrency.sample()
+    # The observed 6 GB peak becomes the per-job estimate
+    assert concurrency.per_job_estimate() == 6 * GB
+    assert concurrency.untrack("a") == 6 * GB
+    assert concurrency.per_job_estimate() == pytest.approx(6 * GB * 1.1)
+
+
+def test_concurrency_backs_off_under_load_and_memory_pressure(telemetry):
+    concurrency = AdaptiveConcurrency(1, 8)
+    concurrency.sample()
+    concurrency.acquire()
+    concurrency.acquire()
+    telemetry["load"] = 12.0
+    concurrency.sample()
+    assert concurrency.limit == 2
+
+    telemetry["load"] = 1.0
+    telemetry["percent"] = 95.0
+    concurrency.sample()
+    assert concurrency.limit == 1
+
+    concurrency.release()
+    concurrency.release()
+    concurrency.sample()
+    # Never below min_parallel
+    assert concurrency.limit == 1
+
+
+def test_acquire_blocks_until_the_limit_rises(telemetry):
+    concurrency = AdaptiveConcurrency(1, 2)
+    concurrency.acquire()
+    started = threading.Event()
+
+    def second():
+        concurrency.acquire()
+        started.set()
+    threading.Thread(target=second, daemon=True).start()
+
+    assert not started.wait(0.2)
+    concurrency.sample()
+    assert started.wait(5)
+    assert concurrency.running == 2
+
+
+def test_parse_generated_plot():
+    assert parse_generated_plot("SUCCESS: Generated incidence_mean.and.interval_none ") == \
+        "incidence_mean.and.interval_none"
+    assert parse_generated_plot("[12:00] SUCCESS: Generated a_b_c") == "a_b_c"
+    assert parse_generated_plot("ERROR: failed to generate a_b_c") is None
+
+
+def test_plot_progress_rate_uses_the_sliding_window(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(local_orchestration.time, "time", lambda: clock["now"])
+    progress = PlotProgress(100, already_done=10, window=60)
+
+    for _ in range(30):
+        clock["now"] += 1
+        progress.plot_done()
+    assert progress.done == 40
+    assert progress.rate() == pytest.approx(1.0)
+    assert "40/100 plots (40.0%)" in progress.describe()
+    assert "60.0 plots/min" in progress.describe()
+
+    # Completions older than the window stop counting
+    clock["now"] += 46
+    assert progress.rate() == pytest.approx(15 / 60)
+    clock["now"] += 60
+    assert progress.rate() == 0.0
+    assert "ETA unknown" in progress.describe()
+
+
+def test_execute_job_streams_plots_to_the_ledger_log_and_progress(make_orchestrator, fake_rscript, tmp_path):
+    job = job_spec("C.1", outcomes=("incidence", "prevalence"))
+    orchestrator = make_orchestrator([job])
+    orchestrator.ledger = JobLedger(tmp_path / "ledger.jsonl")
+    orchestrator.progress = PlotProgress(2)
+
+    result = orchestrator.execute_job(job)
+    assert result["success"] is True and result["return_code"] == 0
+    assert result["generated_plots"] == 2
+    assert result["stderr"] == "warning: slow"
+    assert orchestrator.ledger.plots(job) == [
+        "incidence_mean.and.interval_none", "prevalence_mean.and.interval_none"
+    ]
+    assert orchestrator.progress.done == 2
+
+    log = Path(result["log_file"]).read_text()
+    assert "[stdout] SUCCESS: Generated incidence_mean.and.interval_none" in log
+    assert "[stderr] warning: slow" in log
+    orchestrator.ledger.close()
+
+
+def test_execute_job_reports_exit_codes(make_orchestrator, fake_rscript, monkeypatch):
+    monkeypatch.setenv("FAKE_R_EXIT", "3")
+    job = job_spec("C.1")
+    result = make_orchestrator([job]).execute_job(job)
+    assert result["success"] is False and result["return_code"] == 3
+    assert result["generated_plots"] == 1
+
+
+def test_forced_jobs_regenerate_existing_plots(make_orchestrator):
+    jobs = [job_spec("C.1"), dict(job_spec("C.2"), force=True)]
+    orchestrator = make_orchestrator(jobs)
+    commands = {}
+
+    def run_rscript(job, key, cmd, handle_line):
+        commands[job["city"]] = cmd
+        return {"success": True, "return_code": 0}
+    orchestrator._run_rscript = run_rscript
+
+    for job in jobs:
+        orchestrator.execute_job(job)
+    assert "--skip-existing" in commands["C.1"]
+    assert "--skip-existing" not in commands["C.2"]
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from orchestration_cost_model import (
+    DEFAULT_SECONDS_PER_PLOT, CostModel, facet_depth, load_job_results, plot_counts
+)
+
+TRUE_RATES = {("mean.and.interval", 0): 2.0, ("mean.and.interval", 1): 8.0, ("median.and.interval", 2): 20.0}
+
+
+def _job(city, statistics, facets, outcomes=10, scenarios=30):
+    return {"city": city, "scenarios": [f"s{i}" for i in range(scenarios)],
+            "outcomes": [f"o{i}" for i in range(outcomes)], "statistics": statistics, "facets": facets}
+
+
+def _result(job, city_factor=1.0, **extra):
+    duration = sum(count * TRUE_RATES[key] for key, count in plot_counts(job).items()) * city_factor
+    return dict({"job": job, "success": True, "duration": duration}, **extra)
+
+
+def _history():
+    return [
+        _result(_job("C.1", ["mean.and.interval"], ["none"])),
+        _result(_job("C.1", ["mean.and.interval"], ["age", "sex"])),
+        _result(_job("C.2", ["mean.and.interval"], ["none", "race"], outcomes=7)),
+        _result(_job("C.2", ["median.and.interval"], ["age+sex", "race+risk"])),
+        _result(_job("C.3", ["mean.and.interval"], ["none", "age"], outcomes=5)),
+    ]
+
+
+def test_plot_counts_by_statistic_and_facet_depth():
+    assert facet_depth("none") == 0 and facet_depth("age+sex+race") == 3
+    job = _job("C.1", ["mean.and.interval", "median.and.interval"], ["none", "age", "sex", "age+sex"], outcomes=2, scenarios=3)
+    assert plot_counts(job) == {
+        ("mean.and.interval", 0): 6, ("mean.and.interval", 1): 12, ("mean.and.interval", 2): 6,
+        ("median.and.interval", 0): 6, ("median.and.interval", 1): 12, ("median.and.interval", 2): 6
+    }
+
+
+def test_without_history_every_plot_costs_the_default(tmp_path):
+    model = CostModel.fit(tmp_path)
+    assert model.samples == 0
+    job = _job("C.1", ["mean.and.interval"], ["none", "age"])
+    assert model.estimate(job) == pytest.approx(600 * DEFAULT_SECONDS_PER_PLOT)
+    assert model.describe() == [f"no history, {DEFAULT_SECONDS_PER_PLOT} s/plot"]
+
+
+def test_ridge_fit_recovers_per_plot_rates(tmp_path):
+    model = CostModel.fit(tmp_path, extra_results=_history())
+    assert model.samples == 5
+    for key, rate in TRUE_RATES.items():
+        assert model.coefficients[key] == pytest.approx(rate, rel=0.05)
+
+    job = _job("C.9", ["mean.and.interval"], ["age+sex"])
+    # Unseen combinations and cities fall back to the prior
+    assert model.estimate(job) == pytest.approx(300 * DEFAULT_SECONDS_PER_PLOT)
+
+
+def test_sparse_history_is_pulled_towards_the_prior(tmp_path):
+    one_plot = _job("C.1", ["mean.and.interval"], ["none"], outcomes=1, scenarios=1)
+    model = CostModel.fit(tmp_path, extra_results=[dict(_result(one_plot), duration=100.0)])
+    rate = model.coefficients[("mean.and.interval", 0)]
+    # One 100 s plot against ten plots' worth of prior stays near 4.05 s
+    assert DEFAULT_SECONDS_PER_PLOT < rate < 10.0
+
+
+def test_city_factor_captures_consistently_slow_cities(tmp_path):
+    history = _history() + [
+        _result(_job("C.slow", ["mean.and.interval"], ["none", "age"]), city_factor=2.0),
+        _result(_job("C.slow", ["mean.and.interval"], ["sex"]), city_factor=2.0),
+    ]
+    model = CostModel.fit(tmp_path, extra_results=history)
+    # The slow city also inflates the shared rates, but relative to a city
+    # with the same mix of facets it is twice as slow
+    assert model.city_factors["C.slow"] > 1.0 > model.city_factors["C.1"]
+    assert model.city_factors["C.slow"] / model.city_factors["C.1"] == pytest.approx(2.0, rel=0.05)
+
+    job = _job("C.slow", ["mean.and.interval"], ["none"])
+    assert model.estimate(job) == pytest.approx(
+        model.estimate(job, city_factor=False) * model.city_factors["C.slow"]
+    )
+
+
+def test_history_is_read_from_results_files(tmp_path):
+    history = _history()
+    (tmp_path / "orchestration_results_20260101_000000.json").write_text(json.dumps({"job_results": history[:3] + [
+        dict(history[3], success=False),
+        dict(history[3], resumed=True),
+        {"success": True, "duration": 5.0, "city": "C.1"}
+    ]}))
+    (tmp_path / "orchestration_results_20260102_000000.json").write_text("{not json")
+    (tmp_path / "unrelated.json").write_text(json.dumps({"job_results": history}))
+
+    assert load_job_results(tmp_path) == history[:3]
+    model = CostModel.fit(tmp_path, extra_results=[history[3], dict(history[4], resumed=True)])
+    assert model.samples == 4
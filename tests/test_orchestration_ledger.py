@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from orchestration_ledger import FAILED, RUNNING, SUCCEEDED, JobLedger, job_id
+
+JOB = {"city": "C.12580", "scenarios": ["cessation"], "outcomes": ["incidence"],
+       "statistics": ["mean.and.interval"], "facets": ["none"], "expected_plots": 1}
+OTHER = dict(JOB, city="C.35620")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "results" / "ledger.jsonl"
+
+
+def test_job_id_depends_only_on_the_job_spec():
+    assert job_id(JOB) == job_id(dict(JOB, expected_plots=99, chunk="scenario=cessation"))
+    assert job_id(JOB) != job_id(OTHER)
+
+
+def test_state_survives_a_reload(path):
+    ledger = JobLedger(path)
+    ledger.start_run(False)
+    ledger.job_started(JOB)
+    ledger.plot_generated(JOB, "incidence_mean.and.interval_none")
+    ledger.job_finished(JOB, {"success": True, "duration": 3.0, "stdout": "x" * 10000, "stderr": "boom"})
+    ledger.job_started(OTHER)
+    ledger.close()
+
+    reloaded = JobLedger(path)
+    assert reloaded.state(JOB) == SUCCEEDED
+    assert reloaded.state(OTHER) == RUNNING
+    assert reloaded.plots(JOB) == ["incidence_mean.and.interval_none"]
+    result = reloaded.completed_result(JOB)
+    assert result["duration"] == 3.0 and result["stderr_tail"] == "boom"
+    assert "stdout" not in result and "stderr" not in result
+    assert reloaded.completed_result(OTHER) is None
+    reloaded.close()
+
+
+def test_torn_last_line_is_ignored_and_terminated(path):
+    ledger = JobLedger(path)
+    ledger.job_started(JOB)
+    ledger._file.close()
+    with open(path, "a") as f:
+        f.write('{"type": "job", "job_id": "torn')
+
+    ledger = JobLedger(path)
+    assert ledger.state(JOB) == RUNNING
+    ledger.job_finished(JOB, {"success": False})
+    ledger._file.close()
+
+    assert JobLedger(path).state(JOB) == FAILED
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[-1])["state"] == FAILED
+
+
+def test_well_formed_lines_missing_fields_are_skipped(path):
+    ledger = JobLedger(path)
+    ledger.job_started(JOB)
+    ledger.plot_generated(JOB, "incidence_mean.and.interval_none")
+    ledger._file.close()
+    with open(path, "a") as f:
+        f.write(json.dumps({"type": "plot", "plot": "no_job_id"}) + "\n")
+        f.write(json.dumps({"type": "plot", "job_id": job_id(JOB)}) + "\n")
+        f.write(json.dumps({"type": "job", "state": SUCCEEDED}) + "\n")
+
+    ledger = JobLedger(path)
+    assert ledger.state(JOB) == RUNNING
+    assert ledger.plots(JOB) == ["incidence_mean.and.interval_none"]
+    ledger.close()
+
+
+def test_repeated_plot_lines_are_recorded_once_across_snapshots(path):
+    ledger = JobLedger(path)
+    for plot in ("a", "b", "a"):
+        ledger.plot_generated(JOB, plot)
+    ledger.close()
+
+    ledger = JobLedger(path)
+    for plot in ("b", "c"):
+        ledger.plot_generated(JOB, plot)
+    assert ledger.plots(JOB) == ["a", "b", "c"]
+    ledger.close()
+    assert JobLedger(path).plots(JOB) == ["a", "b", "c"]
+
+
+def test_snapshot_replays_only_later_lines(path):
+    ledger = JobLedger(path)
+    ledger.job_started(JOB)
+    ledger.checkpoint()
+    snapshot = json.loads(ledger.snapshot_path.read_text())
+    assert snapshot["offset"] == path.stat().st_size
+    ledger.job_finished(JOB, {"success": True})
+    ledger._file.close()
+
+    # Lines before the offset are taken from the snapshot, not replayed
+    assert JobLedger(path).jobs[job_id(JOB)]["attempts"] == 1
+    assert JobLedger(path).state(JOB) == SUCCEEDED
+
+    # A ledger shorter than the snapshot offset was replaced: replay it all
+    path.write_text("")
+    assert JobLedger(path).state(JOB) is None
+
+
+def test_fresh_run_discards_earlier_state_but_resume_keeps_it(path):
+    ledger = JobLedger(path)
+    ledger.job_finished(JOB, {"success": True})
+    ledger.start_run(True)
+    assert ledger.completed_result(JOB) is not None
+    ledger.start_run(False)
+    assert ledger.completed_result(JOB) is None
+    ledger.close()
+
+    assert JobLedger(path).state(JOB) is None
+    # History stays in the file
+    assert sum(1 for line in path.read_text().splitlines() if '"job"' in line) == 1
+
+
+def test_attempts_count_each_start(path):
+    ledger = JobLedger(path)
+    for _ in range(3):
+        ledger.job_started(JOB)
+        ledger.job_finished(JOB, {"success": False})
+    assert ledger.jobs[job_id(JOB)]["attempts"] == 3
+    ledger.close()
@@ -0,0 +1,129 @@
+import itertools
+import json
+import random
+import sys
+
+import yaml
+
+import plan_incremental_jobs
+from plan_incremental_jobs import find_missing, group_missing, query_registered, read_manifest, write_manifest
+
+CITIES = ["C.1", "C.2"]
+SCENARIOS = ["cessation", "brief"]
+OUTCOMES = ["incidence", "prevalence", "diagnosed"]
+STATISTICS = ["mean.and.interval", "median.and.interval"]
+FACETS = ["none", "age", "sex"]
+DESIRED = list(itertools.product(CITIES, SCENARIOS, OUTCOMES, STATISTICS, FACETS))
+
+
+def _expand(groups):
+    """Every combination the grouped jobs would generate, counting repeats"""
+    plots = []
+    for city, scenarios, outcomes, statistics, facets in groups:
+        plots.extend(itertools.product([city], scenarios, outcomes, statistics, facets))
+    return plots
+
+
+def test_find_missing_includes_absent_and_stale_plots():
+    registered = {combination: "2026-05-01T00:00:00Z" for combination in DESIRED[:-3]}
+    registered[DESIRED[0]] = "2026-01-01T00:00:00Z"
+    registered[DESIRED[1]] = None
+
+    assert find_missing(DESIRED, registered) == set(DESIRED[-3:])
+    assert find_missing(DESIRED, registered, "2026-03-01T00:00:00Z") == set(DESIRED[-3:]) | {DESIRED[0], DESIRED[1]}
+
+
+def test_one_outcome_missing_everywhere_is_one_job_per_city():
+    missing = {combination for combination in DESIRED if combination[2] == "diagnosed"}
+    assert group_missing(missing) == [
+        ("C.1", sorted(SCENARIOS), ["diagnosed"], sorted(STATISTICS), sorted(FACETS)),
+        ("C.2", sorted(SCENARIOS), ["diagnosed"], sorted(STATISTICS), sorted(FACETS)),
+    ]
+
+
+def test_groups_are_an_exact_cover_of_random_gaps():
+    rng = random.Random(23)
+    for _ in range(50):
+        missing = {combination for combination in DESIRED if rng.random() < 0.3}
+        groups = group_missing(missing)
+        plots = _expand(groups)
+        # Nothing already registered is regenerated, and nothing is generated twice
+        assert len(plots) == len(set(plots))
+        assert set(plots) == missing
+        cities = [group[0] for group in groups]
+        assert cities == sorted(cities)
+
+
+def test_manifest_round_trip_and_table_key_format(tmp_path):
+    registered = {DESIRED[0]: "2026-05-01T00:00:00Z", DESIRED[7]: None}
+    path = tmp_path / "manifest.jsonl"
+    write_manifest(registered, path)
+    assert read_manifest(path) == registered
+
+    table_export = tmp_path / "export.json"
+    table_export.write_text(json.dumps([{
+        "city_scenario": "C.1#cessation",
+        "outcome_stat_facet": "incidence#mean.and.interval#age+sex",
+        "created_at": "2026-05-01T00:00:00Z"
+    }]))
+    assert read_manifest(table_export) == {
+        ("C.1", "cessation", "incidence", "mean.and.interval", "age+sex"): "2026-05-01T00:00:00Z"
+    }
+
+
+def test_query_registered_reads_each_partition(table):
+    table.put_item(Item={"city_scenario": "C.1#cessation", "outcome_stat_facet": "incidence#mean.and.interval#none",
+                         "created_at": "2026-05-01T00:00:00Z"})
+    table.put_item(Item={"city_scenario": "C.2#brief", "outcome_stat_facet": "prevalence#mean.and.interval#age"})
+    # Catalog counters and other cities are not plots of the requested partitions
+    table.put_item(Item={"city_scenario": "_catalog_0", "outcome_stat_facet": "C.1#cessation"})
+    table.put_item(Item={"city_scenario": "C.9#cessation", "outcome_stat_facet": "incidence#mean.and.interval#none"})
+
+    assert query_registered(CITIES, SCENARIOS, workers=2) == {
+        ("C.1", "cessation", "incidence", "mean.and.interval", "none"): "2026-05-01T00:00:00Z",
+        ("C.2", "brief", "prevalence", "mean.and.interval", "age"): None,
+    }
+
+
+def test_main_writes_a_config_for_only_the_missing_plots(tmp_path, monkeypatch):
+    manifest = tmp_path / "manifest.jsonl"
+    write_manifest({combination: "2026-05-01T00:00:00Z" for combination in DESIRED
+                    if combination[0] == "C.1" or combination[2] != "diagnosed"}, manifest)
+    output = tmp_path / "incremental.yaml"
+    monkeypatch.setattr(sys, "argv", [
+        "plan_incremental_jobs.py", "--cities", ",".join(CITIES), "--scenarios", ",".join(SCENARIOS),
+        "--outcomes", ",".join(OUTCOMES), "--statistics", ",".join(STATISTICS), "--facets", ",".join(FACETS),
+        "--manifest", str(manifest), "--output", str(output), "--results-dir", str(tmp_path)
+    ])
+    plan_incremental_jobs.main()
+
+    config = yaml.safe_load(output.read_text())
+    assert config["total_jobs"] == 1
+    job = config["jobs"][0]
+    assert job["city"] == "C.2" and job["outcomes"] == ["diagnosed"]
+    assert job["expected_plots"] == config["total_expected_plots"] == 12
+    assert "force" not in job
+
+
+def test_stale_plots_are_replanned_with_force(tmp_path, monkeypatch):
+    manifest = tmp_path / "manifest.jsonl"
+    registered = {combination: "2026-05-01T00:00:00Z" for combination in DESIRED if combination[0] == "C.1"}
+    # Registered without a created_at: older than any cutoff
+    registered[("C.1", "brief", "incidence", "mean.and.interval", "none")] = None
+    write_manifest(registered, manifest)
+    output = tmp_path / "incremental.yaml"
+    monkeypatch.setattr(sys, "argv", [
+        "plan_incremental_jobs.py", "--cities", ",".join(CITIES), "--scenarios", ",".join(SCENARIOS),
+        "--outcomes", ",".join(OUTCOMES), "--statistics", ",".join(STATISTICS), "--facets", ",".join(FACETS),
+        "--manifest", str(manifest), "--output", str(output), "--results-dir", str(tmp_path),
+        "--stale-before", "2026-01-01T00:00:00Z"
+    ])
+    plan_incremental_jobs.main()
+
+    jobs = yaml.safe_load(output.read_text())["jobs"]
+    forced = [job for job in jobs if job.get("force")]
+    assert [(job["city"], job["scenarios"], job["outcomes"]) for job in forced] == [
+        ("C.1", ["brief"], ["incidence"])
+    ]
+    # C.2 was never registered, so R's --skip-existing can stay on
+    assert {job["city"] for job in jobs if not job.get("force")} == {"C.2"}
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+from build_plot_bundles import build_plot_bundles, collect_partitions, prune_bundles, upload_bundle
+from src.handlers.plot_bundle import (
+    bundle_etag, bundle_key, bundle_ref, byte_range, index_bytes, member_etag, split_bundle_ref, write_bundle
+)
+from src.handlers.plot_cache import plot_cache
+from src.handlers.plot_retrieval import get_plot
+from tests.conftest import BUCKET, plot_items, write_plot
+
+MEMBERS = {
+    "prevalence#mean.and.interval#none": b'{"outcome": "prevalence"}',
+    "incidence#mean.and.interval#age": b'{"outcome": "incidence", "data": [1, 2, 3]}',
+}
+
+
+def _get(params, headers=None):
+    return get_plot({"queryStringParameters": params, "headers": headers or {}}, None)
+
+
+def _keys(s3):
+    return sorted(item["Key"] for item in s3.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+def test_write_bundle_offsets_address_each_member():
+    body, index = write_bundle(MEMBERS)
+    assert list(index["plots"]) == sorted(MEMBERS)
+    for outcome_stat_facet, (offset, length) in index["plots"].items():
+        assert body[offset:offset + length] == MEMBERS[outcome_stat_facet]
+    assert len(body) == sum(len(raw) for raw in MEMBERS.values())
+
+    # Same plots in any order give the same bytes, so the same key
+    assert write_bundle(dict(reversed(list(MEMBERS.items())))) == (body, index)
+    assert json.loads(index_bytes(index)) == index
+
+    with pytest.raises(ValueError):
+        write_bundle({"incidence#mean.and.interval#none": b"{broken"})
+
+
+def test_bundle_refs_ranges_and_member_etags():
+    key = bundle_key("C.1", "cessation", "ab" * 32)
+    assert key == f"plots/bundles/C.1/cessation/{'ab' * 8}.bundle"
+
+    ref = bundle_ref(key, 120, 30)
+    assert split_bundle_ref(ref) == (key, 120, 30)
+    assert split_bundle_ref("plots/C.1/cessation/incidence.json") is None
+    assert split_bundle_ref(None) is None
+    assert byte_range(120, 30) == "bytes=120-149"
+
+    tag = member_etag('"abc"', 120, 30)
+    assert tag == '"abc:120+30"'
+    assert bundle_etag(tag, 120, 30) == '"abc"'
+    # A tag for another member of the same bundle does not map back
+    assert bundle_etag(tag, 150, 30) is None
+    assert member_etag(None, 0, 1) is None
+
+
+@pytest.fixture
+def bundled(s3):
+    body, index = write_bundle(MEMBERS)
+    key = bundle_key("C.1", "cessation", index["content_hash"])
+    assert upload_bundle(s3, BUCKET, key, body, index) is True
+    return key, index
+
+
+def test_get_plot_reads_a_member_with_a_ranged_get(bundled, s3):
+    key, index = bundled
+    requests = []
+    s3.meta.events.register("provide-client-params.s3.GetObject",
+                            lambda params, **kwargs: requests.append(dict(params)))
+
+    for outcome_stat_facet, (offset, length) in index["plots"].items():
+        response = _get({"plotKey": bundle_ref(key, offset, length), "delivery": "redirect"})
+        assert response["statusCode"] == 200
+        assert response["body"].encode() == MEMBERS[outcome_stat_facet]
+    assert [(params["Key"], params["Range"]) for params in requests] == [
+        (key, byte_range(offset, length)) for offset, length in index["plots"].values()
+    ]
+
+
+def test_member_etags_are_distinct_and_revalidate_against_the_bundle(bundled, s3):
+    key, index = bundled
+    first, second = [bundle_ref(key, offset, length) for offset, length in index["plots"].values()]
+    bundle_tag = s3.head_object(Bucket=BUCKET, Key=key)["ETag"]
+
+    etag = _get({"plotKey": first})["headers"]["ETag"]
+    assert etag == member_etag(bundle_tag, *split_bundle_ref(first)[1:])
+    assert _get({"plotKey": second})["headers"]["ETag"] != etag
+
+    assert _get({"plotKey": first}, {"If-None-Match": etag})["statusCode"] == 304
+    # Without a cached copy the check goes to S3 with the bundle's ETag
+    plot_cache.clear()
+    not_modified = _get({"plotKey": first}, {"If-None-Match": etag})
+    assert not_modified["statusCode"] == 304 and not_modified["headers"]["ETag"] == etag
+    # Another member's tag is not a match
+    plot_cache.clear()
+    assert _get({"plotKey": second}, {"If-None-Match": etag})["statusCode"] == 200
+
+
+def test_collect_partitions_groups_plots_by_city_and_scenario(tmp_path):
+    write_plot(tmp_path, "C.1", "cessation", "incidence")
+    write_plot(tmp_path, "C.1", "cessation", "incidence", facet="age")
+    write_plot(tmp_path, "C.1", "brief", "incidence")
+    orphan = tmp_path / "C.2" / "brief" / "orphan.json"
+    orphan.parent.mkdir(parents=True)
+    orphan.write_text("{}")
+
+    partitions, errors = collect_partitions(tmp_path)
+    assert {partition: sorted(members) for partition, members in partitions.items()} == {
+        ("C.1", "cessation"): ["incidence#mean.and.interval#age", "incidence#mean.and.interval#none"],
+        ("C.1", "brief"): ["incidence#mean.and.interval#none"],
+    }
+    assert len(errors) == 1 and str(orphan) in errors[0]
+
+
+def test_build_registers_members_and_reruns_are_unchanged(s3, table, tmp_path):
+    write_plot(tmp_path, "C.1", "cessation", "incidence")
+    write_plot(tmp_path, "C.1", "cessation", "prevalence")
+    write_plot(tmp_path, "C.1", "brief", "incidence")
+
+    stats = build_plot_bundles(tmp_path, BUCKET, output_dir=tmp_path / "out")
+    assert (stats["partitions"], stats["plots"], stats["uploaded"], stats["registered"], stats["failed"]) == (2, 3, 2, 3, 0)
+    # Each bundle sits next to its index, locally and in S3
+    assert len(_keys(s3)) == 4 and all((tmp_path / "out" / key).is_file() for key in _keys(s3))
+
+    item = table.get_item(Key={"city_scenario": "C.1#cessation",
+                               "outcome_stat_facet": "prevalence#mean.and.interval#none"})["Item"]
+    key, offset, length = split_bundle_ref(item["s3_key"])
+    assert (item["bundle_offset"], item["bundle_length"]) == (offset, length)
+    plot = (tmp_path / "C.1" / "cessation" / "prevalence_mean.and.interval_none.json").read_bytes()
+    assert s3.get_object(Bucket=BUCKET, Key=key, Range=byte_range(offset, length))["Body"].read() == plot
+
+    rerun = build_plot_bundles(tmp_path, BUCKET)
+    assert (rerun["uploaded"], rerun["registered"], rerun["unchanged"]) == (0, 0, 3)
+
+
+def test_changed_partition_gets_a_new_bundle_and_prune_removes_the_old(s3, table, tmp_path):
+    write_plot(tmp_path, "C.1", "cessation", "incidence")
+    build_plot_bundles(tmp_path, BUCKET)
+    old_keys = _keys(s3)
+
+    write_plot(tmp_path, "C.1", "cessation", "incidence", body=json.dumps({"data": "regenerated"}))
+    stats = build_plot_bundles(tmp_path, BUCKET, prune=True)
+    assert (stats["uploaded"], stats["registered"], stats["pruned"]) == (1, 1, 1)
+
+    (item,) = plot_items(table)
+    new_key = split_bundle_ref(item["s3_key"])[0]
+    assert _keys(s3) == [new_key, f"{new_key}.index.json"]
+    assert not set(old_keys) & set(_keys(s3))
+    assert prune_bundles(s3, BUCKET, new_key) == 0
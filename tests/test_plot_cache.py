@@ -0,0 +1,57 @@
+import json
+
+from src.handlers.plot_cache import PlotCache, plot_cache
+from src.handlers.plot_retrieval import fetch_plot
+from tests.conftest import BUCKET
+
+
+def test_lru_eviction_keeps_the_byte_budget():
+    cache = PlotCache(max_bytes=100, ttl_seconds=60, max_entry_bytes=60)
+    cache.put('a', b'a', None, None, 40)
+    cache.put('b', b'b', None, None, 40)
+    cache.get('a')  # a is now most recently used
+    cache.put('c', b'c', None, None, 40)
+
+    assert cache.get('b') == (None, False)
+    assert cache.get('a')[0] is not None and cache.get('c')[0] is not None
+    assert cache.current_bytes == 80 and cache.evictions == 1
+
+
+def test_replacing_an_entry_adjusts_the_size_and_oversized_bodies_are_skipped():
+    cache = PlotCache(max_bytes=100, ttl_seconds=60, max_entry_bytes=50)
+    cache.put('a', b'a', None, None, 30)
+    cache.put('a', b'aa', None, None, 20)
+    cache.put('big', b'x', None, None, 51)
+    assert cache.current_bytes == 20 and cache.get('big') == (None, False)
+
+
+def test_entries_go_stale_after_the_ttl_until_marked_fresh():
+    cache = PlotCache(max_bytes=100, ttl_seconds=0, max_entry_bytes=100)
+    cache.put('a', b'a', '"e"', None, 1)
+    assert cache.get('a')[1] is False
+    cache.ttl_seconds = 60
+    cache.mark_fresh('a')
+    assert cache.get('a')[1] is True
+
+
+def test_fetch_plot_hits_then_revalidates_by_etag(s3, monkeypatch):
+    s3.put_object(Bucket=BUCKET, Key='plots/a.json', Body=json.dumps({'data': [1]}).encode())
+
+    body, etag, _, status = fetch_plot(s3, BUCKET, 'plots/a.json')
+    assert json.loads(body) == {'data': [1]} and status == 'miss'
+    assert fetch_plot(s3, BUCKET, 'plots/a.json')[3] == 'hit'
+
+    monkeypatch.setattr(plot_cache, 'ttl_seconds', 0)
+    body, revalidated_etag, _, status = fetch_plot(s3, BUCKET, 'plots/a.json')
+    assert status == 'revalidated' and revalidated_etag == etag
+
+    # A changed object replaces the stale entry
+    s3.put_object(Bucket=BUCKET, Key='plots/a.json', Body=json.dumps({'data': [2]}).encode())
+    body, new_etag, _, status = fetch_plot(s3, BUCKET, 'plots/a.json')
+    assert status == 'miss' and new_etag != etag and json.loads(body) == {'data': [2]}
+
+
+def test_missing_optional_objects_are_cached_as_absent(s3):
+    assert fetch_plot(s3, BUCKET, 'plots/a.json.gz', validate=False, missing_ok=True) is None
+    assert fetch_plot(s3, BUCKET, 'plots/a.json.gz', validate=False, missing_ok=True) is None
+    assert plot_cache.stats()['hits'] >= 1
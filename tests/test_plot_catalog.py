@@ -0,0 +1,88 @@
+import json
+
+from src.handlers import aws_clients, plot_discovery
+from src.handlers.plot_catalog import (
+    CATALOG_PREFIX, apply_catalog_delta, catalog_key, compare_catalog, read_catalog, scan_catalog, write_catalog
+)
+from src.handlers.plot_discovery import get_all_available_cities, register_plot, register_plots_batch
+from tests.conftest import plot_record
+
+
+def _cities():
+    response = get_all_available_cities({'headers': {}}, None)
+    assert response['statusCode'] == 200
+    return json.loads(response['body'])
+
+
+def _register_batch(records):
+    response = register_plots_batch({'body': json.dumps({'plots': records})}, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_cities_fall_back_to_a_parallel_scan_without_an_index(table):
+    for city, scenario in [('C.1', 'a'), ('C.1', 'b'), ('C.2', 'a')]:
+        record = plot_record(city=city, scenario=scenario)
+        table.put_item(Item={'city_scenario': f'{city}#{scenario}', 'outcome_stat_facet': 'x#y#z',
+                             's3_key': record['s3_key'], 'file_size': 1})
+    body = _cities()
+    assert body['cities'] == {'C.1': ['a', 'b'], 'C.2': ['a']}
+    assert body['last_updated'] is None
+
+
+def test_registrations_maintain_sharded_counters(table, monkeypatch):
+    monkeypatch.setenv('CATALOG_SHARDS', '4')
+    register_plot({'body': json.dumps(plot_record(city='C.1', file_size=10))}, None)
+    register_plot({'body': json.dumps(plot_record(city='C.1', file_size=30))}, None)  # same key: size change only
+    status, _ = _register_batch([plot_record(city='C.2', outcome=o, file_size=5) for o in ('a', 'b', 'c')])
+    assert status == 201
+
+    catalog = read_catalog(table)
+    entries = {cs: (int(e['plot_count']), int(e['total_bytes'])) for cs, e in catalog['partitions'].items()}
+    assert entries == {'C.1#cessation': (1, 30), 'C.2#cessation': (3, 15)}
+    assert catalog_key('C.1#cessation')['city_scenario'].startswith(CATALOG_PREFIX)
+    assert compare_catalog(catalog['partitions'], scan_catalog(aws_clients.get_plot_table, 2)) == []
+    assert _cities()['cities'] == {'C.1': ['cessation'], 'C.2': ['cessation']}
+
+
+def test_failed_batch_writes_are_not_counted(table, monkeypatch):
+    records = [plot_record(outcome=f'o{i}') for i in range(30)]
+
+    def write_first_chunk_only(resource, table_name, items, max_attempts=8):
+        if items[0]['outcome'] == 'o0':
+            resource.batch_write_item(RequestItems={table_name: [{'PutRequest': {'Item': i}} for i in items]})
+            return [], None
+        return items, RuntimeError('connection reset')
+
+    monkeypatch.setattr(plot_discovery, 'batch_put_chunk', write_first_chunk_only)
+    monkeypatch.setenv('BATCH_REGISTER_WORKERS', '1')
+    status, body = _register_batch(records)
+    assert status == 207 and body['registered'] == 25 and body['failed'] == 5
+    assert 'connection reset' in body['results'][-1]['error']
+
+    catalog = read_catalog(table)
+    assert int(catalog['partitions']['C.12580#cessation']['plot_count']) == 25
+    assert compare_catalog(catalog['partitions'], scan_catalog(aws_clients.get_plot_table, 1)) == []
+
+
+def test_rebuild_recounts_partitions_changed_during_the_scan(table):
+    register_plot({'body': json.dumps(plot_record(outcome='a', file_size=1))}, None)
+    before = read_catalog(table)['partitions']
+    scanned = scan_catalog(aws_clients.get_plot_table, 2)
+
+    # A registration lands after the scan but before the rebuild writes
+    register_plot({'body': json.dumps(plot_record(outcome='b', file_size=2))}, None)
+    recounted = write_catalog(table, scanned, before)
+
+    assert recounted == 1
+    entry = read_catalog(table)['partitions']['C.12580#cessation']
+    assert (int(entry['plot_count']), int(entry['total_bytes'])) == (2, 3)
+
+
+def test_rebuild_zeroes_partitions_that_disappeared_and_drops_the_legacy_item(table):
+    apply_catalog_delta(table, 'C.9#gone', 4, 400)
+    table.put_item(Item={'city_scenario': '_catalog', 'outcome_stat_facet': '_index', 'partitions': {}})
+    write_catalog(table, {}, read_catalog(table)['partitions'])
+
+    assert int(read_catalog(table)['partitions']['C.9#gone']['plot_count']) == 0
+    assert 'Item' not in table.get_item(Key={'city_scenario': '_catalog', 'outcome_stat_facet': '_index'})
+    assert _cities()['cities'] == {}
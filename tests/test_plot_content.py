@@ -0,0 +1,55 @@
+import hashlib
+
+import pytest
+
+from src.handlers.plot_content import CONTENT_HASH_PATTERN, content_hash, content_key, store_plot
+from src.handlers.plot_validation import VALIDATED_METADATA_KEY
+from tests.conftest import BUCKET
+
+BODY = b'{"data": [1, 2, 3]}'
+
+
+class CountingS3:
+    """Passes calls through to the real client, counting PUTs"""
+
+    def __init__(self, client):
+        self.client = client
+        self.puts = 0
+
+    def head_object(self, **kwargs):
+        return self.client.head_object(**kwargs)
+
+    def put_object(self, **kwargs):
+        self.puts += 1
+        return self.client.put_object(**kwargs)
+
+
+def test_content_hash_and_key_layout(monkeypatch):
+    digest = content_hash(BODY)
+    assert digest == hashlib.sha256(BODY).hexdigest()
+    assert CONTENT_HASH_PATTERN.match(digest)
+    assert content_key(digest) == f"plots/sha256/{digest[:2]}/{digest}.json"
+
+    monkeypatch.setenv("CONTENT_ADDRESSED_PREFIX", "cas/")
+    assert content_key(digest) == f"cas/{digest[:2]}/{digest}.json"
+
+
+def test_store_plot_uploads_each_body_once(s3):
+    client = CountingS3(s3)
+    key, digest, uploaded = store_plot(client, BUCKET, BODY)
+    assert uploaded is True and key == content_key(digest)
+
+    head = s3.head_object(Bucket=BUCKET, Key=key)
+    assert head["Metadata"] == {VALIDATED_METADATA_KEY: "true", "sha256": digest}
+    assert head["ContentType"] == "application/json"
+
+    assert store_plot(client, BUCKET, BODY) == (key, digest, False)
+    assert client.puts == 1
+
+    other_key, _, uploaded = store_plot(client, BUCKET, BODY + b" ")
+    assert uploaded is True and other_key != key
+
+
+def test_store_plot_rejects_invalid_json(s3):
+    with pytest.raises(ValueError):
+        store_plot(s3, BUCKET, b"{not json")
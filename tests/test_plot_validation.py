@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from src.handlers.plot_content import content_hash, content_key
+from src.handlers.plot_discovery import register_plot, register_plots_batch
+from src.handlers.plot_retrieval import fetch_plot
+from src.handlers.plot_validation import VALIDATED_METADATA_KEY, is_tagged_valid, tag_plot_validated
+from tag_validated_plots import tag_plots, untagged_plot_keys
+from tests.conftest import BUCKET, plot_record
+
+PLOT = json.dumps({'data': [1, 2, 3]}).encode()
+
+
+def _metadata(s3, key):
+    return s3.head_object(Bucket=BUCKET, Key=key)['Metadata']
+
+
+def test_registration_does_not_read_s3(s3, table, monkeypatch):
+    calls = []
+    monkeypatch.setattr(s3, 'head_object', lambda **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(s3, 'get_object', lambda **kwargs: calls.append(kwargs))
+    records = [plot_record(outcome=o) for o in ('a', 'b')]
+
+    assert register_plots_batch({'body': json.dumps({'plots': records})}, None)['statusCode'] == 201
+    body = json.loads(register_plot({'body': json.dumps(plot_record(outcome='c'))}, None)['body'])
+    assert 'validated' not in body
+    assert calls == []
+
+
+def test_backfill_tags_only_plots_their_writer_did_not(s3, table):
+    digest = content_hash(PLOT)
+    records = [
+        plot_record(outcome='a'),
+        plot_record(outcome='b', s3_key='plots/C.12580/cessation/broken.json'),
+        plot_record(outcome='c', s3_key=content_key(digest), content_hash=digest),
+        plot_record(outcome='d', s3_key='plots/bundles/C.12580/cessation/abc.bundle#0+10'),
+        plot_record(city='C.1', outcome='e', s3_key='plots/C.1/cessation/e.json'),
+    ]
+    register_plots_batch({'body': json.dumps({'plots': records})}, None)
+    s3.put_object(Bucket=BUCKET, Key=records[0]['s3_key'], Body=PLOT)
+    s3.put_object(Bucket=BUCKET, Key=records[1]['s3_key'], Body=b'{not json')
+
+    assert untagged_plot_keys(2) == sorted([records[0]['s3_key'], records[1]['s3_key'], records[4]['s3_key']])
+    s3_keys = untagged_plot_keys(1, city='C.12580')
+    assert s3_keys == sorted([records[0]['s3_key'], records[1]['s3_key']])
+
+    stats = tag_plots(s3_keys, BUCKET, workers=2)
+    assert (stats['tagged'], stats['failed'], stats['errors']) == (1, 1, [records[1]['s3_key']])
+    assert is_tagged_valid(_metadata(s3, records[0]['s3_key']))
+    assert not is_tagged_valid(_metadata(s3, records[1]['s3_key']))
+
+
+def test_tagging_preserves_object_headers(s3):
+    s3.put_object(
+        Bucket=BUCKET, Key='plots/a.json', Body=PLOT,
+        ContentType='application/json; charset=utf-8', CacheControl='max-age=60',
+        ContentDisposition='inline', ContentLanguage='en', Metadata={'source': 'r'}
+    )
+    etag = s3.head_object(Bucket=BUCKET, Key='plots/a.json')['ETag']
+
+    assert tag_plot_validated(s3, BUCKET, 'plots/a.json') is True
+    head = s3.head_object(Bucket=BUCKET, Key='plots/a.json')
+    assert head['Metadata'] == {'source': 'r', VALIDATED_METADATA_KEY: 'true'}
+    assert head['ContentType'] == 'application/json; charset=utf-8'
+    assert head['CacheControl'] == 'max-age=60'
+    assert head['ContentDisposition'] == 'inline' and head['ContentLanguage'] == 'en'
+    assert head['ETag'] == etag
+
+
+def test_tagged_plots_are_served_without_parsing(s3, monkeypatch):
+    s3.put_object(Bucket=BUCKET, Key='plots/a.json', Body=PLOT, Metadata={VALIDATED_METADATA_KEY: 'true'})
+    s3.put_object(Bucket=BUCKET, Key='plots/b.json', Body=PLOT)
+    parsed = []
+    monkeypatch.setattr('src.handlers.plot_retrieval.validate_plot_bytes', parsed.append)
+
+    fetch_plot(s3, BUCKET, 'plots/a.json')
+    fetch_plot(s3, BUCKET, 'plots/b.json')
+    assert parsed == [PLOT]
+
+
+@pytest.mark.parametrize('metadata, expected', [(None, False), ({}, False), ({VALIDATED_METADATA_KEY: 'true'}, True)])
+def test_is_tagged_valid(metadata, expected):
+    assert is_tagged_valid(metadata) is expected
@@ -0,0 +1,66 @@
+import base64
+import json
+
+import pytest
+
+from src.handlers.plot_discovery import register_plot, register_plots_batch
+from tests.conftest import plot_record
+
+
+def _register_batch(records):
+    response = register_plots_batch({'body': json.dumps({'plots': records})}, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_batch_registers_every_record_across_chunks(table):
+    records = [plot_record(outcome=f'o{i}') for i in range(60)]
+    status, body = _register_batch(records)
+    assert status == 201 and body['registered'] == 60
+    assert [result['index'] for result in body['results']] == list(range(60))
+    assert table.scan(Select='COUNT')['Count'] == 60 + 1  # plus the catalog counter
+
+    item = table.get_item(Key={'city_scenario': 'C.12580#cessation',
+                               'outcome_stat_facet': 'o7#mean.and.interval#none'})['Item']
+    assert item['stat_facet_outcome'] == 'mean.and.interval#none#o7'
+
+
+def test_batch_reports_invalid_and_duplicate_records(table):
+    status, body = _register_batch([
+        plot_record(outcome='a'),
+        plot_record(outcome='b', file_size=-1),
+        {'city': 'C.1'},
+        plot_record(outcome='a'),
+        plot_record(outcome='c', content_hash='NOT-A-HASH'),
+    ])
+    assert status == 207
+    assert [result['status'] for result in body['results']] == ['registered', 'invalid', 'invalid', 'invalid', 'invalid']
+    assert 'Duplicate of plot at index 0' in body['results'][3]['error']
+    assert body['registered'] == 1 and body['invalid'] == 4
+
+
+@pytest.mark.parametrize('payload', [{}, {'plots': []}, {'plots': 'x'}])
+def test_batch_rejects_malformed_bodies(table, payload):
+    response = register_plots_batch({'body': json.dumps(payload)}, None)
+    assert response['statusCode'] == 400
+
+
+def test_batch_size_limit(table, monkeypatch):
+    monkeypatch.setenv('MAX_BATCH_REGISTER_PLOTS', '2')
+    status, _ = _register_batch([plot_record(outcome=o) for o in 'abc'])
+    assert status == 400
+
+
+def test_single_registration_requires_fields(table):
+    response = register_plot({'body': json.dumps({'city': 'C.1'})}, None)
+    assert response['statusCode'] == 400
+    assert 'Missing required fields' in json.loads(response['body'])['error']
+
+
+def test_base64_encoded_bodies_are_decoded(table):
+    # API Gateway base64-encodes application/json bodies, a binaryMediaType
+    def encoded(payload):
+        return {'body': base64.b64encode(json.dumps(payload).encode()).decode(), 'isBase64Encoded': True}
+
+    assert register_plot(encoded(plot_record(outcome='a')), None)['statusCode'] == 201
+    response = register_plots_batch(encoded({'plots': [plot_record(outcome='b')]}), None)
+    assert response['statusCode'] == 201 and json.loads(response['body'])['registered'] == 1
@@ -0,0 +1,105 @@
+import json
+
+from src.handlers import aws_clients
+from src.handlers.plot_discovery import search_plots
+from tests.conftest import create_plot_table, plot_record
+
+
+def _seed(table, outcomes=('incidence', 'prevalence', 'testing'),
+          statistics=('mean.and.interval', 'median.and.interval'), facets=('none', 'sex', 'age')):
+    for outcome in outcomes:
+        for statistic in statistics:
+            for facet in facets:
+                record = plot_record(outcome=outcome, statistic=statistic, facet=facet)
+                table.put_item(Item={
+                    'city_scenario': f"{record['city']}#{record['scenario']}",
+                    'outcome_stat_facet': f"{outcome}#{statistic}#{facet}",
+                    'stat_facet_outcome': f"{statistic}#{facet}#{outcome}",
+                    'outcome': outcome,
+                    'statistic_type': statistic,
+                    'facet_choice': facet,
+                    's3_key': record['s3_key'],
+                    'file_size': 100,
+                })
+
+
+def _search(**params):
+    params = dict({'city': 'C.12580', 'scenario': 'cessation'}, **params)
+    response = search_plots({'queryStringParameters': params, 'headers': {}}, None)
+    return response['statusCode'], json.loads(response['body'] or 'null')
+
+
+def _combos(plots):
+    return sorted((p['outcome'], p['statistic_type'], p['facet_choice']) for p in plots)
+
+
+def test_unpaged_search_returns_every_match(table):
+    _seed(table)
+    status, body = _search()
+    assert status == 200 and body['total_plots'] == 18 and body['next_token'] is None
+
+
+def test_paged_search_walks_all_pages_without_duplicates(table):
+    _seed(table)
+    seen, token, pages = [], None, 0
+    while True:
+        params = {'limit': '4'}
+        if token:
+            params['next_token'] = token
+        status, body = _search(**params)
+        assert status == 200 and len(body['plots']) <= 4
+        seen.extend(body['plots'])
+        pages += 1
+        token = body['next_token']
+        if not token:
+            break
+    assert pages == 5
+    assert len(_combos(seen)) == 18 == len(set(_combos(seen)))
+
+
+def test_exact_search_uses_request_order(table):
+    _seed(table)
+    status, body = _search(outcomes='testing,incidence', statistic='mean.and.interval', facet='none')
+    assert status == 200
+    assert [p['outcome'] for p in body['plots']] == ['testing', 'incidence']
+
+
+def test_bad_paging_parameters_are_rejected(table):
+    assert _search(limit='0')[0] == 400
+    assert _search(limit='x')[0] == 400
+    assert _search(limit='5', next_token='not-a-token')[0] == 400
+
+
+def test_paged_search_with_several_outcomes_keeps_every_filter(table):
+    _seed(table)
+    status, body = _search(outcomes='incidence,testing', statistic='median.and.interval', facet='sex,age', limit='10')
+    assert status == 200
+    assert _combos(body['plots']) == [
+        ('incidence', 'median.and.interval', 'age'), ('incidence', 'median.and.interval', 'sex'),
+        ('testing', 'median.and.interval', 'age'), ('testing', 'median.and.interval', 'sex'),
+    ]
+
+
+def test_statistic_search_uses_the_stat_facet_index(aws, monkeypatch):
+    table = create_plot_table(aws_clients.get_dynamodb_resource(), with_index=True)
+    _seed(table)
+    monkeypatch.setenv('DYNAMODB_STAT_FACET_INDEX', 'stat-facet-outcome-index')
+
+    status, body = _search(statistic='mean.and.interval', facet='sex,age')
+    assert status == 200
+    assert {(p['statistic_type'], p['facet_choice']) for p in body['plots']} == {
+        ('mean.and.interval', 'sex'), ('mean.and.interval', 'age')
+    }
+    assert len(body['plots']) == 6
+
+    # Paged with several outcomes: the index plan's facet filter and the outcome filter both apply
+    status, body = _search(outcomes='incidence,prevalence', statistic='mean.and.interval', facet='sex,age', limit='3')
+    seen = list(body['plots'])
+    while body['next_token']:
+        status, body = _search(outcomes='incidence,prevalence', statistic='mean.and.interval', facet='sex,age',
+                               limit='3', next_token=body['next_token'])
+        seen.extend(body['plots'])
+    assert _combos(seen) == [
+        ('incidence', 'mean.and.interval', 'age'), ('incidence', 'mean.and.interval', 'sex'),
+        ('prevalence', 'mean.and.interval', 'age'), ('prevalence', 'mean.and.interval', 'sex'),
+    ]
@@ -0,0 +1,111 @@
+import base64
+import gzip
+import io
+import json
+
+import pytest
+
+from src.handlers.city_data import get_city_data
+from src.handlers.summary_columnar import (
+    COLUMNAR_MEDIA_TYPE, accepts_columnar, decode_columnar, encode_columnar, read_columnar
+)
+from src.handlers.summary_data import index_key, summary_key, write_indexed_summary
+
+SUMMARY = {
+    'metadata': {
+        'city': 'C.12580',
+        'dimensions': {
+            'age': {'values': ['13-24 years', '25-34 years']},
+            'race': {'values': ['black', 'other_race']}
+        }
+    },
+    'simulations': {
+        'cessation': {'base': {
+            'incidence': {
+                'metadata': {'units': 'cases'},
+                'data': {
+                    '13-24 years_other_race': [
+                        {'year': 2020, 'value': 1.5, 'lower': 1.0, 'upper': 2.0},
+                        {'year': 2030, 'value': 2.5}
+                    ],
+                    '25-34 years_black': [{'year': 2025, 'value': 3.0, 'lower': 2.5, 'upper': 3.5}]
+                }
+            },
+            'prevalence': {
+                'metadata': {},
+                'data': {'unparseable': [{'year': 2020, 'value': 0.25}]}
+            }
+        }}
+    },
+    'observations': {'incidence_obs': {'metadata': {'simset_outcome': 'incidence'}, 'data': [1]}}
+}
+
+
+def test_round_trip_preserves_layout_and_values():
+    assert decode_columnar(encode_columnar(SUMMARY)) == SUMMARY
+
+
+def test_header_dictionary_encodes_strata_and_aligns_data():
+    blob = encode_columnar(SUMMARY)
+    header, data = read_columnar(blob)
+
+    assert header['years'] == [2020, 2025, 2030]
+    incidence, prevalence = header['sections']
+    assert incidence['dimensions'] == ['age', 'race']
+    assert incidence['codes'] == [[0, 1], [1, 0]]
+    assert prevalence['keys'] == ['unparseable']
+
+    # 3 columns x strata x years, and the float block starts 4-byte aligned
+    assert len(data) == 3 * 2 * 3 + 3 * 1 * 3
+    assert (len(blob) - len(data) * 4) % 4 == 0
+    assert prevalence['offset'] == 3 * 2 * 3
+
+
+def test_malformed_blobs_are_rejected():
+    with pytest.raises(ValueError):
+        read_columnar(b'JH')
+    with pytest.raises(ValueError):
+        read_columnar(b'NOPE' + encode_columnar(SUMMARY)[4:])
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (COLUMNAR_MEDIA_TYPE, True),
+    (f'application/json, {COLUMNAR_MEDIA_TYPE};q=0.9', True),
+    (f'{COLUMNAR_MEDIA_TYPE}; q=0', False),
+    ('application/json', False),
+    (None, False)
+])
+def test_accepts_columnar(accept, expected):
+    assert accepts_columnar(accept) is expected
+
+
+def test_city_data_serves_columnar_files_and_slices(s3, monkeypatch):
+    monkeypatch.setenv('SUMMARY_BUCKET_NAME', 'test-summary')
+    s3.create_bucket(Bucket='test-summary')
+    out = io.BytesIO()
+    index = write_indexed_summary(SUMMARY, out)
+    index['source_etag'] = s3.put_object(
+        Bucket='test-summary', Key=summary_key('C.12580'), Body=out.getvalue()
+    )['ETag']
+    s3.put_object(Bucket='test-summary', Key=index_key('C.12580'), Body=json.dumps(index).encode())
+    s3.put_object(
+        Bucket='test-summary', Key=summary_key('C.12580', '.col.gz'), Body=gzip.compress(encode_columnar(SUMMARY))
+    )
+
+    def get(params, headers):
+        return get_city_data({
+            'pathParameters': {'city': 'C.12580'},
+            'queryStringParameters': params,
+            'headers': dict(headers, Accept=COLUMNAR_MEDIA_TYPE)
+        }, None)
+
+    whole = get(None, {'Accept-Encoding': 'gzip'})
+    assert whole['headers']['Content-Type'] == COLUMNAR_MEDIA_TYPE
+    assert decode_columnar(gzip.decompress(base64.b64decode(whole['body']))) == SUMMARY
+
+    sliced = get({'outcome': 'incidence'}, {})
+    assert sliced['headers']['Content-Type'] == COLUMNAR_MEDIA_TYPE
+    decoded = decode_columnar(base64.b64decode(sliced['body']))
+    assert list(decoded['simulations']['cessation']['base']) == ['incidence']
+    assert decoded['simulations']['cessation']['base']['incidence'] == \
+        SUMMARY['simulations']['cessation']['base']['incidence']
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from orchestration_ledger import JobLedger
+from src.handlers.plot_content import content_hash, content_key
+from tests.conftest import BUCKET, plot_items, write_plot
+from tests.orchestration_helpers import fake_rscript, job_spec, make_orchestrator  # noqa: F401 (fixtures)
+from upload_plots import upload_plots
+
+
+@pytest.fixture
+def store(s3, table):
+    return s3, table
+
+
+def _stored_keys(s3):
+    return sorted(item["Key"] for item in s3.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+def test_upload_stores_each_body_once_and_skips_unchanged_reruns(store, tmp_path):
+    s3, table = store
+    shared = json.dumps({"data": "same"})
+    write_plot(tmp_path, "C.1", "cessation", "incidence", body=shared)
+    write_plot(tmp_path, "C.1", "brief", "incidence", body=shared)
+    write_plot(tmp_path, "C.1", "cessation", "prevalence")
+
+    stats = upload_plots(tmp_path, BUCKET)
+    assert {name: stats[name] for name in ("plots", "uploaded", "deduplicated", "registered", "unchanged", "failed")} == {
+        "plots": 3, "uploaded": 2, "deduplicated": 1, "registered": 3, "unchanged": 0, "failed": 0
+    }
+    item = table.get_item(Key={"city_scenario": "C.1#brief",
+                               "outcome_stat_facet": "incidence#mean.and.interval#none"})["Item"]
+    assert item["content_hash"] == content_hash(shared.encode())
+    assert item["s3_key"] == content_key(item["content_hash"])
+    assert len(_stored_keys(s3)) == 2
+
+    rerun = upload_plots(tmp_path, BUCKET)
+    assert rerun["uploaded"] == 0 and rerun["deduplicated"] == 3
+    assert rerun["registered"] == 0 and rerun["unchanged"] == 3
+
+
+def test_upload_is_scoped_to_the_given_files(store, tmp_path):
+    s3, table = store
+    chosen = write_plot(tmp_path, "C.1", "cessation", "incidence")
+    write_plot(tmp_path, "C.1", "cessation", "prevalence")
+
+    stats = upload_plots(tmp_path / "C.1", BUCKET, "C.1", plot_files=[chosen, chosen])
+    assert stats["plots"] == 1 and stats["registered"] == 1
+    assert _stored_keys(s3) == [content_key(content_hash(chosen.read_bytes()))]
+    assert len(plot_items(table)) == 1
+
+
+def test_missing_sidecar_is_reported_as_failed(store, tmp_path):
+    plot = write_plot(tmp_path, "C.1", "cessation", "incidence")
+    plot.with_name(f"{plot.stem}_metadata.json").unlink()
+
+    stats = upload_plots(tmp_path, BUCKET)
+    assert stats["plots"] == 1 and stats["failed"] == 1 and stats["registered"] == 0
+    assert str(plot) in stats["errors"][0]
+
+
+def test_orchestrator_publishes_only_the_plots_a_job_generated(store, make_orchestrator, fake_rscript, tmp_path):
+    s3, table = store
+    plots_dir = tmp_path / "plots"
+    # The fake R reports incidence; prevalence belongs to another chunk of the city
+    generated = write_plot(plots_dir, "C.1", "cessation", "incidence")
+    write_plot(plots_dir, "C.1", "cessation", "prevalence")
+
+    job = job_spec("C.1")
+    orchestrator = make_orchestrator([job], content_addressed=True, plots_dir=plots_dir)
+    result = orchestrator.execute_job(job)
+
+    assert result["success"] is True
+    assert result["content_store"]["plots"] == 1
+    assert _stored_keys(s3) == [content_key(content_hash(generated.read_bytes()))]
+    assert [item["outcome_stat_facet"] for item in plot_items(table)] == ["incidence#mean.and.interval#none"]
+
+
+def test_retry_also_publishes_plots_from_earlier_attempts(make_orchestrator, tmp_path):
+    plots_dir = tmp_path / "plots"
+    earlier = write_plot(plots_dir, "C.1", "brief", "prevalence")
+    current = write_plot(plots_dir, "C.1", "cessation", "incidence")
+    write_plot(plots_dir, "C.1", "cessation", "diagnosed")
+
+    job = job_spec("C.1", outcomes=("incidence", "prevalence"), scenarios=("cessation", "brief"))
+    orchestrator = make_orchestrator([job], content_addressed=True, plots_dir=plots_dir)
+    orchestrator.ledger = JobLedger(tmp_path / "ledger.jsonl")
+    orchestrator.ledger.plot_generated(job, "prevalence_mean.and.interval_none")
+
+    files = orchestrator._generated_files(job, ["incidence_mean.and.interval_none.json", "missing_plot"])
+    assert sorted(files) == sorted([earlier, current])
+    orchestrator.ledger.close()